@@ -0,0 +1,86 @@
+# benchmarks/bench_extraction.py
+"""
+Microbenchmark de la extracción de campos: compara la implementación
+anterior de FeatureExtractor.extract_fields (re.search sin compilar por
+patrón y dos búsquedas por bloque para la fecha de expedición) con el
+escáner compilado de ExtractionEngine, sobre páginas sintéticas con
+muchos bloques.
+
+Uso:
+    python -m benchmarks.bench_extraction --blocks 50 200 800
+"""
+import re
+import random
+import timeit
+import argparse
+from typing import Dict, List
+
+from config.settings import CONFIDENCE_THRESHOLD
+from src.features.feature_extractor import FeatureExtractor
+
+FILLER = [
+    'Consumo del periodo', 'Lectura anterior 4512', 'Puntos de pago autorizados',
+    'Historico de consumo', 'Subsidio estrato 2', 'Contribucion', 'Ajuste a la decena',
+    'Servicio al cliente 01 8000', 'Kilovatio hora', 'Calle 10 # 4-32 Barrio Centro',
+]
+
+FIELDS = [
+    'MATRÍCULA >> 2121717', 'Factura expedida el 18-Abr-2024',
+    'Fecha limite de pago: 17/05/2024', 'TOTAL A PAGAR: $ 8,640',
+]
+
+
+def make_page(blocks: int, seed: int = 0) -> List[Dict]:
+    """Página con los campos repartidos entre bloques de relleno."""
+    rng = random.Random(seed)
+    texts = [rng.choice(FILLER) for _ in range(max(blocks - len(FIELDS), 0))]
+    for text in FIELDS:
+        texts.insert(rng.randint(0, len(texts)), text)
+    return [{'text': text, 'confidence': 0.95, 'bbox': None} for text in texts]
+
+
+def legacy_extract_fields(extractor: FeatureExtractor, text_blocks: List[Dict]) -> Dict:
+    """Implementación anterior de extract_fields (sin plantilla), como referencia."""
+    fields = {}
+    text_combined = ' '.join(
+        block['text'] for block in text_blocks
+        if block.get('confidence', 0) >= CONFIDENCE_THRESHOLD
+    )
+    for block in text_blocks:
+        text = block['text']
+        if re.search(r'(?:generada|expedida|emisión)', text, re.IGNORECASE):
+            match = re.search(extractor.patrones_base['fecha_expedicion'], text, re.IGNORECASE)
+            if match:
+                fields['fecha_expedicion'] = extractor._clean_value(match.group(1), 'fecha')
+    for campo, patron in extractor.patrones_base.items():
+        if campo not in fields:
+            match = re.search(patron, text_combined, re.IGNORECASE)
+            if match:
+                fields[campo] = extractor._clean_value(match.group(1), campo)
+    return fields
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--blocks', type=int, nargs='+', default=[50, 200, 800], help='Bloques por página')
+    parser.add_argument('--repeat', type=int, default=5, help='Repeticiones de la medición')
+    args = parser.parse_args()
+
+    extractor = FeatureExtractor()
+    for blocks in args.blocks:
+        page = make_page(blocks)
+        expected = legacy_extract_fields(extractor, page)
+        if extractor.extract_fields(page) != expected:
+            raise SystemExit(f"Los resultados difieren con {blocks} bloques")
+
+        number = max(1, 20000 // blocks)
+        legacy = min(timeit.repeat(lambda: legacy_extract_fields(extractor, page),
+                                   number=number, repeat=args.repeat)) / number
+        engine = min(timeit.repeat(lambda: extractor.extract_fields(page),
+                                   number=number, repeat=args.repeat)) / number
+        print(f"{blocks:5d} bloques  anterior={legacy * 1e6:9.1f}µs  "
+              f"motor={engine * 1e6:9.1f}µs  aceleración={legacy / engine:5.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+# benchmarks/bench_quantization.py
+"""
+Compara el reconocedor FP32 con el cuantizado INT8 sobre las imágenes de
+data/raw: latencia por documento y concordancia de los campos extraídos.
+
+El repositorio no incluye etiquetas de referencia, por lo que la precisión
+se reporta como concordancia de campos del modo INT8 respecto a FP32.
+
+Uso:
+    python -m benchmarks.bench_quantization --limit 20
+"""
+import time
+import argparse
+import statistics
+from typing import Dict, List, Tuple
+
+from config.settings import RAW_DATA_DIR
+from src.ocr.ocr_engine import OCREngine
+from benchmarks.common import list_images
+
+
+def run_engine(engine: OCREngine, paths: List[str]) -> Tuple[List[float], List[Dict]]:
+    """Procesa cada imagen y mide su latencia."""
+    latencies, results = [], []
+    for path in paths:
+        start = time.perf_counter()
+        results.append(engine.process_image(path))
+        latencies.append(time.perf_counter() - start)
+    return latencies, results
+
+
+def field_agreement(reference: List[Dict], candidate: List[Dict]) -> float:
+    """Fracción de campos (unión de ambos modos) con el mismo valor."""
+    total = matched = 0
+    for ref, cand in zip(reference, candidate):
+        keys = set(ref['fields']) | set(cand['fields'])
+        total += len(keys)
+        matched += sum(ref['fields'].get(key) == cand['fields'].get(key) for key in keys)
+    return matched / total if total else 1.0
+
+
+def summarize(name: str, latencies: List[float], results: List[Dict]) -> str:
+    """Formatea una línea de resumen para un modo."""
+    ordered = sorted(latencies)
+    p95 = ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))]
+    fields = sum(len(result['fields']) for result in results)
+    valid = sum(result['is_valid'] for result in results)
+    return (
+        f"{name:>5}  media={statistics.mean(latencies) * 1000:8.1f}ms  "
+        f"p50={statistics.median(latencies) * 1000:8.1f}ms  p95={p95 * 1000:8.1f}ms  "
+        f"campos={fields:4d}  válidos={valid:3d}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--directory', default=RAW_DATA_DIR, help='Directorio con imágenes')
+    parser.add_argument('--limit', type=int, default=20, help='Máximo de imágenes (0 = todas)')
+    args = parser.parse_args()
+
+    paths = list_images(args.directory, args.limit)
+    if not paths:
+        raise SystemExit(f"No se encontraron imágenes en {args.directory}")
+
+    measurements = {}
+    for name, quantize in (('fp32', False), ('int8', True)):
+        engine = OCREngine(quantize=quantize)
+        engine.cache = None  # Medir siempre el OCR real
+        run_engine(engine, paths[:1])  # Calentamiento
+        measurements[name] = run_engine(engine, paths)
+
+    print(f"Imágenes: {len(paths)}")
+    for name, (latencies, results) in measurements.items():
+        print(summarize(name, latencies, results))
+
+    speedup = statistics.mean(measurements['fp32'][0]) / statistics.mean(measurements['int8'][0])
+    agreement = field_agreement(measurements['fp32'][1], measurements['int8'][1])
+    print(f"Aceleración INT8: {speedup:.2f}x  Concordancia de campos con FP32: {agreement:.1%}")
+
+
+if __name__ == '__main__':
+    main()
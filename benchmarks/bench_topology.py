@@ -0,0 +1,44 @@
+# benchmarks/bench_topology.py
+"""
+Ajusta el reparto de núcleos de OCRWorkerPool: mide el throughput de cada
+combinación workers × hilos sobre imágenes de data/raw y guarda la mejor en
+OCR_TOPOLOGY_FILE, de donde la toma OCRWorkerPool por defecto.
+
+Uso:
+    python -m benchmarks.bench_topology --limit 8 --cores 8
+"""
+import argparse
+
+from config.settings import RAW_DATA_DIR, OCR_CORE_BUDGET, OCR_PIN_CORES, OCR_TOPOLOGY_FILE
+from src.ocr.worker_pool import OCRWorkerPool
+from benchmarks.common import list_images
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--directory', default=RAW_DATA_DIR, help='Directorio con imágenes')
+    parser.add_argument('--limit', type=int, default=8, help='Máximo de imágenes de muestra (0 = todas)')
+    parser.add_argument('--cores', type=int, default=OCR_CORE_BUDGET, help='Presupuesto de núcleos')
+    parser.add_argument('--rounds', type=int, default=2, help='Repeticiones de la muestra por reparto')
+    parser.add_argument('--pin', action='store_true', default=OCR_PIN_CORES, help='Fijar workers a núcleos')
+    parser.add_argument('--output', default=OCR_TOPOLOGY_FILE, help='Archivo donde guardar la topología')
+    args = parser.parse_args()
+
+    paths = list_images(args.directory, args.limit)
+    if not paths:
+        raise SystemExit(f"No se encontraron imágenes en {args.directory}")
+
+    topology = OCRWorkerPool.autotune(
+        paths, core_budget=args.cores, rounds=args.rounds,
+        pin_cores=args.pin, topology_file=args.output
+    )
+
+    print(f"Imágenes: {len(paths)}  Núcleos: {args.cores}")
+    for item in topology['measurements']:
+        print(f"{item['workers']:3d} workers × {item['threads']:2d} hilos  "
+              f"{item['images_per_second']:7.2f} imágenes/s")
+    print(f"Mejor reparto: {topology['workers']} × {topology['threads']} (guardado en {args.output})")
+
+
+if __name__ == '__main__':
+    main()
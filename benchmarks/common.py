@@ -0,0 +1,18 @@
+# benchmarks/common.py
+#
+# Utilidades compartidas por los benchmarks. Este módulo no importa torch,
+# cv2 ni OCREngine: bench_topology lo importa desde el módulo principal, que
+# los workers 'spawn' vuelven a importar antes de limitar sus hilos.
+import os
+import glob
+from typing import List
+
+
+def list_images(directory: str, limit: int) -> List[str]:
+    """Lista las imágenes del directorio (recursivo), ordenadas por nombre."""
+    paths = sorted(
+        path
+        for extension in ('jpg', 'jpeg', 'png')
+        for path in glob.glob(os.path.join(directory, '**', f'*.{extension}'), recursive=True)
+    )
+    return paths[:limit] if limit else paths
@@ -10,6 +10,8 @@ PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DATA_DIR = os.path.join(PROJECT_ROOT, 'data')
 RAW_DATA_DIR = os.path.join(DATA_DIR, 'raw')
 PROCESSED_DATA_DIR = os.path.join(DATA_DIR, 'processed')
+CACHE_DIR = os.path.join(DATA_DIR, 'cache')
+RAW_STORE_INDEX_FILE = os.path.join(RAW_DATA_DIR, 'index.jsonl')  # Nombres originales -> hash
 
 
 
@@ -20,18 +22,79 @@ MAX_FILE_SIZE = 5 * 1024 * 1024  # 5MB
 # Configuraciones de EasyOCR
 OCR_LANGUAGES = ['es']  # Español
 OCR_GPU = False  # Cambiar a True si se dispone de GPU
+OCR_QUANTIZE = True  # Cuantización dinámica INT8 (Linear/LSTM) del reconocedor en CPU
 OCR_MODEL_STORAGE = os.path.join(PROJECT_ROOT, 'models')
+OCR_BATCH_SIZE = 8  # Imágenes por llamada a readtext_batched en OCREngine.process_batch
+OCR_BATCH_SIZE_BUCKET = 64  # Las imágenes cuyo tamaño difiere menos que esto (px) se agrupan
+
+# OCR progresivo: detectar, reconocer primero las regiones más prometedoras y
+# parar cuando estén todos los campos requeridos del tipo de documento
+OCR_PROGRESSIVE = os.getenv('OCR_PROGRESSIVE', 'false').lower() == 'true'
+OCR_REGION_PRIOR_GRID = (8, 8)  # Filas y columnas de la rejilla de posiciones aprendidas
+OCR_REGION_PRIORS_FILE = os.path.join(DATA_DIR, 'region_priors.json')
+OCR_REGION_PRIORS_SAVE_EVERY = 25  # Documentos aprendidos entre guardados de las posiciones
+
+# Plantillas de diseño: alinear la página con su tipo y reconocer solo las regiones de los campos
+OCR_USE_TEMPLATES = os.getenv('OCR_USE_TEMPLATES', 'false').lower() == 'true'
+LAYOUT_TEMPLATES_DIR = os.path.join(DATA_DIR, 'templates')
+LAYOUT_THUMBNAIL_WIDTH = 256  # Ancho de las miniaturas usadas para alinear
+LAYOUT_MIN_CONFIDENCE = 0.3  # Respuesta mínima de la correlación de fase para usar la plantilla
+LAYOUT_MAX_ASPECT_DIFF = 0.1  # Diferencia relativa máxima de proporción página/plantilla
+LAYOUT_MAX_SHIFT = 0.1  # Desplazamiento máximo aceptado, relativo al tamaño de la página
+LAYOUT_REGION_MARGIN = 0.02  # Margen normalizado añadido a cada región al recortar
+
+# Refinamiento: volver a reconocer, recortados de la imagen original y ampliados,
+# solo los bloques de baja confianza junto a etiquetas de campos
+OCR_REFINE = os.getenv('OCR_REFINE', 'false').lower() == 'true'
+OCR_REFINE_SCALE = 2.0  # Factor de ampliación de los recortes
+OCR_REFINE_PADDING = 0.25  # Margen de cada recorte, relativo al alto del bloque
+OCR_REFINE_MAX_BLOCKS = 12  # Máximo de bloques refinados por página
+
+# Backend de inferencia: 'torch' (EasyOCR en PyTorch) u 'onnx' (ONNX Runtime en CPU)
+OCR_BACKEND = os.getenv('OCR_BACKEND', 'torch').lower()
+ONNX_OPSET = 17  # Versión de opset usada al exportar los modelos
+ONNX_INTRA_OP_THREADS = 0  # Hilos por operador de ONNX Runtime (0 = los de torch.get_num_threads())
+ONNX_INTER_OP_THREADS = 1  # Hilos entre operadores (el grafo se ejecuta secuencialmente)
+
+# Reparto de núcleos entre procesos OCR (OCRWorkerPool)
+OCR_CORE_BUDGET = os.cpu_count() or 1  # Núcleos totales para todos los workers OCR
+OCR_THREADS_PER_WORKER = 2  # Hilos por worker si no hay una topología ajustada
+OCR_PIN_CORES = False  # Fijar cada worker a su propio subconjunto de núcleos (solo Linux)
+OCR_TOPOLOGY_FILE = os.path.join(DATA_DIR, 'ocr_topology.json')  # Mejor reparto hallado por autotune
 
 # Configuraciones de procesamiento de imágenes
 IMAGE_MIN_SIZE = 800  # Tamaño mínimo del lado más corto
 IMAGE_MAX_SIZE = 2400  # Tamaño máximo del lado más largo
 IMAGE_QUALITY = 90  # Calidad de imagen procesada (0-100)
 
+# Procesos usados por ImageProcessor.process_batch
+PREPROCESSING_WORKERS = os.cpu_count() or 1
+
+# Configuraciones de corrección de inclinación
+DESKEW_ANALYSIS_SIZE = 600  # Lado más largo de la copia reducida usada para estimar el ángulo
+DESKEW_ANGLE_TOLERANCE = 0.5  # Grados por debajo de los cuales no se rota la imagen
+DESKEW_MAX_ANGLE = 10  # Máxima inclinación buscada en grados (en ambos sentidos)
+DESKEW_MAX_POINTS = 8000  # Máximo de píxeles de texto usados en los perfiles de proyección
+
 # Asegurarse de que los directorios existan
 os.makedirs(RAW_DATA_DIR, exist_ok=True)
 os.makedirs(PROCESSED_DATA_DIR, exist_ok=True)
+os.makedirs(CACHE_DIR, exist_ok=True)
 os.makedirs(OCR_MODEL_STORAGE, exist_ok=True)
 
+# Configuraciones de la caché de resultados
+CACHE_ENABLED = os.getenv('CACHE_ENABLED', 'true').lower() == 'true'
+CACHE_MAX_SIZE = {  # Tamaño máximo en bytes por nivel
+    'preprocessed': 512 * 1024 * 1024,
+    'ocr': 64 * 1024 * 1024,
+    'fields': 16 * 1024 * 1024,
+}
+# Fracción del tamaño máximo escrita por un proceso tras la que vuelve a medir el
+# directorio del nivel (los procesos que comparten CACHE_DIR escriben en él)
+CACHE_RESCAN_FRACTION = 0.1
+# Segundos durante los que un acierto no vuelve a actualizar la fecha de acceso en disco
+CACHE_TOUCH_INTERVAL = 300
+
 # Configuraciones de la aplicación web
 STREAMLIT_TITLE = "Sistema de Procesamiento de Documentos"
 STREAMLIT_DESCRIPTION = """
@@ -39,6 +102,26 @@ Sistema de procesamiento automático de documentos basado en EasyOCR
 para la digitalización y extracción estructurada de información de facturas y recibos.
 """
 
+# Estrategia de FeatureExtractor: 'text' (patrones sobre el texto concatenado) o
+# 'spatial' (cada etiqueta con el bloque a su derecha o debajo, por sus cajas)
+EXTRACTION_STRATEGY = os.getenv('EXTRACTION_STRATEGY', 'text').lower()
+
+# Corrección aproximada de etiquetas antes de extraer campos ("T0TAL" -> "TOTAL")
+FUZZY_LABELS = os.getenv('FUZZY_LABELS', 'false').lower() == 'true'
+# Vocabulario de palabras de las etiquetas de los campos
+LABEL_VOCABULARY = [
+    'matrícula', 'identificación', 'documento', 'código',
+    'total', 'valor', 'pagar', 'hasta', 'pagas', 'antes',
+    'fecha', 'factura', 'emisión', 'emitido', 'expedición', 'expedida', 'generada', 'generación',
+    'vence', 'vencimiento', 'límite', 'limite', 'plazo', 'recargo', 'tengo',
+]
+# Palabras corrientes a distancia 1 de una etiqueta, que nunca se corrigen
+LABEL_COMMON_WORDS = [
+    'plaza', 'plazas', 'vende', 'venda', 'pagos', 'pagan', 'fechas', 'hecha', 'valer', 'calor',
+    'ante', 'entes', 'pasta', 'facturas', 'documentos', 'códigos', 'recargos', 'tenga', 'vengo',
+    'emitida', 'emitidos', 'expedido', 'generado', 'límites', 'limites',
+]
+
 # Configuraciones de validación
 CONFIDENCE_THRESHOLD = 0.85  # Umbral de confianza para la extracción de texto
 
@@ -77,8 +160,14 @@ DOCUMENT_TYPES = {
 }
 
 # Configuraciones de exportación
-EXPORT_FORMATS = ['json', 'csv']
+EXPORT_FORMATS = ['json', 'csv', 'jsonl', 'parquet', 'xlsx']
 DEFAULT_EXPORT_FORMAT = 'json'
+# Exportación en streaming: se abre un archivo nuevo al llegar a cualquiera
+# de los dos límites (0 desactiva el límite)
+EXPORT_ROTATE_BYTES = int(os.getenv('EXPORT_ROTATE_BYTES', str(64 * 1024 * 1024)))
+EXPORT_ROTATE_RECORDS = int(os.getenv('EXPORT_ROTATE_RECORDS', '100000'))
+EXPORT_BUFFER_SIZE = 1024 * 1024  # Búfer de escritura de cada archivo
+EXPORT_ROW_GROUP_SIZE = int(os.getenv('EXPORT_ROW_GROUP_SIZE', '50000'))  # Filas por grupo en Parquet
 
 # Configuraciones de logging
 LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
@@ -0,0 +1,165 @@
+# src/features/document.py
+from bisect import bisect_right
+from functools import cached_property
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from config.settings import CONFIDENCE_THRESHOLD
+
+# Separador de bloques de isolated_text: ningún patrón de campo lo acepta,
+# así que una coincidencia no cruza de un bloque a otro
+BLOCK_SEPARATOR = '\x00'
+
+
+def _join(blocks: List[Dict[str, Any]], separator: str) -> Tuple[str, List[int]]:
+    """Une los textos de los bloques y devuelve el inicio de cada uno."""
+    starts, position = [], 0
+    for block in blocks:
+        starts.append(position)
+        position += len(block['text']) + len(separator)
+    return separator.join(block['text'] for block in blocks), starts
+
+
+class Document:
+    """
+    Bloques OCR de un documento con sus vistas de texto calculadas una sola vez.
+
+    Las vistas (texto combinado, en minúsculas, filtrado por confianza, con
+    los bloques aislados) se construyen la primera vez que se piden y se
+    reutilizan en todas las etapas (detección del tipo, extracción de
+    campos, plantillas). Cada vista de texto guarda el inicio de cada bloque,
+    de modo que una posición de una coincidencia se puede llevar de vuelta a
+    su bloque y a su caja.
+    """
+
+    def __init__(self, blocks: List[Dict[str, Any]], confidence_threshold: float = CONFIDENCE_THRESHOLD):
+        """
+        Args:
+            blocks (List[Dict[str, Any]]): Bloques {'text', 'confidence', 'bbox'}
+                en orden de lectura
+            confidence_threshold (float): Confianza mínima de las vistas filtradas
+        """
+        self.blocks = blocks
+        self.confidence_threshold = confidence_threshold
+        self._normalized: Dict[int, 'Document'] = {}
+
+    @classmethod
+    def coerce(cls, blocks: Union['Document', List[Dict[str, Any]]]) -> 'Document':
+        """
+        Devuelve el mismo Document o envuelve una lista de bloques.
+
+        Args:
+            blocks: Document o lista de bloques
+
+        Returns:
+            Document: Documento
+        """
+        return blocks if isinstance(blocks, Document) else cls(blocks)
+
+    def __len__(self) -> int:
+        return len(self.blocks)
+
+    def __iter__(self):
+        return iter(self.blocks)
+
+    @cached_property
+    def confident_blocks(self) -> List[Dict[str, Any]]:
+        """Bloques con confianza suficiente."""
+        return [
+            block for block in self.blocks
+            if block.get('confidence', 0) >= self.confidence_threshold
+        ]
+
+    @cached_property
+    def _text_view(self) -> Tuple[str, List[int]]:
+        return _join(self.blocks, ' ')
+
+    @cached_property
+    def _confident_view(self) -> Tuple[str, List[int]]:
+        return _join(self.confident_blocks, ' ')
+
+    @cached_property
+    def _isolated_view(self) -> Tuple[str, List[int]]:
+        return _join(self.blocks, BLOCK_SEPARATOR)
+
+    @property
+    def text(self) -> str:
+        """Texto de todos los bloques unidos por espacios."""
+        return self._text_view[0]
+
+    @cached_property
+    def lower_text(self) -> str:
+        """text en minúsculas (mismas posiciones salvo caracteres que cambian de largo)."""
+        return self.text.lower()
+
+    @property
+    def confident_text(self) -> str:
+        """Texto de los bloques con confianza suficiente unidos por espacios."""
+        return self._confident_view[0]
+
+    @property
+    def isolated_text(self) -> str:
+        """Texto de todos los bloques unidos por BLOCK_SEPARATOR."""
+        return self._isolated_view[0]
+
+    def block_at(self, offset: int, view: str = 'confident') -> Optional[int]:
+        """
+        Bloque que contiene una posición de una vista de texto.
+
+        Args:
+            offset (int): Posición en la vista
+            view (str): 'text', 'confident' o 'isolated'
+
+        Returns:
+            Optional[int]: Índice del bloque en la lista de esa vista (blocks, o
+            confident_blocks para 'confident'); None si la posición está fuera
+        """
+        text, starts = self._view(view)
+        if not starts or offset < 0 or offset >= len(text):
+            return None
+        return bisect_right(starts, offset) - 1
+
+    def blocks_in_span(self, start: int, end: int, view: str = 'confident') -> List[Dict[str, Any]]:
+        """
+        Bloques que cubre un tramo [start, end) de una vista de texto.
+
+        Args:
+            start (int): Inicio del tramo
+            end (int): Fin del tramo
+            view (str): 'text', 'confident' o 'isolated'
+
+        Returns:
+            List[Dict[str, Any]]: Bloques en orden de lectura
+        """
+        first = self.block_at(start, view)
+        if first is None:
+            return []
+        last = self.block_at(max(start, end - 1), view)
+        blocks = self.confident_blocks if view == 'confident' else self.blocks
+        return blocks[first:(first if last is None else last) + 1]
+
+    def _view(self, view: str) -> Tuple[str, List[int]]:
+        if view == 'confident':
+            return self._confident_view
+        if view == 'text':
+            return self._text_view
+        if view == 'isolated':
+            return self._isolated_view
+        raise ValueError(f"Vista de texto desconocida: {view}")
+
+    def normalized(self, matcher) -> 'Document':
+        """
+        Documento con las etiquetas corregidas por un FuzzyLabelMatcher.
+
+        Args:
+            matcher (FuzzyLabelMatcher): Corrector de etiquetas
+
+        Returns:
+            Document: Documento corregido (guardado para siguientes llamadas con
+            el mismo corrector; el propio documento si no cambia ningún bloque)
+        """
+        key = id(matcher)
+        if key not in self._normalized:
+            blocks = matcher.normalize_blocks(self.blocks)
+            changed = any(new is not old for new, old in zip(blocks, self.blocks))
+            self._normalized[key] = Document(blocks, self.confidence_threshold) if changed else self
+        return self._normalized[key]
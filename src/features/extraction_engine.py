@@ -0,0 +1,165 @@
+# src/features/extraction_engine.py
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, NamedTuple, Optional, Pattern, Tuple
+
+# Escapes cuyo significado cambia al pasar el patrón a minúsculas
+# (códigos de carácter y nombres Unicode)
+_CASE_SENSITIVE_ESCAPE = re.compile(r'\\[xuUN0-7]')
+_PATTERN_TOKEN = re.compile(r'\\.|[^\\]+', re.DOTALL)
+
+
+def _fold_pattern(pattern: str) -> Optional[str]:
+    """
+    Pasa a minúsculas los literales de un patrón, sin tocar sus escapes.
+
+    Returns:
+        Optional[str]: Patrón equivalente para texto en minúsculas, o None si
+        el patrón no se puede convertir con seguridad
+    """
+    if _CASE_SENSITIVE_ESCAPE.search(pattern):
+        return None
+    return _PATTERN_TOKEN.sub(
+        lambda token: token.group(0) if token.group(0).startswith('\\') else token.group(0).lower(),
+        pattern
+    )
+
+
+class FieldMatch(NamedTuple):
+    """Coincidencia de un campo en el texto, con sus posiciones."""
+    field: str
+    value: str  # Grupo 1 del patrón (sin limpiar)
+    start: int  # Inicio de la coincidencia completa
+    end: int  # Fin de la coincidencia completa
+    value_start: int  # Inicio del valor
+    value_end: int  # Fin del valor
+
+
+class _ScanText:
+    """Texto preparado una sola vez para buscar todos los campos."""
+
+    __slots__ = ('text', 'folded')
+
+    def __init__(self, text: str, fold: bool):
+        self.text = text
+        folded = text.lower() if fold else None
+        # Solo se usa la versión en minúsculas si conserva las posiciones
+        self.folded = folded if folded is not None and len(folded) == len(text) else None
+
+
+class ExtractionEngine:
+    """
+    Motor de extracción de campos con los patrones compilados una vez por proceso.
+
+    Con re.IGNORECASE, el motor de re de CPython no puede saltar
+    rápidamente a las posiciones candidatas y prueba el patrón en cada
+    carácter. Por eso el texto se pasa a minúsculas una sola vez y cada
+    patrón se compila, también en minúsculas, sin esa bandera; los valores se
+    toman del texto original por posición. Cada campo se busca con su propio
+    patrón compilado: en re una alternancia con grupos con nombre de todos
+    los patrones es más lenta que las búsquedas separadas, porque prueba
+    todas las ramas en cada posición.
+
+    El resultado es el mismo que con re.search por campo: la primera
+    coincidencia de cada patrón, con su grupo 1 como valor.
+    """
+
+    def __init__(self, patterns: Dict[str, str], flags: int = 0):
+        """
+        Compila los patrones.
+
+        Args:
+            patterns (Dict[str, str]): Patrón de cada campo (el grupo 1 es el valor)
+            flags (int): Banderas de re comunes a todos los patrones
+        """
+        self.fields = tuple(patterns)
+        self.flags = flags
+        self.compiled: Dict[str, Pattern] = {
+            field: re.compile(pattern, flags) for field, pattern in patterns.items()
+        }
+        # Patrones para el texto en minúsculas (solo con re.IGNORECASE)
+        self._folded: Dict[str, Pattern] = {}
+        if flags & re.IGNORECASE:
+            for field, pattern in patterns.items():
+                folded = _fold_pattern(pattern)
+                if folded is not None:
+                    self._folded[field] = re.compile(folded, flags & ~re.IGNORECASE)
+
+    @classmethod
+    def for_patterns(cls, patterns: Dict[str, str], flags: int = 0) -> 'ExtractionEngine':
+        """
+        Obtiene el motor compilado de un juego de patrones, reutilizándolo entre llamadas.
+
+        Args:
+            patterns (Dict[str, str]): Patrón de cada campo
+            flags (int): Banderas de re
+
+        Returns:
+            ExtractionEngine: Motor compartido
+        """
+        return _compiled_engine(tuple(patterns.items()), flags)
+
+    def _finditer(self, field: str, text: _ScanText) -> Iterator[FieldMatch]:
+        """Coincidencias de un campo, con el valor tomado del texto original."""
+        pattern = self._folded.get(field) if text.folded is not None else None
+        if pattern is None:
+            pattern, subject = self.compiled[field], text.text
+        else:
+            subject = text.folded
+        for match in pattern.finditer(subject):
+            start, end = match.span(1)
+            value = text.text[start:end] if start >= 0 else None
+            yield FieldMatch(field, value, match.start(), match.end(), start, end)
+
+    def finditer(self, field: str, text: str) -> Iterator[FieldMatch]:
+        """
+        Recorre las coincidencias de un campo en orden.
+
+        Args:
+            field (str): Campo
+            text (str): Texto donde buscar
+
+        Returns:
+            Iterator[FieldMatch]: Coincidencias sin solapamiento, como re.finditer
+        """
+        return self._finditer(field, _ScanText(text, field in self._folded))
+
+    def search(self, field: str, text: str) -> Optional[FieldMatch]:
+        """
+        Busca la primera coincidencia de un campo.
+
+        Args:
+            field (str): Campo
+            text (str): Texto donde buscar
+
+        Returns:
+            Optional[FieldMatch]: Primera coincidencia o None
+        """
+        return next(self.finditer(field, text), None)
+
+    def scan(self, text: str, fields: Optional[Iterable[str]] = None) -> Dict[str, FieldMatch]:
+        """
+        Busca la primera coincidencia de cada campo, preparando el texto una sola vez.
+
+        Args:
+            text (str): Texto donde buscar
+            fields (Iterable[str]): Campos a buscar (None para todos)
+
+        Returns:
+            Dict[str, FieldMatch]: Primera coincidencia de cada campo encontrado,
+            en el orden de los patrones
+        """
+        wanted = self.fields if fields is None else set(fields)
+        prepared = _ScanText(text, bool(self._folded))
+        found = {}
+        for field in self.fields:
+            if field in wanted:
+                match = next(self._finditer(field, prepared), None)
+                if match is not None:
+                    found[field] = match
+        return found
+
+
+@lru_cache(maxsize=32)
+def _compiled_engine(items: Tuple[Tuple[str, str], ...], flags: int) -> ExtractionEngine:
+    return ExtractionEngine(dict(items), flags)
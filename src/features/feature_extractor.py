@@ -1,29 +1,66 @@
 # src/features/feature_extractor.py
 import re
 import logging
-from typing import List, Dict, Any, Optional
-from config.settings import CONFIDENCE_THRESHOLD
+from typing import List, Dict, Any, Optional, Union
+from config.settings import EXTRACTION_STRATEGY, FUZZY_LABELS
+from src.ocr.layout_templates import AlignedLayout, LayoutTemplates
+from src.validation.date_parser import DateParser
+from .extraction_engine import ExtractionEngine
+from .spatial_index import SpatialIndex
+from .keyword_automaton import KeywordAutomaton
+from .label_matcher import FuzzyLabelMatcher
+from .document import Document
+
+# Palabras que marcan un bloque con la fecha de expedición
+EXPEDICION_TRIGGER = re.compile(r'(?:generada|expedida|emisión)', re.IGNORECASE)
 
 class FeatureExtractor:
-    def __init__(self):
-        """Inicializa los patrones de extracción para campos comunes en cualquier factura."""
-        # Patrones base que deberían funcionar en cualquier factura
-        self.patrones_base = {
-            'identificacion': r'(?:Nro\.? (?:de )?(?:identificación|documento)|ID|NIT|MATRÍCULA|código)[\s:>>]*([A-Z0-9-]+)',
-            
+    # Estrategias de extracción: 'text' busca los patrones completos en el texto
+    # concatenado; 'spatial' empareja cada etiqueta con el bloque a su derecha o debajo
+    STRATEGIES = ('text', 'spatial')
+
+    # Palabras clave de cada tipo de factura
+    PALABRAS_CLAVE_TIPO = {
+        'gas': ['gas natural', 'consumo de gas', 'efigas'],
+        'luz': ['energía eléctrica', 'consumo de energía', 'alumbrado'],
+        'agua': ['acueducto', 'consumo de agua', 'alcantarillado'],
+        'telefono': ['plan móvil', 'telefonía', 'minutos'],
+        'internet': ['megabytes', 'fibra óptica', 'banda ancha']
+    }
+
+    def __init__(self, strategy: str = EXTRACTION_STRATEGY, fuzzy_labels: bool = FUZZY_LABELS):
+        """
+        Inicializa los patrones de extracción para campos comunes en cualquier factura.
+
+        Args:
+            strategy (str): Estrategia de extracción por defecto ('text' o 'spatial')
+            fuzzy_labels (bool): Corregir las etiquetas mal reconocidas antes de
+                extraer (ver FuzzyLabelMatcher)
+        """
+        if strategy not in self.STRATEGIES:
+            raise ValueError(f"Estrategia de extracción no soportada: {strategy}")
+        self.strategy = strategy
+        self.label_matcher = FuzzyLabelMatcher.for_vocabulary() if fuzzy_labels else None
+
+        # Etiqueta de cada campo base y valor que la sigue (el grupo 1 es el valor)
+        self.etiquetas = {
+            'identificacion': r'(?:Nro\.? (?:de )?(?:identificación|documento)|ID|NIT|MATRÍCULA|código)[\s:>>]*',
             'fecha_expedicion': (
                 r'(?:generada|expedida|emisión|emitido|fecha)(?:\s+(?:de|el))?\s*'
                 r'(?:expedición|emisión|generación)?[:\s]*'
-                r'(\d{1,2}[-/\s][A-Za-z]{3,10}[-/\s]\d{4}|\d{1,2}[-/]\d{1,2}[-/]\d{4}|\d{4}[-/]\d{1,2}[-/]\d{1,2})'
             ),
-            
-            'fecha_vencimiento': (
-                r'(?:vence|vencimiento|pagar hasta|límite|plazo|si no pagas antes de)'
-                r'[:\s]*(\d{1,2}[-/\s][A-Za-z]{3,10}[-/\s]\d{4}|\d{1,2}[-/]\d{1,2}[-/]\d{4})'
-            ),
-            
-            'total': r'(?:total|valor total|total a pagar|valor a pagar)[:\s]*\$?\s*([\d,.]+)',
+            'fecha_vencimiento': r'(?:vence|vencimiento|pagar hasta|límite|plazo|si no pagas antes de)[:\s]*',
+            'total': r'(?:total|valor total|total a pagar|valor a pagar)[:\s]*',
         }
+        self.valores = {
+            'identificacion': r'([A-Z0-9-]+)',
+            'fecha_expedicion': r'(\d{1,2}[-/\s][A-Za-z]{3,10}[-/\s]\d{4}|\d{1,2}[-/]\d{1,2}[-/]\d{4}|\d{4}[-/]\d{1,2}[-/]\d{1,2})',
+            'fecha_vencimiento': r'(\d{1,2}[-/\s][A-Za-z]{3,10}[-/\s]\d{4}|\d{1,2}[-/]\d{1,2}[-/]\d{4})',
+            'total': r'\$?\s*([\d,.]+)',
+        }
+
+        # Patrones base que deberían funcionar en cualquier factura
+        self.patrones_base = {campo: self.etiquetas[campo] + self.valores[campo] for campo in self.etiquetas}
         
         # Patrones adicionales específicos por tipo de documento
         self.patrones_especificos = {
@@ -38,31 +75,135 @@ class FeatureExtractor:
             # Se pueden agregar más tipos de facturas
         }
 
-    def extract_fields(self, text_blocks: List[Dict[str, Any]]) -> Dict[str, Any]:
-        if not self._validate_input(text_blocks):
+        # Escáneres compilados una vez por proceso para los patrones base, las
+        # etiquetas que terminan un bloque y los valores al inicio de un bloque
+        # (estos dos para la estrategia espacial)
+        self.engine = ExtractionEngine.for_patterns(self.patrones_base, re.IGNORECASE)
+        self.label_engine = ExtractionEngine.for_patterns(
+            {campo: f'({patron})' + r'[\s:>$]*$' for campo, patron in self.etiquetas.items()}, re.IGNORECASE
+        )
+        self.value_engine = ExtractionEngine.for_patterns(
+            {campo: r'^\s*' + patron for campo, patron in self.valores.items()}, re.IGNORECASE
+        )
+
+    def extract_fields(self, text_blocks: Union[Document, List[Dict[str, Any]]],
+                       layout: Optional[AlignedLayout] = None,
+                       strategy: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Extrae los campos base de los bloques OCR.
+
+        Args:
+            text_blocks (Document | List[Dict[str, Any]]): Documento o bloques
+                {'text', 'confidence', 'bbox'}
+            layout (AlignedLayout): Plantilla de diseño alineada con la página; si
+                se indica, cada campo se busca primero solo en los bloques de su región
+            strategy (str): 'text' o 'spatial' (por defecto la del extractor); con
+                'spatial' los campos se buscan primero con extract_fields_spatial y
+                el texto concatenado solo completa los que falten
+
+        Returns:
+            Dict[str, Any]: Campos extraídos
+        """
+        if not isinstance(text_blocks, Document) and not self._validate_input(text_blocks):
+            return {}
+        document = Document.coerce(text_blocks)
+        if not document.blocks:
             return {}
 
+        strategy = strategy or self.strategy
+        if strategy not in self.STRATEGIES:
+            raise ValueError(f"Estrategia de extracción no soportada: {strategy}")
+        if self.label_matcher is not None:
+            document = document.normalized(self.label_matcher)
+
         fields = {}
-        text_combined = self._get_combined_text(text_blocks)
-
-        # Procesar cada bloque individualmente para fechas
-        for block in text_blocks:
-            text = block['text']
-            # Buscar fecha de expedición
-            if re.search(r'(?:generada|expedida|emisión)', text, re.IGNORECASE):
-                match = re.search(self.patrones_base['fecha_expedicion'], text, re.IGNORECASE)
-                if match:
-                    fields['fecha_expedicion'] = self._clean_value(match.group(1), 'fecha')
 
-        # Procesar texto combinado para otros campos
-        for campo, patron in self.patrones_base.items():
-            if campo not in fields:  # No sobrescribir fechas ya encontradas
-                match = re.search(patron, text_combined, re.IGNORECASE)
+        if strategy == 'spatial':
+            fields.update(self.extract_fields_spatial(document))
+
+        if layout is not None:
+            for campo in self.patrones_base:
+                if campo in fields:
+                    continue
+                region_blocks = [block for block in document.blocks if layout.contains(campo, block.get('bbox'))]
+                match = self.engine.search(campo, self._get_combined_text(region_blocks))
                 if match:
-                    fields[campo] = self._clean_value(match.group(1), campo)
+                    fields[campo] = self._clean_value(match.value, campo)
+
+        # Buscar la fecha de expedición bloque a bloque, en un solo recorrido:
+        # vale la primera coincidencia del último bloque que la anuncie
+        if 'fecha_expedicion' not in fields:
+            last_index = None
+            for match in self.engine.finditer('fecha_expedicion', document.isolated_text):
+                index = document.block_at(match.start, 'isolated')
+                if index != last_index and EXPEDICION_TRIGGER.search(document.blocks[index]['text']):
+                    fields['fecha_expedicion'] = self._clean_value(match.value, 'fecha')
+                    last_index = index
+
+        # Procesar texto combinado para otros campos en una sola pasada
+        pending = [campo for campo in self.patrones_base if campo not in fields]
+        for campo, match in self.engine.scan(document.confident_text, pending).items():
+            fields[campo] = self._clean_value(match.value, campo)
 
         return fields
 
+    def extract_fields_spatial(self, text_blocks: Union[Document, List[Dict[str, Any]]]) -> Dict[str, Any]:
+        """
+        Extrae los campos base emparejando etiquetas y valores por posición.
+
+        Los bloques se recorren en orden de lectura. Si un bloque contiene
+        etiqueta y valor, se usa el patrón completo del campo; si la etiqueta
+        termina el bloque, el valor se toma del bloque más cercano a su
+        derecha en la misma línea o, en su defecto, del más cercano debajo
+        (ver SpatialIndex). Así un valor de otra columna no se empareja con la
+        etiqueta aunque la siga en el texto concatenado.
+
+        Args:
+            text_blocks (Document | List[Dict[str, Any]]): Documento o bloques
+                {'text', 'confidence', 'bbox'}
+
+        Returns:
+            Dict[str, Any]: Campos encontrados (los bloques sin 'bbox' solo aportan
+            valores dentro del propio bloque)
+        """
+        blocks = Document.coerce(text_blocks).confident_blocks
+        index = SpatialIndex(blocks)
+
+        fields = {}
+        for position, block in enumerate(blocks):
+            pending = [campo for campo in self.etiquetas if campo not in fields]
+            if not pending:
+                break
+            for campo, match in self.engine.scan(block['text'], pending).items():
+                fields[campo] = self._clean_value(match.value, campo)
+
+            labels = self.label_engine.scan(block['text'], [campo for campo in pending if campo not in fields])
+            if not labels:
+                continue
+            neighbours = [i for i in (index.right_of(position), index.below(position)) if i is not None]
+            for campo in labels:
+                for neighbour in neighbours:
+                    value = self.value_engine.search(campo, blocks[neighbour]['text'])
+                    if value:
+                        fields[campo] = self._clean_value(value.value, campo)
+                        break
+
+        return {campo: fields[campo] for campo in self.etiquetas if campo in fields}
+
+    def learn_layout(self, templates: LayoutTemplates, document_type: str, image,
+                     text_blocks: Union[Document, List[Dict[str, Any]]]) -> None:
+        """
+        Añade a la plantilla de diseño del tipo las regiones de los campos base
+        encontrados en una página completa.
+
+        Args:
+            templates (LayoutTemplates): Plantillas de diseño
+            document_type (str): Tipo de documento
+            image (np.ndarray): Página completa
+            text_blocks (Document | List[Dict[str, Any]]): Documento o bloques OCR de la página
+        """
+        templates.learn(document_type, image, text_blocks, self.patrones_base, re.IGNORECASE)
+
     def _validate_input(self, text_blocks: List[Dict[str, Any]]) -> bool:
         """Valida la entrada de texto."""
         if text_blocks is None:
@@ -71,12 +212,9 @@ class FeatureExtractor:
             raise ValueError("text_blocks debe ser una lista")
         return bool(text_blocks)
 
-    def _get_combined_text(self, text_blocks: List[Dict[str, Any]]) -> str:
+    def _get_combined_text(self, text_blocks: Union[Document, List[Dict[str, Any]]]) -> str:
         """Combina los bloques de texto con confianza suficiente."""
-        return ' '.join(
-            block['text'] for block in text_blocks 
-            if block.get('confidence', 0) >= CONFIDENCE_THRESHOLD
-        )
+        return Document.coerce(text_blocks).confident_text
 
     def _clean_value(self, value: str, field_type: str) -> str:
         """Limpia y formatea el valor según el tipo de campo."""
@@ -91,29 +229,13 @@ class FeatureExtractor:
             # Estandarizar formato de fecha
             value = value.replace('/', '-')
             # Convertir nombres de meses completos a abreviados
-            for mes_completo, mes_abrev in [
-                ('Mayo', 'MAY'), ('Junio', 'JUN'), ('Julio', 'JUL'),
-                ('Enero', 'ENE'), ('Febrero', 'FEB'), ('Marzo', 'MAR'),
-                ('Abril', 'ABR'), ('Agosto', 'AGO'), ('Septiembre', 'SEP'),
-                ('Octubre', 'OCT'), ('Noviembre', 'NOV'), ('Diciembre', 'DIC')
-            ]:
-                value = value.replace(mes_completo, mes_abrev)
+            value = DateParser.abbreviate_months(value)
             return value
             
         return value
 
-    def _detect_document_type(self, text: str) -> Optional[str]:
-        """Detecta el tipo de documento basado en palabras clave."""
-        text_lower = text.lower()
-        keywords = {
-            'gas': ['gas natural', 'consumo de gas', 'efigas'],
-            'luz': ['energía eléctrica', 'consumo de energía', 'alumbrado'],
-            'agua': ['acueducto', 'consumo de agua', 'alcantarillado'],
-            'telefono': ['plan móvil', 'telefonía', 'minutos'],
-            'internet': ['megabytes', 'fibra óptica', 'banda ancha']
-        }
-        
-        for doc_type, words in keywords.items():
-            if any(word in text_lower for word in words):
-                return doc_type
-        return None
\ No newline at end of file
+    def _detect_document_type(self, text: Union[str, Document]) -> Optional[str]:
+        """Detecta el tipo de documento con más apariciones de sus palabras clave."""
+        if isinstance(text, Document):
+            text = text.text
+        return KeywordAutomaton.for_table(self.PALABRAS_CLAVE_TIPO).best(text)
\ No newline at end of file
@@ -0,0 +1,132 @@
+# src/features/keyword_automaton.py
+from collections import deque
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+class KeywordAutomaton:
+    """
+    Autómata de Aho–Corasick para contar palabras clave por etiqueta.
+
+    Se construye una vez a partir de una tabla {etiqueta: palabras clave} y
+    recorre el texto en una sola pasada, contando las apariciones de todas
+    las palabras a la vez; el coste depende del largo del texto y no del
+    número de palabras clave. Las coincidencias son de subcadena y sin
+    distinguir mayúsculas (las transiciones aceptan ambas formas de cada
+    letra, así que el texto no se copia en minúsculas).
+    """
+
+    def __init__(self, table: Dict[str, Iterable[str]]):
+        """
+        Construye el autómata.
+
+        Args:
+            table (Dict[str, Iterable[str]]): Palabras clave de cada etiqueta; el
+                orden de las etiquetas desempata el ranking
+        """
+        self.labels = tuple(table)
+        goto: List[Dict[str, int]] = [{}]
+        outputs: List[List[int]] = [[]]
+
+        for label_index, keywords in enumerate(table.values()):
+            for keyword in keywords:
+                keyword = keyword.lower()
+                if not keyword:
+                    continue
+                state = 0
+                for char in keyword:
+                    if char not in goto[state]:
+                        goto.append({})
+                        outputs.append([])
+                        goto[state][char] = len(goto) - 1
+                    state = goto[state][char]
+                outputs[state].append(label_index)
+
+        # Enlaces de fallo por niveles (BFS) y tabla de transiciones completa:
+        # cada estado hereda las transiciones de su estado de fallo
+        fail = [0] * len(goto)
+        delta: List[Dict[str, int]] = [dict(goto[0])] + [None] * (len(goto) - 1)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            outputs[state] = outputs[state] + outputs[fail[state]]
+            delta[state] = dict(delta[fail[state]])
+            delta[state].update(goto[state])
+            for char, child in goto[state].items():
+                fail[child] = delta[fail[state]].get(char, 0) if state else 0
+                queue.append(child)
+
+        # Aceptar también la mayúscula de cada letra (solo si es un único carácter)
+        for transitions in delta:
+            for char in list(transitions):
+                upper = char.upper()
+                if len(upper) == 1 and upper not in transitions:
+                    transitions[upper] = transitions[char]
+
+        self._delta = delta
+        self._outputs = [tuple(output) for output in outputs]
+        self.states = len(goto)
+
+    @classmethod
+    def for_table(cls, table: Dict[str, Iterable[str]]) -> 'KeywordAutomaton':
+        """
+        Obtiene el autómata de una tabla, construyéndolo una sola vez por proceso.
+
+        Args:
+            table (Dict[str, Iterable[str]]): Palabras clave de cada etiqueta
+
+        Returns:
+            KeywordAutomaton: Autómata compartido
+        """
+        return _built_automaton(tuple((label, tuple(keywords)) for label, keywords in table.items()))
+
+    def count(self, text: str) -> Dict[str, int]:
+        """
+        Cuenta las apariciones de las palabras clave de cada etiqueta.
+
+        Args:
+            text (str): Texto donde buscar
+
+        Returns:
+            Dict[str, int]: Apariciones por etiqueta (solo las que tienen alguna)
+        """
+        delta, outputs = self._delta, self._outputs
+        hits = [0] * len(self.labels)
+        state = 0
+        for char in text:
+            state = delta[state].get(char, 0)
+            for label_index in outputs[state]:
+                hits[label_index] += 1
+        return {label: count for label, count in zip(self.labels, hits) if count}
+
+    def rank(self, text: str) -> List[Tuple[str, int]]:
+        """
+        Ordena las etiquetas por número de apariciones.
+
+        Args:
+            text (str): Texto donde buscar
+
+        Returns:
+            List[Tuple[str, int]]: (etiqueta, apariciones) de mayor a menor; los
+            empates conservan el orden de la tabla
+        """
+        counts = self.count(text)
+        return sorted(counts.items(), key=lambda item: -item[1])
+
+    def best(self, text: str) -> Optional[str]:
+        """
+        Etiqueta con más apariciones.
+
+        Args:
+            text (str): Texto donde buscar
+
+        Returns:
+            Optional[str]: Etiqueta ganadora o None si no aparece ninguna palabra clave
+        """
+        ranking = self.rank(text)
+        return ranking[0][0] if ranking else None
+
+
+@lru_cache(maxsize=16)
+def _built_automaton(items: Tuple[Tuple[str, Tuple[str, ...]], ...]) -> KeywordAutomaton:
+    return KeywordAutomaton(dict(items))
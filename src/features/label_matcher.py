@@ -0,0 +1,236 @@
+# src/features/label_matcher.py
+import re
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import Levenshtein
+
+from config.settings import LABEL_COMMON_WORDS, LABEL_VOCABULARY
+
+# Palabras (letras y dígitos, para admitir confusiones como 0/O o 1/l)
+TOKEN_PATTERN = re.compile(r'[^\W_]+')
+
+# Longitud mínima de una palabra para corregirla; las más cortas (ID, NIT, de)
+# se confunden con demasiadas palabras a distancia 1
+MIN_TOKEN_LENGTH = 4
+
+# Separadores tras los que una etiqueta al final del bloque anuncia el valor del bloque siguiente
+VALUE_SEPARATOR = re.compile(r'[:>]')
+
+# Máximo de palabras recordadas por FuzzyLabelMatcher
+MEMO_SIZE = 10000
+
+
+class BKTree:
+    """
+    Árbol BK sobre la distancia de Levenshtein.
+
+    Cada hijo cuelga de su padre con la distancia entre ambos; por la
+    desigualdad triangular, al buscar a distancia k de una palabra solo hay
+    que bajar por los hijos con distancia en [d - k, d + k], de modo que cada
+    consulta visita una fracción del vocabulario en lugar de compararlo entero.
+    """
+
+    def __init__(self, words: Iterable[str] = ()):
+        self._root: Optional[Tuple[str, Dict[int, tuple]]] = None
+        self.size = 0
+        for word in words:
+            self.add(word)
+
+    def add(self, word: str) -> None:
+        """Añade una palabra (las repetidas se ignoran)."""
+        if self._root is None:
+            self._root = (word, {})
+            self.size = 1
+            return
+        node = self._root
+        while True:
+            distance = Levenshtein.distance(word, node[0])
+            if distance == 0:
+                return
+            child = node[1].get(distance)
+            if child is None:
+                node[1][distance] = (word, {})
+                self.size += 1
+                return
+            node = child
+
+    def search(self, word: str, max_distance: int) -> List[Tuple[int, str]]:
+        """
+        Busca las palabras a distancia máxima dada.
+
+        Args:
+            word (str): Palabra buscada
+            max_distance (int): Distancia de edición máxima
+
+        Returns:
+            List[Tuple[int, str]]: (distancia, palabra) ordenadas por distancia
+        """
+        if self._root is None:
+            return []
+        matches = []
+        pending = [self._root]
+        while pending:
+            node_word, children = pending.pop()
+            distance = Levenshtein.distance(word, node_word)
+            if distance <= max_distance:
+                matches.append((distance, node_word))
+            for child_distance, child in children.items():
+                if distance - max_distance <= child_distance <= distance + max_distance:
+                    pending.append(child)
+        return sorted(matches)
+
+
+class FuzzyLabelMatcher:
+    """
+    Corrige en el texto OCR las palabras de etiquetas con errores de reconocimiento.
+
+    Cada palabra se compara, sin distinguir mayúsculas, con el vocabulario de
+    etiquetas indexado en un BKTree, con una distancia máxima que crece con
+    su largo. Si hay una etiqueta lo bastante cerca, la palabra se sustituye
+    por ella conservando el estilo de mayúsculas, de modo que los patrones
+    exactos de extracción vuelven a coincidir ("MATRlCULA" -> "MATRÍCULA",
+    "T0TAL" -> "TOTAL").
+
+    Como las etiquetas son palabras corrientes, solo se corrige una palabra
+    seguida de un valor (un número, quizá tras otras palabras de la etiqueta
+    o conectores cortos como "A" o "de") o de ":" al final del bloque, y las
+    palabras corrientes del vocabulario común nunca se corrigen ("Plaza
+    Mayor" no pasa a "Plazo Mayor").
+    """
+
+    def __init__(self, vocabulary: Iterable[str] = LABEL_VOCABULARY,
+                 common_words: Iterable[str] = LABEL_COMMON_WORDS):
+        """
+        Args:
+            vocabulary (Iterable[str]): Palabras de las etiquetas; en empate de
+                distancia gana la primera
+            common_words (Iterable[str]): Palabras corrientes que se dejan tal cual
+        """
+        self.vocabulary = [word.lower() for word in vocabulary]
+        self._known = set(self.vocabulary)
+        self._common = {word.lower() for word in common_words}
+        self._order = {word: index for index, word in reversed(list(enumerate(self.vocabulary)))}
+        self.tree = BKTree(self.vocabulary)
+        self._memo: Dict[str, Optional[str]] = {}
+
+    @classmethod
+    def for_vocabulary(cls, vocabulary: Iterable[str] = LABEL_VOCABULARY) -> 'FuzzyLabelMatcher':
+        """
+        Obtiene el corrector de un vocabulario, construyéndolo una sola vez por proceso.
+
+        Args:
+            vocabulary (Iterable[str]): Palabras de las etiquetas
+
+        Returns:
+            FuzzyLabelMatcher: Corrector compartido
+        """
+        return _built_matcher(tuple(vocabulary), tuple(LABEL_COMMON_WORDS))
+
+    @staticmethod
+    def max_distance(token: str) -> int:
+        """Distancia de edición tolerada según el largo de la palabra."""
+        if len(token) < MIN_TOKEN_LENGTH:
+            return 0
+        return 1 if len(token) < 8 else 2
+
+    def match(self, token: str) -> Optional[str]:
+        """
+        Busca la etiqueta más cercana a una palabra.
+
+        Args:
+            token (str): Palabra del texto OCR
+
+        Returns:
+            Optional[str]: Etiqueta del vocabulario (en minúsculas), None si no hay
+            ninguna a la distancia tolerada, si la palabra ya es una etiqueta o si
+            es una palabra corriente
+        """
+        key = token.lower()
+        if key in self._memo:
+            return self._memo[key]
+
+        result = None
+        limit = self.max_distance(key)
+        if limit and key not in self._known and key not in self._common and not key.isdigit():
+            matches = self.tree.search(key, limit)
+            if matches:
+                best = min(matches, key=lambda item: (item[0], self._order[item[1]]))
+                result = best[1]
+
+        if len(self._memo) >= MEMO_SIZE:
+            self._memo.clear()
+        self._memo[key] = result
+        return result
+
+    @staticmethod
+    def _apply_case(token: str, word: str) -> str:
+        """Escribe la etiqueta con el estilo de mayúsculas de la palabra original."""
+        upper = sum(char.isupper() for char in token)
+        lower = sum(char.islower() for char in token)
+        if upper > lower:
+            return word.upper()
+        if token[0].isupper():
+            return word.capitalize()
+        return word
+
+    def normalize(self, text: str) -> str:
+        """
+        Corrige las palabras de etiquetas de un texto.
+
+        Args:
+            text (str): Texto OCR
+
+        Returns:
+            str: Texto con las etiquetas seguidas de un valor corregidas (el resto no cambia)
+        """
+        tokens = list(TOKEN_PATTERN.finditer(text))
+        words = [self.match(token.group(0)) for token in tokens]
+
+        # Recorrido desde el final: leads[i] indica si tras la palabra i, saltando
+        # solo etiquetas y conectores cortos, llega un valor
+        leads = [False] * len(tokens)
+        for index in range(len(tokens) - 1, -1, -1):
+            if index + 1 == len(tokens):
+                leads[index] = bool(VALUE_SEPARATOR.search(text, tokens[index].end()))
+                continue
+            following = tokens[index + 1].group(0)
+            if following[0].isdigit():
+                leads[index] = True
+            elif (len(following) < MIN_TOKEN_LENGTH or following.lower() in self._known
+                  or words[index + 1] is not None):
+                leads[index] = leads[index + 1]
+
+        parts = []
+        position = 0
+        for token, word, lead in zip(tokens, words, leads):
+            if word is not None and lead:
+                parts.append(text[position:token.start()])
+                parts.append(self._apply_case(token.group(0), word))
+                position = token.end()
+        if not parts:
+            return text
+        parts.append(text[position:])
+        return ''.join(parts)
+
+    def normalize_blocks(self, text_blocks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Corrige las etiquetas de una lista de bloques OCR.
+
+        Args:
+            text_blocks (List[Dict[str, Any]]): Bloques {'text', ...}
+
+        Returns:
+            List[Dict[str, Any]]: Bloques en el mismo orden; los corregidos son
+            copias y el resto, los mismos objetos
+        """
+        normalized = []
+        for block in text_blocks:
+            text = self.normalize(block['text'])
+            normalized.append(block if text == block['text'] else dict(block, text=text))
+        return normalized
+
+
+@lru_cache(maxsize=8)
+def _built_matcher(vocabulary: Tuple[str, ...], common_words: Tuple[str, ...]) -> FuzzyLabelMatcher:
+    return FuzzyLabelMatcher(vocabulary, common_words)
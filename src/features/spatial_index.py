@@ -0,0 +1,150 @@
+# src/features/spatial_index.py
+from collections import defaultdict
+from typing import Dict, List, Optional, Any
+
+import numpy as np
+
+from src.ocr.layout_templates import bbox_bounds
+
+
+class SpatialIndex:
+    """
+    Índice espacial en rejilla sobre las cajas de los bloques OCR.
+
+    Cada bloque se asigna a la celda de su centro vertical (filas del alto
+    mediano de los bloques) y de su borde izquierdo (columnas del ancho
+    mediano). Las consultas «bloque más cercano a la derecha / debajo» solo
+    recorren las celdas hacia ese lado y se detienen en cuanto ninguna celda
+    restante puede contener un bloque más cercano, en lugar de comparar con
+    todos los bloques de la página.
+    """
+
+    def __init__(self, text_blocks: List[Dict[str, Any]]):
+        """
+        Construye el índice.
+
+        Args:
+            text_blocks (List[Dict[str, Any]]): Bloques con 'bbox' de cuatro puntos
+                o plana [x0, y0, x1, y1]; los bloques sin caja no se indexan
+        """
+        indexed = [i for i, block in enumerate(text_blocks) if block.get('bbox') is not None]
+        self.indices = np.array(indexed, dtype=np.int64)
+        self.boxes = np.array(
+            [bbox_bounds(text_blocks[i]['bbox']) for i in indexed], dtype=np.float64
+        ).reshape(-1, 4)
+        self._position = {index: row for row, index in enumerate(indexed)}
+
+        heights = self.boxes[:, 3] - self.boxes[:, 1]
+        if len(indexed):
+            self.cell_height = max(float(np.median(heights)), 1.0)
+            self.cell_width = max(float(np.median(self.boxes[:, 2] - self.boxes[:, 0])), 1.0)
+            self.max_half_height = float(heights.max()) / 2
+        else:
+            self.cell_height = self.cell_width = 1.0
+            self.max_half_height = 0.0
+        self.centers_y = (self.boxes[:, 1] + self.boxes[:, 3]) / 2
+        rows = np.floor(self.centers_y / self.cell_height).astype(np.int64)
+        cols = np.floor(self.boxes[:, 0] / self.cell_width).astype(np.int64)
+        self.min_row, self.max_row = (int(rows.min()), int(rows.max())) if len(indexed) else (0, -1)
+        self.min_col, self.max_col = (int(cols.min()), int(cols.max())) if len(indexed) else (0, -1)
+
+        cells: Dict = defaultdict(list)
+        for position, cell in enumerate(zip(rows.tolist(), cols.tolist())):
+            cells[cell].append(position)
+        self.cells = {cell: np.array(positions, dtype=np.int64) for cell, positions in cells.items()}
+
+    def __len__(self) -> int:
+        return len(self.indices)
+
+    def _row(self, y: float) -> int:
+        return int(np.floor(y / self.cell_height))
+
+    def _col(self, x: float) -> int:
+        return int(np.floor(x / self.cell_width))
+
+    def right_of(self, index: int) -> Optional[int]:
+        """
+        Bloque más cercano a la derecha de otro en la misma línea.
+
+        Un bloque está en la misma línea si su centro vertical cae dentro del
+        alto del bloque de referencia, y a su derecha si empieza después del
+        centro horizontal de este.
+
+        Args:
+            index (int): Índice del bloque de referencia en text_blocks
+
+        Returns:
+            Optional[int]: Índice del bloque encontrado o None
+        """
+        position = self._position.get(index)
+        if position is None:
+            return None
+        x0, y0, x1, y1 = self.boxes[position]
+        start_x = (x0 + x1) / 2
+        rows = range(max(self._row(y0), self.min_row), min(self._row(y1), self.max_row) + 1)
+
+        best, best_distance = None, np.inf
+        for col in range(max(self._col(start_x), self.min_col), self.max_col + 1):
+            if col * self.cell_width - x1 > best_distance:
+                break
+            for row in rows:
+                candidates = self.cells.get((row, col))
+                if candidates is None:
+                    continue
+                boxes = self.boxes[candidates]
+                mask = (
+                    (candidates != position)
+                    & (boxes[:, 0] >= start_x)
+                    & (self.centers_y[candidates] >= y0)
+                    & (self.centers_y[candidates] <= y1)
+                )
+                if not mask.any():
+                    continue
+                distances = np.maximum(boxes[mask, 0] - x1, 0)
+                nearest = int(np.argmin(distances))
+                if distances[nearest] < best_distance:
+                    best, best_distance = int(candidates[mask][nearest]), distances[nearest]
+        return None if best is None else int(self.indices[best])
+
+    def below(self, index: int) -> Optional[int]:
+        """
+        Bloque más cercano debajo de otro que se solapa con él en horizontal.
+
+        Args:
+            index (int): Índice del bloque de referencia en text_blocks
+
+        Returns:
+            Optional[int]: Índice del bloque encontrado o None
+        """
+        position = self._position.get(index)
+        if position is None:
+            return None
+        x0, y0, x1, y1 = self.boxes[position]
+        center_y = (y0 + y1) / 2
+        cols = range(self.min_col, min(self._col(x1), self.max_col) + 1)
+
+        best, best_distance = None, np.inf
+        for row in range(max(self._row(y1), self.min_row), self.max_row + 1):
+            # Los bloques de esta fila tienen el centro en row * cell_height o más
+            # abajo, y su borde superior como mucho medio bloque más alto por encima
+            if row * self.cell_height - self.max_half_height - y1 > best_distance:
+                break
+            for col in cols:
+                candidates = self.cells.get((row, col))
+                if candidates is None:
+                    continue
+                boxes = self.boxes[candidates]
+                mask = (
+                    (candidates != position)
+                    & (self.centers_y[candidates] > y1)
+                    & (boxes[:, 1] > center_y)
+                    & (boxes[:, 0] < x1)
+                    & (boxes[:, 2] > x0)
+                )
+                if not mask.any():
+                    continue
+                distances = np.maximum(boxes[mask, 1] - y1, 0)
+                nearest = int(np.argmin(distances))
+                if distances[nearest] < best_distance:
+                    best, best_distance = int(candidates[mask][nearest]), distances[nearest]
+        return None if best is None else int(self.indices[best])
@@ -0,0 +1,315 @@
+# src/ocr/layout_templates.py
+import os
+import json
+import logging
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import cv2
+import numpy as np
+
+from config.settings import (
+    LAYOUT_TEMPLATES_DIR,
+    LAYOUT_THUMBNAIL_WIDTH,
+    LAYOUT_MIN_CONFIDENCE,
+    LAYOUT_MAX_ASPECT_DIFF,
+    LAYOUT_MAX_SHIFT,
+    LAYOUT_REGION_MARGIN
+)
+from src.features.extraction_engine import ExtractionEngine
+from src.features.document import Document
+
+Box = Tuple[float, float, float, float]
+
+
+def bbox_bounds(bbox) -> Box:
+    """
+    Rectángulo (x0, y0, x1, y1) de una caja OCR, sea de cuatro puntos
+    [[x, y], ...] o plana [x0, y0, x1, y1].
+    """
+    if len(bbox) == 4 and not isinstance(bbox[0], (int, float, np.integer, np.floating)):
+        xs = [point[0] for point in bbox]
+        ys = [point[1] for point in bbox]
+        return min(xs), min(ys), max(xs), max(ys)
+    x0, y0, x1, y1 = bbox
+    return x0, y0, x1, y1
+
+
+class LayoutTemplate:
+    """Diseño de un tipo de documento: miniatura de referencia y regiones de sus campos."""
+
+    def __init__(self, document_type: str, thumbnail: np.ndarray, regions: Dict[str, Box]):
+        """
+        Args:
+            document_type (str): Tipo de documento (clave de DOCUMENT_TYPES)
+            thumbnail (np.ndarray): Miniatura en escala de grises de la página de referencia
+            regions (Dict[str, Box]): Región normalizada (0-1) de cada campo
+        """
+        self.document_type = document_type
+        self.thumbnail = thumbnail
+        self.regions = dict(regions)
+
+    @property
+    def aspect(self) -> float:
+        """Relación alto / ancho de la página de referencia."""
+        return self.thumbnail.shape[0] / self.thumbnail.shape[1]
+
+
+class AlignedLayout:
+    """Plantilla alineada con una página concreta."""
+
+    def __init__(self, template: LayoutTemplate, shift: Tuple[float, float],
+                 confidence: float, width: int, height: int):
+        """
+        Args:
+            template (LayoutTemplate): Plantilla alineada
+            shift (Tuple[float, float]): Desplazamiento normalizado de la página
+                respecto a la plantilla
+            confidence (float): Respuesta de la correlación de fase (0-1)
+            width (int): Ancho de la página en píxeles
+            height (int): Alto de la página en píxeles
+        """
+        self.template = template
+        self.shift = shift
+        self.confidence = confidence
+        self.width = width
+        self.height = height
+
+    @property
+    def document_type(self) -> str:
+        return self.template.document_type
+
+    def region_box(self, field: str, margin: float = LAYOUT_REGION_MARGIN) -> Optional[Tuple[int, int, int, int]]:
+        """
+        Región de un campo en píxeles de la página, desplazada y con margen.
+
+        Args:
+            field (str): Nombre del campo
+            margin (float): Margen normalizado añadido a cada lado
+
+        Returns:
+            Optional[Tuple[int, int, int, int]]: (x0, y0, x1, y1) o None si la
+            plantilla no tiene ese campo
+        """
+        region = self.template.regions.get(field)
+        if region is None:
+            return None
+        dx, dy = self.shift
+        x0, y0, x1, y1 = region
+        return (
+            max(0, int((x0 + dx - margin) * self.width)),
+            max(0, int((y0 + dy - margin) * self.height)),
+            min(self.width, int(np.ceil((x1 + dx + margin) * self.width))),
+            min(self.height, int(np.ceil((y1 + dy + margin) * self.height)))
+        )
+
+    def contains(self, field: str, bbox) -> bool:
+        """
+        Indica si el centro de una caja OCR cae dentro de la región de un campo.
+
+        Args:
+            field (str): Nombre del campo
+            bbox: Caja de cuatro puntos o plana, en píxeles de la página
+
+        Returns:
+            bool: True si está dentro (False si el campo no tiene región)
+        """
+        box = self.region_box(field)
+        if box is None or bbox is None:
+            return False
+        x0, y0, x1, y1 = bbox_bounds(bbox)
+        cx, cy = (x0 + x1) / 2, (y0 + y1) / 2
+        return box[0] <= cx <= box[2] and box[1] <= cy <= box[3]
+
+
+class LayoutTemplates:
+    """
+    Plantillas de diseño por tipo de documento.
+
+    Cada plantilla guarda una miniatura de una página de referencia y la
+    región normalizada de cada campo. Una página nueva se alinea con las
+    plantillas por correlación de fase sobre miniaturas (unos pocos
+    milisegundos) y, si la alineación es fiable, el OCR se limita a las
+    regiones de los campos.
+    """
+
+    def __init__(self, directory: Optional[str] = LAYOUT_TEMPLATES_DIR):
+        """
+        Inicializa las plantillas, cargando las guardadas en el directorio.
+
+        Args:
+            directory (str): Directorio de las plantillas (None para no persistir)
+        """
+        self.directory = directory
+        self.templates: Dict[str, LayoutTemplate] = {}
+        self._load()
+
+    def __contains__(self, document_type: str) -> bool:
+        return document_type in self.templates
+
+    @staticmethod
+    def thumbnail(image: np.ndarray, width: int = LAYOUT_THUMBNAIL_WIDTH) -> np.ndarray:
+        """
+        Miniatura en escala de grises usada para alinear.
+
+        Args:
+            image (np.ndarray): Página en color o escala de grises
+            width (int): Ancho de la miniatura
+
+        Returns:
+            np.ndarray: Miniatura uint8
+        """
+        if len(image.shape) == 3:
+            image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        height = max(1, round(width * image.shape[0] / image.shape[1]))
+        return cv2.resize(image, (width, height), interpolation=cv2.INTER_AREA)
+
+    def _paths(self, document_type: str) -> Tuple[str, str]:
+        return (
+            os.path.join(self.directory, f"{document_type}.json"),
+            os.path.join(self.directory, f"{document_type}.png")
+        )
+
+    def _load(self) -> None:
+        """Carga las plantillas guardadas."""
+        if not self.directory or not os.path.isdir(self.directory):
+            return
+        for name in sorted(os.listdir(self.directory)):
+            if not name.endswith('.json'):
+                continue
+            document_type = name[:-5]
+            json_path, image_path = self._paths(document_type)
+            try:
+                with open(json_path, encoding='utf-8') as f:
+                    data = json.load(f)
+                thumbnail = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
+                if thumbnail is None:
+                    raise ValueError(f"falta la miniatura {image_path}")
+                regions = {field: tuple(box) for field, box in data['regions'].items()}
+                self.templates[document_type] = LayoutTemplate(document_type, thumbnail, regions)
+            except (OSError, ValueError, KeyError) as e:
+                logging.warning(f"Plantilla de diseño {document_type} ignorada: {str(e)}")
+
+    def save(self, document_type: str) -> None:
+        """
+        Guarda una plantilla en disco.
+
+        Args:
+            document_type (str): Tipo de documento
+        """
+        if not self.directory:
+            return
+        template = self.templates[document_type]
+        os.makedirs(self.directory, exist_ok=True)
+        json_path, image_path = self._paths(document_type)
+        cv2.imwrite(image_path, template.thumbnail)
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump({'document_type': document_type, 'regions': template.regions}, f, indent=2)
+
+    def add(self, document_type: str, image: np.ndarray, regions: Dict[str, Box],
+            save: bool = True) -> LayoutTemplate:
+        """
+        Declara la plantilla de un tipo de documento.
+
+        Args:
+            document_type (str): Tipo de documento
+            image (np.ndarray): Página de referencia
+            regions (Dict[str, Box]): Región normalizada (x0, y0, x1, y1) de cada campo
+            save (bool): Guardar la plantilla en disco
+
+        Returns:
+            LayoutTemplate: Plantilla creada
+        """
+        template = LayoutTemplate(document_type, self.thumbnail(image), regions)
+        self.templates[document_type] = template
+        if save:
+            self.save(document_type)
+        return template
+
+    def learn(self, document_type: str, image: np.ndarray, blocks: Union[Document, List[Dict]],
+              patterns: Dict[str, str], flags: int = 0, save: bool = True) -> Optional[LayoutTemplate]:
+        """
+        Aprende las regiones de los campos a partir del OCR completo de una página.
+
+        La región de cada campo cubre los bloques desde el inicio de la
+        coincidencia de su patrón (normalmente la etiqueta) hasta el valor.
+        Si el tipo ya tiene plantilla, solo se añaden los campos que le faltan.
+
+        Args:
+            document_type (str): Tipo de documento
+            image (np.ndarray): Página completa
+            blocks (Document | List[Dict]): Documento o bloques OCR {'text',
+                'confidence', 'bbox'} en orden de lectura
+            patterns (Dict[str, str]): Patrón de cada campo (el grupo 1 es el valor)
+            flags (int): Banderas de re para los patrones
+            save (bool): Guardar la plantilla en disco
+
+        Returns:
+            Optional[LayoutTemplate]: Plantilla actualizada o None si no se encontró ningún campo
+        """
+        height, width = image.shape[:2]
+        document = Document.coerce(blocks)
+
+        regions = {}
+        engine = ExtractionEngine.for_patterns(patterns, flags)
+        for field, match in engine.scan(document.confident_text).items():
+            span_blocks = document.blocks_in_span(match.start, match.value_end)
+            bounds = [bbox_bounds(block['bbox']) for block in span_blocks]
+            regions[field] = (
+                min(b[0] for b in bounds) / width, min(b[1] for b in bounds) / height,
+                max(b[2] for b in bounds) / width, max(b[3] for b in bounds) / height
+            )
+        if not regions:
+            return None
+
+        template = self.templates.get(document_type)
+        if template is None:
+            template = LayoutTemplate(document_type, self.thumbnail(image), regions)
+            self.templates[document_type] = template
+        else:
+            for field, box in regions.items():
+                template.regions.setdefault(field, box)
+        if save:
+            self.save(document_type)
+        logging.info(f"Plantilla de diseño {document_type}: {sorted(template.regions)}")
+        return template
+
+    def align(self, image: np.ndarray, document_types: Optional[Sequence[str]] = None,
+              min_confidence: float = LAYOUT_MIN_CONFIDENCE) -> Optional[AlignedLayout]:
+        """
+        Alinea una página con la plantilla más parecida.
+
+        Args:
+            image (np.ndarray): Página en color o escala de grises
+            document_types (Sequence[str]): Tipos a considerar (None para todos)
+            min_confidence (float): Respuesta mínima de la correlación de fase
+
+        Returns:
+            Optional[AlignedLayout]: Mejor alineación o None si ninguna es fiable
+        """
+        height, width = image.shape[:2]
+        best = None
+        for document_type, template in self.templates.items():
+            if document_types is not None and document_type not in document_types:
+                continue
+            if abs(height / width - template.aspect) > LAYOUT_MAX_ASPECT_DIFF * template.aspect:
+                continue
+
+            thumb_height, thumb_width = template.thumbnail.shape
+            page = self.thumbnail(image, thumb_width)
+            if page.shape[0] != thumb_height:
+                page = cv2.resize(page, (thumb_width, thumb_height), interpolation=cv2.INTER_AREA)
+            reference = template.thumbnail.astype(np.float32)
+            page = page.astype(np.float32)
+            window = cv2.createHanningWindow((thumb_width, thumb_height), cv2.CV_32F)
+            (dx, dy), response = cv2.phaseCorrelate(reference - reference.mean(), page - page.mean(), window)
+            shift = (dx / thumb_width, dy / thumb_height)
+            # Un desplazamiento grande indica otro diseño con partes parecidas
+            if max(abs(shift[0]), abs(shift[1])) > LAYOUT_MAX_SHIFT:
+                continue
+
+            if best is None or response > best.confidence:
+                best = AlignedLayout(template, shift, response, width, height)
+
+        if best is None or best.confidence < min_confidence:
+            return None
+        return best
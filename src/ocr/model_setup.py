@@ -2,17 +2,26 @@
 import os
 import logging
 from pathlib import Path
-import easyocr
-from config.settings import OCR_LANGUAGES, OCR_MODEL_STORAGE, OCR_GPU
+import torch
+from config.settings import OCR_LANGUAGES, OCR_MODEL_STORAGE, OCR_GPU, OCR_QUANTIZE, OCR_BACKEND
+from .reader_registry import ReaderRegistry
 
 class ModelSetup:
     """Clase para manejar la configuración inicial del modelo OCR."""
     
     @staticmethod
-    def initialize_model():
+    def initialize_model(quantize: bool = OCR_QUANTIZE, backend: str = OCR_BACKEND):
         """
         Inicializa y verifica el modelo OCR.
-        Descarga el modelo si no existe.
+        Descarga el modelo si no existe. El lector se comparte con el resto
+        del proceso a través de ReaderRegistry.
+
+        Args:
+            quantize (bool): Aplicar cuantización dinámica INT8 a las capas
+                Linear y LSTM del reconocedor (solo en CPU). El detector CRAFT
+                es totalmente convolucional y no tiene capas cuantizables así.
+            backend (str): 'torch' para inferencia con PyTorch u 'onnx' para
+                ONNX Runtime en CPU (exporta los modelos la primera vez)
         """
         try:
             # Asegurar que existe el directorio para el modelo
@@ -20,12 +29,8 @@ class ModelSetup:
             
             logging.info("Iniciando configuración del modelo OCR...")
             
-            # Inicializar EasyOCR
-            reader = easyocr.Reader(
-                lang_list=OCR_LANGUAGES,
-                gpu=OCR_GPU,
-                model_storage_directory=OCR_MODEL_STORAGE
-            )
+            # Obtener el lector compartido (se carga solo la primera vez)
+            reader = ReaderRegistry.get_reader(OCR_LANGUAGES, OCR_GPU, OCR_MODEL_STORAGE, quantize, backend)
             
             logging.info("Modelo OCR inicializado correctamente")
             return reader
@@ -34,6 +39,25 @@ class ModelSetup:
             logging.error(f"Error inicializando el modelo OCR: {str(e)}")
             raise
 
+    @staticmethod
+    def is_quantized(reader) -> bool:
+        """
+        Indica si el reconocedor del lector tiene capas cuantizadas INT8.
+
+        Args:
+            reader: Lector EasyOCR
+
+        Returns:
+            bool: True si el reconocedor está cuantizado
+        """
+        recognizer = getattr(reader, 'recognizer', None)
+        if recognizer is None:
+            return False
+        return any(
+            isinstance(module, (torch.ao.nn.quantized.dynamic.Linear, torch.ao.nn.quantized.dynamic.LSTM))
+            for module in recognizer.modules()
+        )
+
     @staticmethod
     def verify_model_files():
         """
@@ -66,6 +90,9 @@ class ModelSetup:
         return {
             'languages': OCR_LANGUAGES,
             'gpu_enabled': OCR_GPU,
+            'quantize_enabled': OCR_QUANTIZE,
+            'backend': OCR_BACKEND,
             'model_path': OCR_MODEL_STORAGE,
-            'files_present': ModelSetup.verify_model_files()
+            'files_present': ModelSetup.verify_model_files(),
+            'readers': ReaderRegistry.info()
         }
\ No newline at end of file
@@ -1,92 +1,182 @@
 # src/ocr/ocr_engine.py
 import easyocr
+from easyocr.utils import reformat_input
 import logging
-from typing import List, Dict
+from typing import List, Dict, Optional, Iterable, Tuple, Union
+from collections import defaultdict
 import re
+import time
+import bisect
+import cv2
+import numpy as np
 from config.settings import (
     OCR_LANGUAGES,
     OCR_GPU,
     OCR_MODEL_STORAGE,
+    OCR_BATCH_SIZE,
+    OCR_BATCH_SIZE_BUCKET,
+    OCR_QUANTIZE,
+    OCR_BACKEND,
+    OCR_PROGRESSIVE,
+    OCR_USE_TEMPLATES,
+    OCR_REFINE,
+    OCR_REFINE_SCALE,
+    OCR_REFINE_PADDING,
+    OCR_REFINE_MAX_BLOCKS,
     PATTERNS,
     DOCUMENT_TYPES,
-    CONFIDENCE_THRESHOLD
+    CONFIDENCE_THRESHOLD,
+    CACHE_ENABLED,
+    FUZZY_LABELS,
+    LABEL_VOCABULARY,
+    LABEL_COMMON_WORDS
 )
+from src.utils.cache import ResultCache
+from src.features.extraction_engine import ExtractionEngine
+from src.features.keyword_automaton import KeywordAutomaton
+from src.features.label_matcher import FuzzyLabelMatcher
+from src.features.document import Document
+from .text_blocks import TextBlockArray
+from .region_priors import RegionPriors
+from .layout_templates import LayoutTemplates, AlignedLayout, bbox_bounds
 
 
 from .model_setup import ModelSetup
 
 class OCREngine:
     """Clase para manejar el procesamiento OCR de documentos."""
+
+    # Patrones de extracción de campos (el grupo 1 contiene el valor)
+    FIELD_PATTERNS = {
+        'fecha_emision': r'Fecha de (?:la )?(?:factura|Emisión):\s*(.+?)(?=\s|$)',
+        'fecha_factura': r'Fecha de (?:la )?factura:\s*(.+?)(?=\s|$)',
+        'fecha_vencimiento': PATTERNS['due_date'],
+        'total': r'TOTAL(?:\sA PAGAR)?:?\s*\$?\s*([\d,]+)',
+        'matricula': r'MATRÍCULA\s*(?:>>)?\s*(\d+)',
+    }
+
+    # Etiquetas (en minúsculas) junto a las que suele estar el valor de cada campo
+    FIELD_KEYWORDS = {
+        'fecha_emision': ('fecha de emisión', 'fecha de la factura', 'fecha de factura'),
+        'fecha_factura': ('fecha de la factura', 'fecha de factura'),
+        'fecha_vencimiento': ('fecha limite', 'plazo para pagar'),
+        'total': ('total',),
+        'matricula': ('matrícula',),
+    }
+
+    # Prioridad extra de las regiones cercanas a una etiqueta de un campo faltante
+    KEYWORD_BOOST = 1.0
+
+    # Etiquetas (en minúsculas) cuyos bloques cercanos se refinan si tienen baja confianza
+    REFINE_LABELS = ('total', 'matrícula', 'matricula', 'fecha')
+
+    # Identificador del cálculo OCR guardado en la caché
+    OCR_CACHE_VARIANT = 'readtext:detail=1'
     
-    def __init__(self):
-        """Inicializa el motor OCR."""
+    def __init__(self, cache: Optional[ResultCache] = None, quantize: bool = OCR_QUANTIZE,
+                 backend: str = OCR_BACKEND, region_priors: Optional[RegionPriors] = None,
+                 layout_templates: Optional[LayoutTemplates] = None, use_cache: bool = CACHE_ENABLED):
+        """
+        Inicializa el motor OCR.
+
+        Args:
+            cache (ResultCache): Caché de resultados (por defecto una persistente
+                si use_cache está activo)
+            quantize (bool): Usar el reconocedor cuantizado INT8 en CPU
+            backend (str): Backend de inferencia ('torch' u 'onnx')
+            region_priors (RegionPriors): Posiciones aprendidas para el OCR
+                progresivo (por defecto las guardadas en OCR_REGION_PRIORS_FILE)
+            layout_templates (LayoutTemplates): Plantillas de diseño por tipo de
+                documento (por defecto las guardadas en LAYOUT_TEMPLATES_DIR)
+            use_cache (bool): Usar caché de resultados (False para no usar
+                ninguna, aunque se indique cache)
+        """
         try:
             self.model_setup = ModelSetup()
-            self.reader = self.model_setup.initialize_model()
+            self.reader = self.model_setup.initialize_model(quantize, backend)
             if not self.model_setup.verify_model_files():
                 logging.warning("Algunos archivos del modelo podrían faltar")
+            if cache is None and use_cache:
+                cache = ResultCache()
+            self.cache = cache if use_cache else None
+            self.ocr_cache_variant = (
+                f"{self.OCR_CACHE_VARIANT}:backend={backend}"
+                f":quantize={bool(quantize) and backend == 'torch'}"
+            )
+            self.fields_cache_variant = ResultCache.fingerprint([
+                self.ocr_cache_variant, self.FIELD_PATTERNS, (LABEL_VOCABULARY, LABEL_COMMON_WORDS) if FUZZY_LABELS else None
+            ])
+            self.field_engine = ExtractionEngine.for_patterns(self.FIELD_PATTERNS)
+            self.type_automaton = KeywordAutomaton.for_table(
+                {doc_type: config['identificadores'] for doc_type, config in DOCUMENT_TYPES.items()}
+            )
+            self.label_matcher = FuzzyLabelMatcher.for_vocabulary() if FUZZY_LABELS else None
+            self.region_priors = region_priors if region_priors is not None else RegionPriors()
+            self.last_progressive_stats: Dict = {}
+            self.last_refine_stats: Dict = {}
+            self.layout_templates = layout_templates if layout_templates is not None else LayoutTemplates()
+            self._template_stats = {
+                'template_hits': 0,
+                'template_fallbacks': 0,
+                'template_seconds': 0.0,
+                'full_page_runs': 0,
+                'full_page_seconds': 0.0,
+            }
         except Exception as e:
             logging.error(f"Error inicializando OCR Engine: {str(e)}")
             raise
 
-    def detect_document_type(self, text_results: List[Dict]) -> str:
+    def rank_document_types(self, text_results: Union[Document, List[Dict]]) -> List[Tuple[str, int]]:
+        """
+        Puntúa todos los tipos de documento en una sola pasada por el texto.
+
+        Args:
+            text_results (Document | List[Dict]): Documento o lista de resultados OCR
+
+        Returns:
+            List[Tuple[str, int]]: (tipo, apariciones de sus identificadores) de
+            mayor a menor, solo los tipos con alguna aparición
+        """
+        return self.type_automaton.rank(Document.coerce(text_results).text)
+
+    def detect_document_type(self, text_results: Union[Document, List[Dict]]) -> str:
         """
         Detecta el tipo de documento basado en el texto extraído.
         
         Args:
-            text_results (List[Dict]): Lista de resultados OCR
+            text_results (Document | List[Dict]): Documento o lista de resultados OCR
             
         Returns:
-            str: Tipo de documento ('AGUA', 'LUZ' o 'DESCONOCIDO')
+            str: Tipo con más apariciones de sus identificadores ('AGUA', 'LUZ'
+            o 'DESCONOCIDO'); los empates los gana el primero de DOCUMENT_TYPES
         """
-        text_combined = ' '.join([result['text'].lower() for result in text_results])
-        
-        for doc_type, config in DOCUMENT_TYPES.items():
-            for identificador in config['identificadores']:
-                if identificador.lower() in text_combined:
-                    return doc_type
-        
-        return 'DESCONOCIDO'
+        ranking = self.rank_document_types(text_results)
+        return ranking[0][0] if ranking else 'DESCONOCIDO'
 
-    def extract_fields(self, text_results: List[Dict], document_type: str) -> Dict:
+    def extract_fields(self, text_results: Union[Document, List[Dict]], document_type: str) -> Dict:
         """
         Extrae campos específicos de los resultados del OCR.
         
         Args:
-            text_results (List[Dict]): Lista de resultados OCR
+            text_results (Document | List[Dict]): Documento o lista de resultados OCR
             document_type (str): Tipo de documento ('AGUA' o 'LUZ')
             
         Returns:
             Dict: Campos extraídos
         """
         fields = {}
+        document = Document.coerce(text_results)
         
-        # Filtrar resultados por nivel de confianza
-        valid_results = [
-            result for result in text_results 
-            if result.get('confidence', 0) >= CONFIDENCE_THRESHOLD
-        ]
-        
-        # Si no hay resultados válidos, retornar diccionario vacío
-        if not valid_results:
+        # Si no hay resultados con confianza suficiente, retornar diccionario vacío
+        if not document.confident_blocks:
             return fields
-            
-        text_combined = ' '.join([result['text'] for result in valid_results])
-        
-        # Extraer fecha
-        fecha_match = re.search(r'Fecha de (?:la )?(?:factura|Emisión):\s*(.+?)(?=\s|$)', text_combined)
-        if fecha_match:
-            fields['fecha_emision'] = fecha_match.group(1).strip()
-        
-        # Extraer total
-        total_match = re.search(r'TOTAL(?:\sA PAGAR)?:?\s*\$?\s*([\d,]+)', text_combined)
-        if total_match:
-            fields['total'] = total_match.group(1).strip()
+
+        # Corregir etiquetas mal reconocidas ("T0TAL", "MATRlCULA")
+        if self.label_matcher is not None:
+            document = document.normalized(self.label_matcher)
         
-        # Extraer matrícula si está presente
-        matricula_match = re.search(r'MATRÍCULA\s*(?:>>)?\s*(\d+)', text_combined)
-        if matricula_match:
-            fields['matricula'] = matricula_match.group(1).strip()
+        for campo, match in self.field_engine.scan(document.confident_text).items():
+            fields[campo] = match.value.strip()
         
         return fields
     
@@ -107,46 +197,561 @@ class OCREngine:
         required_fields = DOCUMENT_TYPES[document_type]['campos_requeridos']
         return all(field in fields for field in required_fields)
 
-    def process_image(self, image) -> Dict:
+    def read_blocks(self, image) -> List[Dict]:
+        """
+        Ejecuta el OCR sobre una imagen sin filtrar por confianza.
+
+        Args:
+            image: Ruta, bytes o imagen (np.ndarray)
+
+        Returns:
+            List[Dict]: Bloques {'text', 'confidence', 'bbox'}
+        """
+        return self._results_to_blocks(self.reader.readtext(image, detail=1))
+
+    @staticmethod
+    def _results_to_blocks(results: List, scale_x: float = 1.0, scale_y: float = 1.0) -> List[Dict]:
+        """
+        Convierte la salida de readtext en bloques, reescalando las cajas.
+
+        Args:
+            results (List): Salida de readtext (detail=1)
+            scale_x (float): Factor horizontal hacia la imagen original
+            scale_y (float): Factor vertical hacia la imagen original
+
+        Returns:
+            List[Dict]: Bloques {'text', 'confidence', 'bbox'}
+        """
+        if scale_x == 1.0 and scale_y == 1.0:
+            return [
+                {'text': text, 'confidence': float(confidence), 'bbox': bbox}
+                for bbox, text, confidence in results
+            ]
+        return [
+            {
+                'text': text,
+                'confidence': float(confidence),
+                'bbox': [[x * scale_x, y * scale_y] for x, y in bbox]
+            }
+            for bbox, text, confidence in results
+        ]
+
+    def _get_cached_blocks(self, content_hash: str) -> Optional[List[Dict]]:
+        """Bloques OCR en caché de una imagen, en forma dict."""
+        blocks = self.cache.get('ocr', content_hash, self.ocr_cache_variant)
+        return blocks.to_dicts() if isinstance(blocks, TextBlockArray) else blocks
+
+    def _put_cached_blocks(self, content_hash: str, blocks: List[Dict]) -> None:
+        """Guarda en caché los bloques OCR de una imagen por columnas (TextBlockArray)."""
+        self.cache.put('ocr', content_hash, TextBlockArray.from_dicts(blocks), self.ocr_cache_variant)
+
+    @staticmethod
+    def _to_array(image) -> np.ndarray:
+        """Decodifica rutas o bytes a np.ndarray para poder agrupar por tamaño."""
+        if isinstance(image, np.ndarray):
+            return image
+        if isinstance(image, str):
+            array = cv2.imread(image)
+        else:
+            array = cv2.imdecode(np.frombuffer(bytes(image), dtype=np.uint8), cv2.IMREAD_COLOR)
+        if array is None:
+            raise ValueError(f"No se pudo cargar la imagen: {image if isinstance(image, str) else 'bytes'}")
+        return array
+
+    def read_blocks_batch(self, images: List[np.ndarray], batch_size: int = OCR_BATCH_SIZE) -> List[List[Dict]]:
+        """
+        Ejecuta el OCR por lotes agrupando imágenes de tamaño similar.
+
+        Las imágenes de un mismo grupo se redimensionan al tamaño mediano del
+        grupo para que EasyOCR ejecute la detección en lote, y las cajas se
+        reescalan después a las coordenadas de cada imagen original.
+
+        Args:
+            images (List[np.ndarray]): Imágenes decodificadas
+            batch_size (int): Máximo de imágenes por llamada
+
+        Returns:
+            List[List[Dict]]: Bloques sin filtrar por imagen, en el orden de entrada
+        """
+        groups = defaultdict(list)
+        for index, image in enumerate(images):
+            height, width = image.shape[:2]
+            groups[(round(height / OCR_BATCH_SIZE_BUCKET), round(width / OCR_BATCH_SIZE_BUCKET))].append(index)
+
+        blocks: List[Optional[List[Dict]]] = [None] * len(images)
+        for indices in groups.values():
+            for start in range(0, len(indices), batch_size):
+                chunk = indices[start:start + batch_size]
+                shapes = [images[i].shape[:2] for i in chunk]
+                if len(set(shapes)) == 1:
+                    target_height, target_width = shapes[0]
+                    results = self.reader.readtext_batched(
+                        [images[i] for i in chunk], detail=1, batch_size=batch_size
+                    )
+                else:
+                    target_height = int(np.median([h for h, _ in shapes]))
+                    target_width = int(np.median([w for _, w in shapes]))
+                    results = self.reader.readtext_batched(
+                        [images[i] for i in chunk],
+                        n_width=target_width, n_height=target_height,
+                        detail=1, batch_size=batch_size
+                    )
+
+                for i, result in zip(chunk, results):
+                    height, width = images[i].shape[:2]
+                    blocks[i] = self._results_to_blocks(
+                        result, width / target_width, height / target_height
+                    )
+        return blocks
+
+    @staticmethod
+    def _region_bounds(kind: str, box) -> Tuple[float, float, float, float]:
+        """Rectángulo (x0, y0, x1, y1) de una región de detect ('h' o 'f')."""
+        if kind == 'h':
+            x_min, x_max, y_min, y_max = box
+            return x_min, y_min, x_max, y_max
+        xs = [point[0] for point in box]
+        ys = [point[1] for point in box]
+        return min(xs), min(ys), max(xs), max(ys)
+
+    @staticmethod
+    def _proximity(label: Tuple[float, float, float, float],
+                   candidate: Tuple[float, float, float, float]) -> float:
+        """
+        Cercanía de una región a una etiqueta: 1 si está a su derecha en la
+        misma línea, 0.5 si está justo debajo y 0 en otro caso.
+        """
+        lx0, ly0, lx1, ly1 = label
+        cx0, cy0, cx1, cy1 = candidate
+        line_height = max(ly1 - ly0, 1)
+        if abs((cy0 + cy1) / 2 - (ly0 + ly1) / 2) <= line_height / 2 and cx0 >= (lx0 + lx1) / 2:
+            return 1.0
+        if 0 <= cy0 - ly1 <= 2 * line_height and cx0 < lx1 and cx1 > lx0:
+            return 0.5
+        return 0.0
+
+    def _field_points(self, document: Document, document_type: str,
+                      width: int, height: int) -> List[Tuple[float, float]]:
+        """
+        Centros normalizados de los bloques que aportaron un campo o un
+        identificador del tipo de documento.
+        """
+        blocks = document.blocks
+        if not blocks:
+            return []
+
+        indices = set()
+        for match in self.field_engine.scan(document.text).values():
+            indices.add(document.block_at(match.value_start, 'text'))
+        identificadores = [i.lower() for i in DOCUMENT_TYPES.get(document_type, {}).get('identificadores', [])]
+        for index, block in enumerate(blocks):
+            if any(identificador in block['text'].lower() for identificador in identificadores):
+                indices.add(index)
+
+        points = []
+        for index in sorted(indices):
+            xs = [point[0] for point in blocks[index]['bbox']]
+            ys = [point[1] for point in blocks[index]['bbox']]
+            points.append(((min(xs) + max(xs)) / 2 / width, (min(ys) + max(ys)) / 2 / height))
+        return points
+
+    def read_blocks_progressive(self, image) -> Tuple[List[Dict], bool]:
+        """
+        Ejecuta el OCR de forma progresiva con salida temprana.
+
+        Detecta todas las regiones de texto, las reconoce de una en una en
+        orden de prioridad (posiciones aprendidas y cercanía a etiquetas de
+        campos aún faltantes) y vuelve a extraer los campos solo cuando una
+        región aporta texto con confianza suficiente. Se detiene en cuanto el
+        tipo de documento es conocido y todos sus campos requeridos están
+        presentes.
+
+        Args:
+            image: Ruta, bytes o imagen (np.ndarray)
+
+        Returns:
+            Tuple[List[Dict], bool]: Bloques reconocidos sin filtrar, en el orden
+            de lectura de readtext, y si se reconocieron todas las regiones
+        """
+        img, img_cv_grey = reformat_input(image)
+        height, width = img_cv_grey.shape[:2]
+        horizontal_list, free_list = self.reader.detect(img, reformat=False)
+        regions = [('h', box) for box in horizontal_list[0]] + [('f', box) for box in free_list[0]]
+        bounds = [self._region_bounds(kind, box) for kind, box in regions]
+        centers = [((x0 + x1) / 2 / width, (y0 + y1) / 2 / height) for x0, y0, x1, y1 in bounds]
+
+        document_type = 'DESCONOCIDO'
+        prior = [self.region_priors.score(x, y, None) for x, y in centers]
+        boost = [0.0] * len(regions)
+        pending = set(range(len(regions)))
+        recognized: Dict[int, List[Dict]] = {}
+        # Bloques con confianza suficiente en orden de lectura, las regiones que
+        # los aportaron (ordenadas) y cuántos aportó cada una
+        confident: List[Dict] = []
+        contributors: List[int] = []
+        sizes: List[int] = []
+        fields: Dict = {}
+        complete = True
+
+        while pending:
+            index = max(pending, key=lambda i: (prior[i] + boost[i], -i))
+            pending.remove(index)
+            kind, box = regions[index]
+            recognized[index] = self._results_to_blocks(self.reader.recognize(
+                img_cv_grey,
+                [box] if kind == 'h' else [],
+                [box] if kind == 'f' else [],
+                detail=1, reformat=False
+            ))
+
+            added = [block for block in recognized[index] if block['confidence'] >= CONFIDENCE_THRESHOLD]
+            if added:
+                position = bisect.bisect(contributors, index)
+                start = sum(sizes[:position])
+                confident[start:start] = added
+                contributors.insert(position, index)
+                sizes.insert(position, len(added))
+
+                result = self._build_result(confident)
+                if result['is_valid']:
+                    complete = not pending
+                    break
+                fields = result['fields']
+
+                if result['document_type'] != document_type:
+                    document_type = result['document_type']
+                    prior = [self.region_priors.score(x, y, document_type) for x, y in centers]
+
+            # Priorizar las regiones junto a etiquetas de campos que aún faltan
+            text = ' '.join(block['text'] for block in recognized[index]).lower()
+            missing = [campo for campo in self.FIELD_KEYWORDS if campo not in fields]
+            if any(keyword in text for campo in missing for keyword in self.FIELD_KEYWORDS[campo]):
+                for candidate in pending:
+                    proximity = self._proximity(bounds[index], bounds[candidate])
+                    boost[candidate] = max(boost[candidate], self.KEYWORD_BOOST * proximity)
+
+        blocks = [block for i in sorted(recognized) for block in recognized[i]]
+        self.last_progressive_stats = {
+            'regions_total': len(regions),
+            'regions_recognized': len(recognized),
+            'early_exit': not complete,
+        }
+        logging.debug(f"OCR progresivo: {len(recognized)}/{len(regions)} regiones reconocidas")
+
+        # Aprender dónde estaban los datos de este tipo de documento
+        # Solo los bloques con confianza suficiente, como documento propio
+        confident_document = Document(Document(blocks).confident_blocks)
+        learned_type = self.detect_document_type(confident_document)
+        if learned_type != 'DESCONOCIDO':
+            points = self._field_points(confident_document, learned_type, width, height)
+            if points:
+                self.region_priors.update(learned_type, points)
+                self.region_priors.save_if_due()
+        return blocks, complete
+
+    def _refine_candidates(self, blocks: List[Dict]) -> List[int]:
+        """
+        Índices de los bloques de baja confianza que son una etiqueta de campo
+        o están a su derecha o justo debajo, de menor a mayor confianza.
+        """
+        bounds = [bbox_bounds(block['bbox']) for block in blocks]
+        labels = [
+            index for index, block in enumerate(blocks)
+            if any(label in block['text'].lower() for label in self.REFINE_LABELS)
+        ]
+        candidates = [
+            index for index, block in enumerate(blocks)
+            if block['confidence'] < CONFIDENCE_THRESHOLD and (
+                index in labels
+                or any(self._proximity(bounds[label], bounds[index]) > 0 for label in labels)
+            )
+        ]
+        candidates.sort(key=lambda index: blocks[index]['confidence'])
+        return candidates[:OCR_REFINE_MAX_BLOCKS]
+
+    def refine_blocks(self, image, blocks: List[Dict], scale: float = OCR_REFINE_SCALE) -> List[Dict]:
+        """
+        Vuelve a reconocer, a mayor resolución, los bloques de baja confianza
+        cercanos a etiquetas de campos (TOTAL, MATRÍCULA, Fecha).
+
+        Cada bloque se recorta de la imagen original con un pequeño margen, se
+        amplía y se reconoce como una sola línea, sin repetir la detección ni
+        el OCR del resto de la página. Se conserva la lectura de mayor confianza.
+
+        Args:
+            image: Ruta, bytes o imagen (np.ndarray) original a resolución completa
+            blocks (List[Dict]): Bloques OCR sin filtrar de esa imagen
+            scale (float): Factor de ampliación de los recortes
+
+        Returns:
+            List[Dict]: Bloques con las lecturas mejoradas, en el mismo orden
+        """
+        candidates = self._refine_candidates(blocks)
+        self.last_refine_stats = {'candidates': len(candidates), 'improved': 0}
+        if not candidates:
+            return blocks
+
+        array = self._to_array(image)
+        grey = cv2.cvtColor(array, cv2.COLOR_BGR2GRAY) if array.ndim == 3 else array
+        height, width = grey.shape[:2]
+        refined = list(blocks)
+        for index in candidates:
+            x0, y0, x1, y1 = bbox_bounds(blocks[index]['bbox'])
+            padding = OCR_REFINE_PADDING * (y1 - y0)
+            x0, y0 = max(0, int(x0 - padding)), max(0, int(y0 - padding))
+            x1, y1 = min(width, int(np.ceil(x1 + padding))), min(height, int(np.ceil(y1 + padding)))
+            if x1 <= x0 or y1 <= y0:
+                continue
+            crop = cv2.resize(grey[y0:y1, x0:x1], None, fx=scale, fy=scale, interpolation=cv2.INTER_CUBIC)
+            crop_height, crop_width = crop.shape[:2]
+            results = self.reader.recognize(
+                crop, [[0, crop_width, 0, crop_height]], [], detail=1, reformat=False
+            )
+            if not results:
+                continue
+            _, text, confidence = max(results, key=lambda result: result[2])
+            if float(confidence) > blocks[index]['confidence']:
+                refined[index] = dict(blocks[index], text=text, confidence=float(confidence))
+                self.last_refine_stats['improved'] += 1
+
+        logging.debug(
+            f"Refinamiento OCR: {self.last_refine_stats['improved']}/{len(candidates)} bloques mejorados"
+        )
+        return refined
+
+    def read_fields_in_layout(self, image: np.ndarray, layout: AlignedLayout) -> Tuple[Dict, List[Dict]]:
+        """
+        Reconoce solo las regiones de los campos requeridos según una plantilla alineada.
+
+        Args:
+            image (np.ndarray): Página completa
+            layout (AlignedLayout): Plantilla alineada con la página
+
+        Returns:
+            Tuple[Dict, List[Dict]]: Campos extraídos y bloques reconocidos
+            (con cajas en coordenadas de la página)
+        """
+        fields, blocks = {}, []
+        for campo in DOCUMENT_TYPES[layout.document_type]['campos_requeridos']:
+            box = layout.region_box(campo)
+            if box is None or campo not in self.FIELD_PATTERNS:
+                continue
+            x0, y0, x1, y1 = box
+            crop_blocks = [
+                dict(block, bbox=[[x + x0, y + y0] for x, y in block['bbox']])
+                for block in self._results_to_blocks(self.reader.readtext(image[y0:y1, x0:x1], detail=1))
+            ]
+            blocks.extend(crop_blocks)
+            match = self.field_engine.search(campo, Document(crop_blocks).confident_text)
+            if match:
+                fields[campo] = match.value.strip()
+        return fields, blocks
+
+    def _process_with_template(self, image) -> Optional[Dict]:
+        """
+        Intenta procesar la página con su plantilla de diseño.
+
+        Returns:
+            Optional[Dict]: Resultado si la alineación es fiable y se encontraron
+            todos los campos requeridos; None para recurrir al OCR de página completa
+        """
+        if not self.layout_templates.templates:
+            return None
+        start = time.perf_counter()
+        array = self._to_array(image)
+        layout = self.layout_templates.align(array)
+        result = None
+        if layout is not None:
+            fields, blocks = self.read_fields_in_layout(array, layout)
+            if self.validate_fields(fields, layout.document_type):
+                confident = [block['confidence'] for block in blocks if block['confidence'] >= CONFIDENCE_THRESHOLD]
+                result = {
+                    'document_type': layout.document_type,
+                    'fields': fields,
+                    'is_valid': True,
+                    'confidence': sum(confident) / len(confident) if confident else 0
+                }
+
+        self._template_stats['template_seconds'] += time.perf_counter() - start
+        self._template_stats['template_hits' if result is not None else 'template_fallbacks'] += 1
+        if result is None:
+            logging.debug("Plantilla de diseño no aplicable; se usa el OCR de página completa")
+        return result
+
+    def _learn_template(self, image, blocks: List[Dict], result: Dict) -> None:
+        """Crea la plantilla de un tipo válido que aún no la tiene."""
+        document_type = result['document_type']
+        if not result['is_valid'] or document_type in self.layout_templates:
+            return
+        required = DOCUMENT_TYPES[document_type]['campos_requeridos']
+        patterns = {campo: self.FIELD_PATTERNS[campo] for campo in required if campo in self.FIELD_PATTERNS}
+        self.layout_templates.learn(document_type, self._to_array(image), blocks, patterns)
+
+    def get_template_stats(self) -> Dict:
+        """
+        Obtiene el uso de las plantillas de diseño y el tiempo ahorrado estimado.
+
+        El ahorro se estima como el tiempo medio del OCR de página completa por
+        cada página resuelta con plantilla, menos el tiempo gastado en todos
+        los intentos con plantilla (incluidos los que recurrieron a la página
+        completa).
+
+        Returns:
+            Dict: Contadores, tiempos y 'estimated_seconds_saved' (None sin
+            mediciones de página completa)
+        """
+        stats = dict(self._template_stats)
+        if stats['full_page_runs']:
+            average = stats['full_page_seconds'] / stats['full_page_runs']
+            stats['estimated_seconds_saved'] = stats['template_hits'] * average - stats['template_seconds']
+        else:
+            stats['estimated_seconds_saved'] = None
+        return stats
+
+    def _build_result(self, text_results: Union[Document, List[Dict]]) -> Dict:
+        """
+        Detecta el tipo, extrae y valida los campos de los bloques OCR.
+
+        Args:
+            text_results (Document | List[Dict]): Documento o bloques OCR; sus
+                vistas de texto se construyen una vez para todas las etapas
+
+        Returns:
+            Dict: Resultado del procesamiento
+        """
+        document = Document.coerce(text_results)
+        text_results = document.blocks
+
+        # Detectar tipo de documento
+        document_type = self.detect_document_type(document)
+        
+        # Extraer campos según el tipo de documento
+        fields = self.extract_fields(document, document_type)
+        
+        # Validar campos
+        is_valid = self.validate_fields(fields, document_type)
+        
+        return {
+            'document_type': document_type,
+            'fields': fields,
+            'is_valid': is_valid,
+            'confidence': sum(r['confidence'] for r in text_results) / len(text_results) if text_results else 0
+        }
+
+    def process_image(self, image, progressive: bool = OCR_PROGRESSIVE,
+                      use_templates: bool = OCR_USE_TEMPLATES, refine: bool = OCR_REFINE) -> Dict:
         """
         Procesa una imagen y extrae la información relevante.
+
+        Con caché activa, reutiliza los campos o los bloques OCR de imágenes
+        con el mismo contenido.
+
+        Args:
+            image: Ruta, bytes, imagen (np.ndarray) o bloques OCR ya calculados
+                (lista o Document)
+            progressive (bool): Reconocer las regiones por prioridad y parar
+                al tener todos los campos requeridos (ver read_blocks_progressive)
+            use_templates (bool): Reconocer solo las regiones de los campos si
+                la página se alinea con una plantilla de diseño; las páginas
+                válidas de tipos sin plantilla la crean
+            refine (bool): Volver a reconocer ampliados los bloques de baja
+                confianza junto a etiquetas de campos (ver refine_blocks)
         """
         try:
-            # Extraer texto de la imagen
-            if isinstance(image, list):  # Si recibimos resultados pre-procesados
-                text_results = image
-            else:  # Si recibimos una imagen
-                results = self.reader.readtext(
-                    image,
-                    detail=1,
-                    paragraph=True
-                )
-                text_results = [
-                    {
-                        'text': result[1],
-                        'confidence': result[2],
-                        'bbox': result[0]
-                    }
-                    for result in results
-                    if result[2] >= CONFIDENCE_THRESHOLD
-                ]
-
-            # Detectar tipo de documento
-            document_type = self.detect_document_type(text_results)
-            
-            # Extraer campos según el tipo de documento
-            fields = self.extract_fields(text_results, document_type)
-            
-            # Validar campos
-            is_valid = self.validate_fields(fields, document_type)
-            
-            return {
-                'document_type': document_type,
-                'fields': fields,
-                'is_valid': is_valid,
-                'confidence': sum(r['confidence'] for r in text_results) / len(text_results) if text_results else 0
-            }
+            if isinstance(image, (list, Document)):  # Si recibimos resultados pre-procesados
+                return self._build_result(image)
+
+            fields_variant = self.fields_cache_variant
+            if progressive:
+                fields_variant += ':progressive'
+            if use_templates:
+                fields_variant += ':templates'
+            if refine:
+                fields_variant += ':refine'
+            blocks = None
+            if self.cache is not None:
+                content_hash = ResultCache.content_hash(image)
+                cached = self.cache.get('fields', content_hash, fields_variant)
+                if cached is not None:
+                    return cached
+                blocks = self._get_cached_blocks(content_hash)
+
+            result = None
+            if blocks is None and use_templates:
+                result = self._process_with_template(image)
+
+            if result is None:
+                if blocks is None:
+                    start = time.perf_counter()
+                    if progressive:
+                        blocks, complete = self.read_blocks_progressive(image)
+                    else:
+                        blocks, complete = self.read_blocks(image), True
+                    if complete:
+                        self._template_stats['full_page_runs'] += 1
+                        self._template_stats['full_page_seconds'] += time.perf_counter() - start
+                    # Solo un OCR completo de la página sirve como bloques en caché
+                    if self.cache is not None and complete:
+                        self._put_cached_blocks(content_hash, blocks)
+
+                if refine:
+                    blocks = self.refine_blocks(image, blocks)
+
+                result = self._build_result(Document(blocks).confident_blocks)
+                if use_templates:
+                    self._learn_template(image, blocks, result)
+
+            if self.cache is not None:
+                self.cache.put('fields', content_hash, result, fields_variant)
+            return result
             
         except Exception as e:
             logging.error(f"Error en el procesamiento OCR: {str(e)}")
-            raise
\ No newline at end of file
+            raise
+
+    def process_batch(self, images: Iterable, batch_size: int = OCR_BATCH_SIZE) -> List[Dict]:
+        """
+        Procesa un lote de imágenes usando la detección por lotes de EasyOCR.
+
+        Las imágenes ya presentes en la caché no se vuelven a reconocer.
+
+        Args:
+            images (Iterable): Rutas, bytes o imágenes (np.ndarray)
+            batch_size (int): Máximo de imágenes por llamada a readtext_batched
+
+        Returns:
+            List[Dict]: Resultado de process_image por imagen, en el orden de entrada
+        """
+        try:
+            images = list(images)
+            results: List[Optional[Dict]] = [None] * len(images)
+            blocks: List[Optional[List[Dict]]] = [None] * len(images)
+            hashes: List[Optional[str]] = [None] * len(images)
+
+            if self.cache is not None:
+                for index, image in enumerate(images):
+                    hashes[index] = ResultCache.content_hash(image)
+                    results[index] = self.cache.get('fields', hashes[index], self.fields_cache_variant)
+                    if results[index] is None:
+                        blocks[index] = self._get_cached_blocks(hashes[index])
+
+            pending = [i for i in range(len(images)) if results[i] is None and blocks[i] is None]
+            if pending:
+                arrays = [self._to_array(images[i]) for i in pending]
+                for index, image_blocks in zip(pending, self.read_blocks_batch(arrays, batch_size)):
+                    blocks[index] = image_blocks
+                    if self.cache is not None:
+                        self._put_cached_blocks(hashes[index], image_blocks)
+
+            for index in range(len(images)):
+                if results[index] is not None:
+                    continue
+                results[index] = self._build_result(Document(blocks[index]).confident_blocks)
+                if self.cache is not None:
+                    self.cache.put('fields', hashes[index], results[index], self.fields_cache_variant)
+
+            return results
+
+        except Exception as e:
+            logging.error(f"Error en el procesamiento OCR por lotes: {str(e)}")
+            raise
@@ -0,0 +1,225 @@
+# src/ocr/onnx_backend.py
+import os
+import logging
+import tempfile
+from typing import Dict, Optional, Tuple
+
+import torch
+
+from config.settings import (
+    OCR_MODEL_STORAGE,
+    ONNX_OPSET,
+    ONNX_INTRA_OP_THREADS,
+    ONNX_INTER_OP_THREADS
+)
+
+
+def _import_onnxruntime():
+    """Importa onnxruntime solo cuando se usa el backend ONNX."""
+    try:
+        import onnxruntime
+    except ImportError as e:
+        raise ImportError(
+            "El backend OCR 'onnx' requiere onnxruntime (pip install onnxruntime)"
+        ) from e
+    return onnxruntime
+
+
+class _WidthMeanPool(torch.nn.Module):
+    """
+    Equivalente de AdaptiveAvgPool2d((None, 1)) exportable con ancho dinámico:
+    promedia la última dimensión y conserva las demás.
+    """
+
+    def forward(self, x):
+        return x.mean(dim=3, keepdim=True)
+
+
+class _RecognizerExport(torch.nn.Module):
+    """Envoltorio del reconocedor que expone solo la imagen como entrada."""
+
+    def __init__(self, recognizer: torch.nn.Module):
+        super().__init__()
+        self.recognizer = recognizer
+
+    def forward(self, image):
+        # El argumento `text` solo lo usan las cabezas de atención; la de CTC lo ignora
+        return self.recognizer(image, None)
+
+
+class OnnxModule(torch.nn.Module):
+    """
+    Sustituto de un módulo PyTorch que ejecuta un grafo ONNX con ONNX Runtime.
+
+    Recibe y devuelve tensores, de modo que EasyOCR puede usarlo en lugar del
+    detector o del reconocedor sin cambios en su pre y posprocesamiento.
+    """
+
+    def __init__(self, session):
+        """
+        Args:
+            session (onnxruntime.InferenceSession): Sesión del grafo exportado
+        """
+        super().__init__()
+        self.session = session
+        self.input_names = [node.name for node in session.get_inputs()]
+
+    def forward(self, *inputs):
+        # Las entradas sobrantes (p. ej. `text` del reconocedor) no forman parte del grafo
+        feeds = {
+            name: tensor.detach().cpu().numpy()
+            for name, tensor in zip(self.input_names, inputs)
+        }
+        outputs = [torch.from_numpy(output) for output in self.session.run(None, feeds)]
+        return outputs[0] if len(outputs) == 1 else tuple(outputs)
+
+
+class OnnxBackend:
+    """
+    Backend de inferencia ONNX Runtime para los modelos de EasyOCR.
+
+    Exporta una única vez el detector CRAFT y el reconocedor de un lector
+    EasyOCR a ONNX, guarda los grafos en el directorio de modelos y sustituye
+    los módulos del lector por sesiones de ONNX Runtime en CPU. El resto del
+    lector (redimensionado, decodificación CTC, agrupación de cajas) no cambia,
+    por lo que readtext devuelve el mismo formato que con PyTorch.
+    """
+
+    @staticmethod
+    def model_paths(reader, model_dir: str = OCR_MODEL_STORAGE) -> Tuple[str, str]:
+        """
+        Obtiene las rutas de los grafos ONNX de un lector.
+
+        Args:
+            reader: Lector EasyOCR
+            model_dir (str): Directorio de modelos
+
+        Returns:
+            Tuple[str, str]: Rutas del detector y del reconocedor
+        """
+        detector = getattr(reader, 'detect_network', 'craft')
+        recognizer = getattr(reader, 'model_lang', 'latin')
+        return (
+            os.path.join(model_dir, f"{detector}_detector.onnx"),
+            os.path.join(model_dir, f"{recognizer}_recognizer.onnx")
+        )
+
+    @staticmethod
+    def _export(module: torch.nn.Module, sample: torch.Tensor, path: str,
+                output_names, dynamic_axes: Dict) -> None:
+        """Exporta un módulo a ONNX de forma atómica."""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        os.close(fd)
+        try:
+            with torch.no_grad():
+                torch.onnx.export(
+                    module, (sample,), tmp_path,
+                    input_names=['image'],
+                    output_names=output_names,
+                    dynamic_axes=dynamic_axes,
+                    opset_version=ONNX_OPSET,
+                    dynamo=False
+                )
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    @staticmethod
+    def export(reader, model_dir: str = OCR_MODEL_STORAGE, force: bool = False) -> Tuple[str, str]:
+        """
+        Exporta el detector y el reconocedor del lector a ONNX si aún no existen.
+
+        El lector debe tener los pesos en punto flotante (quantize=False): las
+        capas cuantizadas dinámicamente de PyTorch no se pueden exportar.
+
+        Args:
+            reader: Lector EasyOCR con los modelos PyTorch cargados
+            model_dir (str): Directorio donde guardar los grafos
+            force (bool): Volver a exportar aunque los grafos existan
+
+        Returns:
+            Tuple[str, str]: Rutas del detector y del reconocedor
+        """
+        detector_path, recognizer_path = OnnxBackend.model_paths(reader, model_dir)
+
+        if force or not os.path.exists(detector_path):
+            logging.info(f"Exportando detector a ONNX: {detector_path}")
+            detector = reader.detector.cpu().eval()
+            OnnxBackend._export(
+                detector, torch.zeros(1, 3, 320, 320), detector_path,
+                output_names=['score', 'feature'],
+                dynamic_axes={
+                    'image': {0: 'batch', 2: 'height', 3: 'width'},
+                    'score': {0: 'batch', 1: 'score_height', 2: 'score_width'},
+                    'feature': {0: 'batch', 2: 'score_height', 3: 'score_width'},
+                }
+            )
+
+        if force or not os.path.exists(recognizer_path):
+            logging.info(f"Exportando reconocedor a ONNX: {recognizer_path}")
+            recognizer = reader.recognizer.cpu()
+            pool = recognizer.AdaptiveAvgPool
+            recognizer.AdaptiveAvgPool = _WidthMeanPool()
+            try:
+                # El envoltorio se pone en eval: torch.onnx.export restaura al
+                # terminar el modo del módulo exportado, y con él el de sus hijos
+                OnnxBackend._export(
+                    _RecognizerExport(recognizer).eval(), torch.zeros(1, 1, 64, 256),
+                    recognizer_path,
+                    output_names=['preds'],
+                    dynamic_axes={
+                        'image': {0: 'batch', 3: 'width'},
+                        'preds': {0: 'batch', 1: 'steps'},
+                    }
+                )
+            finally:
+                recognizer.AdaptiveAvgPool = pool
+
+        return detector_path, recognizer_path
+
+    @staticmethod
+    def create_session(path: str, intra_op_threads: int = ONNX_INTRA_OP_THREADS,
+                       inter_op_threads: int = ONNX_INTER_OP_THREADS):
+        """
+        Crea una sesión de ONNX Runtime en CPU con todas las optimizaciones de grafo.
+
+        Args:
+            path (str): Ruta del grafo ONNX
+            intra_op_threads (int): Hilos por operador (0 = valor por defecto de ORT)
+            inter_op_threads (int): Hilos entre operadores
+
+        Returns:
+            onnxruntime.InferenceSession: Sesión lista para inferencia
+        """
+        ort = _import_onnxruntime()
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.intra_op_num_threads = intra_op_threads
+        options.inter_op_num_threads = inter_op_threads
+        return ort.InferenceSession(path, sess_options=options, providers=['CPUExecutionProvider'])
+
+    @staticmethod
+    def attach(reader, model_dir: str = OCR_MODEL_STORAGE,
+               intra_op_threads: Optional[int] = None) -> None:
+        """
+        Sustituye el detector y el reconocedor del lector por sesiones ONNX Runtime,
+        exportándolos antes si es necesario.
+
+        Args:
+            reader: Lector EasyOCR sin cuantizar
+            model_dir (str): Directorio de los grafos ONNX
+            intra_op_threads (int): Hilos por operador (por defecto ONNX_INTRA_OP_THREADS;
+                si es 0, los mismos que PyTorch para respetar el reparto de núcleos)
+        """
+        _import_onnxruntime()
+        detector_path, recognizer_path = OnnxBackend.export(reader, model_dir)
+        threads = ONNX_INTRA_OP_THREADS if intra_op_threads is None else intra_op_threads
+        if threads == 0:
+            threads = torch.get_num_threads()
+        reader.detector = OnnxModule(OnnxBackend.create_session(detector_path, threads))
+        reader.recognizer = OnnxModule(OnnxBackend.create_session(recognizer_path, threads))
+        logging.info("Lector EasyOCR usando ONNX Runtime (CPUExecutionProvider)")
@@ -0,0 +1,185 @@
+# src/ocr/reader_registry.py
+import os
+import time
+import logging
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import easyocr
+
+from config.settings import OCR_LANGUAGES, OCR_GPU, OCR_MODEL_STORAGE, OCR_QUANTIZE, OCR_BACKEND
+from .onnx_backend import OnnxBackend
+
+
+def _current_rss() -> Optional[int]:
+    """Memoria residente actual del proceso en bytes (None si no está disponible)."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _parameter_bytes(reader) -> int:
+    """Bytes ocupados por los pesos del detector y del reconocedor."""
+    total = 0
+    for model in (getattr(reader, 'detector', None), getattr(reader, 'recognizer', None)):
+        if model is None or not hasattr(model, 'state_dict'):
+            continue
+        for tensor in model.state_dict().values():
+            if hasattr(tensor, 'element_size'):
+                total += tensor.element_size() * tensor.nelement()
+    return total
+
+
+class ReaderRegistry:
+    """
+    Registro de lectores EasyOCR compartidos por todo el proceso.
+
+    Construye un único lector por combinación (idiomas, gpu, directorio de
+    modelos, cuantización, backend) la primera vez que se solicita y lo entrega a
+    todos los que lo piden después. La construcción está protegida por un
+    lock por clave, de modo que hilos concurrentes no cargan los pesos dos
+    veces.
+    """
+
+    _readers: Dict[Tuple, easyocr.Reader] = {}
+    _info: Dict[Tuple, Dict] = {}
+    _key_locks: Dict[Tuple, threading.Lock] = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def make_key(languages: Sequence[str], gpu: bool, model_dir: str,
+                 quantize: bool = OCR_QUANTIZE, backend: str = OCR_BACKEND) -> Tuple:
+        """
+        Construye la clave del registro.
+
+        Args:
+            languages (Sequence[str]): Idiomas del lector
+            gpu (bool): Uso de GPU
+            model_dir (str): Directorio de modelos
+            quantize (bool): Cuantización dinámica INT8 en CPU
+            backend (str): Backend de inferencia ('torch' u 'onnx')
+
+        Returns:
+            Tuple: Clave normalizada
+        """
+        if backend not in ('torch', 'onnx'):
+            raise ValueError(f"Backend OCR no soportado: {backend}")
+        # Los grafos ONNX se exportan desde los pesos en punto flotante
+        if backend == 'onnx':
+            quantize = False
+        return (tuple(languages), gpu, os.path.abspath(model_dir), bool(quantize), backend)
+
+    @classmethod
+    def get_reader(cls, languages: Sequence[str] = OCR_LANGUAGES, gpu: bool = OCR_GPU,
+                   model_dir: str = OCR_MODEL_STORAGE, quantize: bool = OCR_QUANTIZE,
+                   backend: str = OCR_BACKEND, **reader_kwargs) -> easyocr.Reader:
+        """
+        Obtiene el lector compartido, construyéndolo si aún no existe.
+
+        Args:
+            languages (Sequence[str]): Idiomas del lector
+            gpu (bool): Uso de GPU
+            model_dir (str): Directorio de modelos
+            quantize (bool): Cuantización dinámica INT8 del reconocedor en CPU
+                (se ignora con el backend 'onnx')
+            backend (str): 'torch' para PyTorch u 'onnx' para ONNX Runtime en CPU
+            **reader_kwargs: Argumentos extra de easyocr.Reader (solo se usan
+                al construir el lector por primera vez)
+
+        Returns:
+            easyocr.Reader: Lector compartido
+        """
+        key = cls.make_key(languages, gpu, model_dir, quantize, backend)
+        reader = cls._readers.get(key)
+        if reader is not None:
+            return reader
+
+        with cls._lock:
+            key_lock = cls._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            reader = cls._readers.get(key)
+            if reader is None:
+                reader = cls._load(key, reader_kwargs)
+        return reader
+
+    @classmethod
+    def _load(cls, key: Tuple, reader_kwargs: Dict) -> easyocr.Reader:
+        """Construye un lector y registra su tiempo de carga y memoria."""
+        languages, gpu, model_dir, quantize, backend = key
+        logging.info(
+            f"Cargando lector EasyOCR {list(languages)} "
+            f"(gpu={gpu}, quantize={quantize}, backend={backend})..."
+        )
+
+        rss_before = _current_rss()
+        start = time.perf_counter()
+        reader = easyocr.Reader(
+            lang_list=list(languages),
+            gpu=gpu,
+            model_storage_directory=model_dir,
+            quantize=quantize,
+            **reader_kwargs
+        )
+        if backend == 'onnx':
+            OnnxBackend.attach(reader, model_dir)
+        load_seconds = time.perf_counter() - start
+        rss_after = _current_rss()
+
+        info = {
+            'languages': list(languages),
+            'gpu': gpu,
+            'model_dir': model_dir,
+            'quantize': quantize,
+            'backend': backend,
+            'load_seconds': load_seconds,
+            'parameter_bytes': _parameter_bytes(reader),
+            'rss_delta_bytes': (rss_after - rss_before) if rss_before is not None and rss_after is not None else None,
+            'warmup_seconds': None,
+        }
+        cls._info[key] = info
+        cls._readers[key] = reader
+        logging.info(
+            f"Lector EasyOCR cargado en {load_seconds:.2f}s "
+            f"({info['parameter_bytes'] / 1024 / 1024:.1f}MB de pesos)"
+        )
+        return reader
+
+    @classmethod
+    def warm_up(cls, languages: Sequence[str] = OCR_LANGUAGES, gpu: bool = OCR_GPU,
+                model_dir: str = OCR_MODEL_STORAGE, quantize: bool = OCR_QUANTIZE,
+                backend: str = OCR_BACKEND, **reader_kwargs) -> Dict:
+        """
+        Carga el lector y ejecuta una inferencia sobre una imagen en blanco
+        para que la primera petición real no pague la inicialización.
+
+        Returns:
+            Dict: Información del lector
+        """
+        reader = cls.get_reader(languages, gpu, model_dir, quantize, backend, **reader_kwargs)
+        key = cls.make_key(languages, gpu, model_dir, quantize, backend)
+        start = time.perf_counter()
+        reader.readtext(np.full((64, 256), 255, dtype=np.uint8))
+        cls._info[key]['warmup_seconds'] = time.perf_counter() - start
+        return dict(cls._info[key])
+
+    @classmethod
+    def info(cls) -> List[Dict]:
+        """
+        Obtiene el tiempo de carga y la memoria de cada lector registrado.
+
+        Returns:
+            List[Dict]: Información por lector
+        """
+        return [dict(info) for info in cls._info.values()]
+
+    @classmethod
+    def clear(cls):
+        """Libera todos los lectores registrados."""
+        with cls._lock:
+            cls._readers.clear()
+            cls._info.clear()
+            cls._key_locks.clear()
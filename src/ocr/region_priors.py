@@ -0,0 +1,184 @@
+# src/ocr/region_priors.py
+import os
+import json
+import logging
+import tempfile
+import weakref
+import threading
+from multiprocessing import util
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin bloqueo entre procesos
+    fcntl = None
+
+from config.settings import OCR_REGION_PRIORS_FILE, OCR_REGION_PRIOR_GRID, OCR_REGION_PRIORS_SAVE_EVERY
+
+# Prioridades con archivo creadas en este proceso, guardadas al salir si siguen vivas
+_open_priors: 'weakref.WeakSet[RegionPriors]' = weakref.WeakSet()
+# Proceso en el que está registrado el guardado al salir (los hijos con fork no lo heredan)
+_exit_hook_pid: Optional[int] = None
+
+
+def _save_open_priors() -> None:
+    """Guarda las cuentas pendientes de las prioridades vivas del proceso actual."""
+    for priors in list(_open_priors):
+        if priors._pid == os.getpid():
+            try:
+                priors.save()
+            except Exception as e:
+                logging.warning(f"No se pudieron guardar las posiciones aprendidas: {str(e)}")
+
+
+def _register(priors: 'RegionPriors') -> None:
+    """Añade unas prioridades al registro y, una vez por proceso, el guardado al salir."""
+    global _exit_hook_pid
+    _open_priors.add(priors)
+    if _exit_hook_pid != os.getpid():
+        # Finalize con exitpriority se ejecuta al salir, también en los workers de multiprocessing
+        util.Finalize(None, _save_open_priors, exitpriority=10)
+        _exit_hook_pid = os.getpid()
+
+
+class RegionPriors:
+    """
+    Frecuencia aprendida de la posición de los campos en la página.
+
+    Divide la página en una rejilla y cuenta, por tipo de documento, cuántas
+    veces apareció un campo (o un identificador del tipo) en cada celda. El
+    OCR progresivo usa estas cuentas para reconocer primero las regiones donde
+    suelen estar los datos.
+
+    Las cuentas nuevas se guardan cada save_every actualizaciones, en close y
+    al salir del proceso (si el objeto sigue vivo), sumándolas a las que haya
+    en disco en ese momento, de modo que varios procesos (workers OCR)
+    pueden compartir el archivo sin perder las actualizaciones de los demás.
+    """
+
+    def __init__(self, path: Optional[str] = OCR_REGION_PRIORS_FILE,
+                 grid: Tuple[int, int] = OCR_REGION_PRIOR_GRID,
+                 save_every: int = OCR_REGION_PRIORS_SAVE_EVERY):
+        """
+        Inicializa las prioridades, cargando las guardadas si existen.
+
+        Args:
+            path (str): Archivo JSON de persistencia (None para no persistir)
+            grid (Tuple[int, int]): Filas y columnas de la rejilla
+            save_every (int): Actualizaciones entre guardados en save_if_due
+        """
+        self.path = path
+        self.rows, self.cols = grid
+        self.save_every = max(1, save_every)
+        self._counts: Dict[str, List[int]] = self._read()
+        # Cuentas añadidas desde el último guardado
+        self._pending: Dict[str, List[int]] = {}
+        self._unsaved = 0
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        if self.path:
+            _register(self)
+
+    def _read(self) -> Dict[str, List[int]]:
+        """Lee las cuentas del disco si la rejilla coincide."""
+        if not self.path:
+            return {}
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if data.get('grid') != [self.rows, self.cols]:
+            logging.warning("Rejilla de prioridades distinta a la guardada; se ignoran las cuentas")
+            return {}
+        return {doc_type: list(counts) for doc_type, counts in data.get('counts', {}).items()}
+
+    def _cell(self, x: float, y: float) -> int:
+        """Índice de la celda de un punto normalizado (0-1)."""
+        row = min(self.rows - 1, max(0, int(y * self.rows)))
+        col = min(self.cols - 1, max(0, int(x * self.cols)))
+        return row * self.cols + col
+
+    def score(self, x: float, y: float, document_type: Optional[str] = None) -> float:
+        """
+        Prioridad de una posición normalizada.
+
+        Args:
+            x (float): Centro horizontal relativo al ancho (0-1)
+            y (float): Centro vertical relativo al alto (0-1)
+            document_type (str): Tipo de documento (None o desconocido para
+                combinar todos los tipos)
+
+        Returns:
+            float: Valor entre 0 y 1; 1 para todas las celdas sin datos previos
+        """
+        if document_type in self._counts:
+            counts = self._counts[document_type]
+        else:
+            counts = [sum(cells) for cells in zip(*self._counts.values())]
+        if not counts:
+            return 1.0
+        return (counts[self._cell(x, y)] + 1) / (max(counts) + 1)
+
+    def update(self, document_type: str, points: Iterable[Tuple[float, float]]) -> None:
+        """
+        Registra las posiciones normalizadas donde se encontraron datos.
+
+        Args:
+            document_type (str): Tipo de documento
+            points (Iterable[Tuple[float, float]]): Centros (x, y) normalizados
+        """
+        size = self.rows * self.cols
+        with self._lock:
+            counts = self._counts.setdefault(document_type, [0] * size)
+            pending = self._pending.setdefault(document_type, [0] * size)
+            for x, y in points:
+                cell = self._cell(x, y)
+                counts[cell] += 1
+                pending[cell] += 1
+            self._unsaved += 1
+
+    def save_if_due(self) -> None:
+        """Guarda las cuentas si hubo save_every actualizaciones desde el último guardado."""
+        if self._unsaved >= self.save_every:
+            self.save()
+
+    def close(self) -> None:
+        """Guarda las cuentas pendientes; el objeto sigue siendo utilizable."""
+        self.save()
+
+    def save(self) -> None:
+        """
+        Suma las cuentas nuevas a las guardadas en disco y escribe el resultado
+        de forma atómica, bajo un bloqueo de archivo entre procesos. Las cuentas
+        en memoria pasan a ser las del disco (incluidas las de otros procesos).
+        """
+        if not self.path:
+            return
+        with self._lock:
+            if not self._pending:
+                return
+            directory = os.path.dirname(self.path) or '.'
+            os.makedirs(directory, exist_ok=True)
+            with open(self.path + '.lock', 'a') as lock_file:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                merged = self._read()
+                for doc_type, pending in self._pending.items():
+                    counts = merged.setdefault(doc_type, [0] * len(pending))
+                    for cell, count in enumerate(pending):
+                        counts[cell] += count
+
+                data = {'grid': [self.rows, self.cols], 'counts': merged}
+                fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+                try:
+                    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                        json.dump(data, f)
+                    os.replace(tmp_path, self.path)
+                except Exception:
+                    if os.path.exists(tmp_path):
+                        os.remove(tmp_path)
+                    raise
+            self._counts = merged
+            self._pending = {}
+            self._unsaved = 0
@@ -0,0 +1,195 @@
+# src/ocr/text_blocks.py
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Union
+
+import numpy as np
+
+
+def _corners(bbox: Optional[Sequence]) -> np.ndarray:
+    """Caja de cuatro puntos (4×2); acepta también la forma plana [x0, y0, x1, y1]."""
+    if bbox is None:
+        return np.full((4, 2), np.nan)
+    points = np.asarray(bbox, dtype=np.float64)
+    if points.shape == (4,):
+        x0, y0, x1, y1 = points
+        points = np.array([[x0, y0], [x1, y0], [x1, y1], [x0, y1]])
+    return points.reshape(4, 2)
+
+
+class TextBlock:
+    """
+    Bloque OCR con atributos fijos, para acceder a un bloque suelto sin dict.
+
+    Equivale al dict {'text', 'confidence', 'bbox'} que usa el resto del
+    pipeline; bbox es una lista de cuatro puntos [x, y] o None.
+    """
+
+    __slots__ = ('text', 'confidence', 'bbox')
+
+    def __init__(self, text: str, confidence: float, bbox: Optional[List[List[float]]] = None):
+        self.text = text
+        self.confidence = confidence
+        self.bbox = bbox
+
+    @classmethod
+    def from_dict(cls, block: Dict[str, Any]) -> 'TextBlock':
+        """
+        Crea el bloque a partir de su forma dict.
+
+        Args:
+            block (Dict[str, Any]): Bloque {'text', 'confidence', 'bbox'}
+
+        Returns:
+            TextBlock: Bloque
+        """
+        return cls(block['text'], float(block.get('confidence', 0)), block.get('bbox'))
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Forma dict del bloque (sin 'bbox' si no tiene caja)."""
+        block = {'text': self.text, 'confidence': self.confidence}
+        if self.bbox is not None:
+            block['bbox'] = self.bbox
+        return block
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, TextBlock):
+            return NotImplemented
+        return (self.text, self.confidence, self.bbox) == (other.text, other.confidence, other.bbox)
+
+    def __repr__(self) -> str:
+        return f"TextBlock(text={self.text!r}, confidence={self.confidence:.3f}, bbox={self.bbox!r})"
+
+
+class TextBlockArray:
+    """
+    Bloques OCR de una página guardados por columnas.
+
+    En lugar de un dict con listas anidadas por bloque, guarda las cajas en
+    un solo array N×4×2 (int32 si todas las coordenadas son enteras, como
+    las de readtext, y si no float64), las confianzas en un array N float64
+    y los textos en una única cadena con los desplazamientos de cada bloque.
+    Así una página son unos pocos objetos, sea cual sea el número de bloques,
+    y se serializa (caché, procesos de trabajo) en bloque. Los tipos no
+    pierden precisión: to_dicts devuelve exactamente las confianzas y cajas
+    originales, de modo que un acierto de caché da el mismo resultado que el
+    OCR. Los bloques sin caja guardan NaN.
+    """
+
+    __slots__ = ('bboxes', 'confidences', 'buffer', 'offsets')
+
+    def __init__(self, bboxes: np.ndarray, confidences: np.ndarray, buffer: str, offsets: np.ndarray):
+        """
+        Args:
+            bboxes (np.ndarray): Cajas N×4×2 int32 o float64
+            confidences (np.ndarray): Confianzas N float64
+            buffer (str): Textos de todos los bloques seguidos
+            offsets (np.ndarray): N + 1 posiciones; el texto del bloque i es
+                buffer[offsets[i]:offsets[i + 1]]
+        """
+        self.bboxes = bboxes
+        self.confidences = confidences
+        self.buffer = buffer
+        self.offsets = offsets
+
+    @classmethod
+    def from_dicts(cls, blocks: Iterable[Union[Dict[str, Any], TextBlock]]) -> 'TextBlockArray':
+        """
+        Crea el array a partir de bloques en forma dict (o TextBlock).
+
+        Args:
+            blocks (Iterable): Bloques {'text', 'confidence', 'bbox'}
+
+        Returns:
+            TextBlockArray: Bloques por columnas
+        """
+        blocks = [block.to_dict() if isinstance(block, TextBlock) else block for block in blocks]
+        texts = [block['text'] for block in blocks]
+        offsets = np.zeros(len(blocks) + 1, dtype=np.int64)
+        np.cumsum([len(text) for text in texts], out=offsets[1:])
+        bboxes = np.empty((len(blocks), 4, 2), dtype=np.float64)
+        for index, block in enumerate(blocks):
+            bboxes[index] = _corners(block.get('bbox'))
+        if (np.isfinite(bboxes).all() and np.array_equal(bboxes, np.round(bboxes))
+                and np.abs(bboxes).max(initial=0) < 2 ** 31):
+            bboxes = bboxes.astype(np.int32)
+        confidences = np.array([block.get('confidence', 0) for block in blocks], dtype=np.float64)
+        return cls(bboxes, confidences, ''.join(texts), offsets)
+
+    def __len__(self) -> int:
+        return len(self.confidences)
+
+    def text(self, index: int) -> str:
+        """Texto del bloque index."""
+        return self.buffer[self.offsets[index]:self.offsets[index + 1]]
+
+    @property
+    def texts(self) -> List[str]:
+        """Textos de todos los bloques."""
+        offsets = self.offsets.tolist()
+        return [self.buffer[start:end] for start, end in zip(offsets, offsets[1:])]
+
+    def __getitem__(self, index: Union[int, slice, np.ndarray]) -> Union[TextBlock, 'TextBlockArray']:
+        """
+        Un bloque (índice entero) o un subconjunto (slice, índices o máscara).
+        """
+        if isinstance(index, (int, np.integer)):
+            if index < 0:
+                index += len(self)
+            if not 0 <= index < len(self):
+                raise IndexError("Índice de bloque fuera de rango")
+            bbox = self.bboxes[index]
+            return TextBlock(
+                self.text(index),
+                float(self.confidences[index]),
+                None if np.isnan(bbox).any() else bbox.tolist()
+            )
+        positions = np.arange(len(self))[index]
+        starts, ends = self.offsets[positions], self.offsets[positions + 1]
+        offsets = np.zeros(len(positions) + 1, dtype=np.int64)
+        np.cumsum(ends - starts, out=offsets[1:])
+        buffer = ''.join(self.buffer[start:end] for start, end in zip(starts.tolist(), ends.tolist()))
+        return TextBlockArray(self.bboxes[positions], self.confidences[positions], buffer, offsets)
+
+    def __iter__(self) -> Iterator[TextBlock]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def confident(self, threshold: float) -> 'TextBlockArray':
+        """
+        Bloques con confianza mínima.
+
+        Args:
+            threshold (float): Confianza mínima
+
+        Returns:
+            TextBlockArray: Bloques que la superan, en el mismo orden
+        """
+        return self[self.confidences >= threshold]
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        """
+        Forma dict de los bloques, la que usa el resto del pipeline.
+
+        Returns:
+            List[Dict[str, Any]]: Bloques {'text', 'confidence', 'bbox'} con la
+            caja como lista de cuatro puntos (sin 'bbox' si no tenía caja)
+        """
+        missing = np.isnan(self.bboxes).any(axis=(1, 2)).tolist()
+        bboxes = self.bboxes.tolist()
+        blocks = []
+        for text, confidence, bbox, no_bbox in zip(self.texts, self.confidences.tolist(), bboxes, missing):
+            block = {'text': text, 'confidence': confidence}
+            if not no_bbox:
+                block['bbox'] = bbox
+            blocks.append(block)
+        return blocks
+
+    @property
+    def nbytes(self) -> int:
+        """Memoria aproximada de los datos de los bloques."""
+        return self.bboxes.nbytes + self.confidences.nbytes + self.offsets.nbytes + len(self.buffer)
+
+    def __getstate__(self):
+        return self.bboxes, self.confidences, self.buffer, self.offsets
+
+    def __setstate__(self, state):
+        self.bboxes, self.confidences, self.buffer, self.offsets = state
@@ -0,0 +1,391 @@
+# src/ocr/worker_pool.py
+#
+# Este módulo no importa torch, cv2 ni OCREngine a nivel de módulo: los
+# workers se crean con 'spawn' y las variables de hilos de BLAS/OpenMP deben
+# fijarse antes de que esas librerías se carguen en el proceso hijo.
+import os
+import json
+import time
+import logging
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from config.settings import (
+    OCR_CORE_BUDGET,
+    OCR_THREADS_PER_WORKER,
+    OCR_PIN_CORES,
+    OCR_TOPOLOGY_FILE,
+    CACHE_ENABLED
+)
+
+# Variables de entorno que controlan los hilos de OpenMP y las librerías BLAS
+THREAD_ENV_VARS = (
+    'OMP_NUM_THREADS',
+    'MKL_NUM_THREADS',
+    'OPENBLAS_NUM_THREADS',
+    'NUMEXPR_NUM_THREADS',
+    'VECLIB_MAXIMUM_THREADS',
+)
+
+# Segundos que un worker espera a que el resto cargue su modelo
+WORKER_LOAD_TIMEOUT = 600
+
+
+def _available_cores() -> List[int]:
+    """Núcleos en los que puede ejecutarse el proceso actual."""
+    if hasattr(os, 'sched_getaffinity'):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def configure_threads(threads: int, cores: Optional[Sequence[int]] = None) -> None:
+    """
+    Limita los hilos de OpenMP, BLAS, PyTorch y OpenCV del proceso actual.
+
+    Las variables de entorno solo tienen efecto si se fijan antes de importar
+    torch o numpy; las llamadas a set_num_threads ajustan además las
+    librerías ya cargadas.
+
+    Args:
+        threads (int): Hilos por librería
+        cores (Sequence[int]): Núcleos a los que fijar el proceso (None para no fijar)
+    """
+    for name in THREAD_ENV_VARS:
+        os.environ[name] = str(threads)
+
+    if cores and hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, set(cores))
+
+    import cv2
+    import torch
+
+    torch.set_num_threads(threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:  # Solo se puede fijar antes del primer uso del pool inter-op
+        pass
+    cv2.setNumThreads(threads)
+
+
+class OCRWorkerPool:
+    """
+    Pool de procesos OCR que reparte un presupuesto de núcleos en
+    N workers × T hilos.
+
+    Cada worker carga su propio OCREngine después de limitar los hilos de
+    PyTorch, OpenCV y BLAS a T, de modo que los N procesos no compiten por
+    los mismos núcleos. Opcionalmente cada worker se fija a un subconjunto
+    disjunto de núcleos.
+    """
+
+    def __init__(self, workers: Optional[int] = None, threads: Optional[int] = None,
+                 core_budget: int = OCR_CORE_BUDGET, pin_cores: bool = OCR_PIN_CORES,
+                 use_cache: bool = True, topology_file: str = OCR_TOPOLOGY_FILE):
+        """
+        Inicializa el pool (los procesos se crean en start o al primer uso).
+
+        Si no se indican workers ni threads, se usa la topología guardada por
+        autotune para este presupuesto o, si no existe, OCR_THREADS_PER_WORKER.
+
+        Args:
+            workers (int): Número de procesos
+            threads (int): Hilos por proceso
+            core_budget (int): Núcleos totales disponibles para el pool
+            pin_cores (bool): Fijar cada worker a sus propios núcleos
+            use_cache (bool): Usar la caché de resultados en los workers
+            topology_file (str): Archivo con la topología ajustada
+        """
+        if workers is None and threads is None:
+            saved = self.load_topology(core_budget, topology_file)
+            if saved is not None:
+                workers, threads = saved['workers'], saved['threads']
+        self.workers, self.threads = self.split(core_budget, workers, threads)
+        self.core_budget = core_budget
+        self.pin_cores = pin_cores
+        self.use_cache = use_cache
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    @staticmethod
+    def split(core_budget: int, workers: Optional[int] = None,
+              threads: Optional[int] = None) -> Tuple[int, int]:
+        """
+        Reparte el presupuesto de núcleos en workers × hilos.
+
+        Args:
+            core_budget (int): Núcleos totales
+            workers (int): Procesos deseados (None para derivarlo)
+            threads (int): Hilos por proceso deseados (None para derivarlo)
+
+        Returns:
+            Tuple[int, int]: (workers, threads) con workers * threads <= core_budget
+        """
+        core_budget = max(1, core_budget)
+        if workers is None and threads is None:
+            threads = OCR_THREADS_PER_WORKER
+        if threads is None:
+            workers = max(1, min(workers, core_budget))
+            threads = max(1, core_budget // workers)
+        else:
+            threads = max(1, min(threads, core_budget))
+            workers = max(1, core_budget // threads) if workers is None else max(1, workers)
+        if workers * threads > core_budget:
+            raise ValueError(
+                f"{workers} workers × {threads} hilos superan el presupuesto de {core_budget} núcleos"
+            )
+        return workers, threads
+
+    @staticmethod
+    def candidate_splits(core_budget: int) -> List[Tuple[int, int]]:
+        """
+        Repartos que usan todo el presupuesto (T divisor del presupuesto).
+
+        Args:
+            core_budget (int): Núcleos totales
+
+        Returns:
+            List[Tuple[int, int]]: (workers, threads) de más a menos procesos
+        """
+        return [
+            (core_budget // threads, threads)
+            for threads in range(1, core_budget + 1)
+            if core_budget % threads == 0
+        ]
+
+    def core_sets(self) -> List[Optional[List[int]]]:
+        """
+        Núcleos asignados a cada worker (None si no se fijan).
+
+        Returns:
+            List[Optional[List[int]]]: Un subconjunto disjunto de núcleos por worker
+        """
+        if not self.pin_cores:
+            return [None] * self.workers
+        cores = _available_cores()
+        if len(cores) < self.workers * self.threads:
+            logging.warning("Hay menos núcleos disponibles que el presupuesto; no se fijan los workers")
+            return [None] * self.workers
+        return [cores[i * self.threads:(i + 1) * self.threads] for i in range(self.workers)]
+
+    def start(self) -> 'OCRWorkerPool':
+        """
+        Crea los procesos y espera a que todos hayan cargado el modelo. Si el
+        pool está roto (un worker terminó de forma anómala, p. ej. por falta
+        de memoria), lo cierra y crea uno nuevo.
+
+        Returns:
+            OCRWorkerPool: El propio pool
+        """
+        if self._pool is not None:
+            if not getattr(self._pool, '_broken', False):
+                return self
+            logging.warning("Un worker OCR terminó de forma anómala; se recrea el pool")
+            self.close()
+        logging.info(f"Iniciando pool OCR: {self.workers} workers × {self.threads} hilos")
+        self._pool = self._create_executor()
+        # Una tarea por worker fuerza la creación de todos los procesos; la
+        # barrera hace que ninguna termine antes de que todos carguen el modelo
+        ready = [self._pool.submit(_worker_ready) for _ in range(self.workers)]
+        for future in ready:
+            future.result()
+        return self
+
+    def _create_executor(self) -> ProcessPoolExecutor:
+        """Crea los procesos 'spawn' que limitan sus hilos y cargan su OCREngine."""
+        context = multiprocessing.get_context('spawn')
+        assignments = context.Queue()
+        for cores in self.core_sets():
+            assignments.put(cores)
+        loaded = context.Barrier(self.workers)
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(self.threads, assignments, loaded, self.use_cache)
+        )
+
+    def close(self) -> None:
+        """Cierra los procesos del pool."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+    def __enter__(self) -> 'OCRWorkerPool':
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def process_batch(self, images: Iterable[Any]) -> Iterator[Dict[str, Any]]:
+        """
+        Procesa imágenes con OCREngine.process_image repartidas entre los workers.
+
+        Los errores de cada imagen se reportan en su resultado sin detener el
+        lote. Si un worker muere, las imágenes en vuelo se reportan con error
+        y el resto del lote sigue en un pool nuevo. Se mantienen como máximo
+        2 * workers imágenes en vuelo y de cada una solo se guarda su ruta,
+        por lo que la memoria no crece con el tamaño del lote.
+
+        Args:
+            images (Iterable[Any]): Rutas, bytes o imágenes (np.ndarray)
+
+        Yields:
+            Dict[str, Any]: {'index', 'source', 'result', 'error'} por imagen,
+            en el orden de entrada
+        """
+        self.start()
+        window = 2 * self.workers
+        pending = deque()
+
+        def submit(index, image):
+            try:
+                return self._pool.submit(_process_in_worker, index, image)
+            except BrokenProcessPool:
+                return self.start()._pool.submit(_process_in_worker, index, image)
+
+        items = enumerate(images)
+        exhausted = False
+        while True:
+            while not exhausted and len(pending) < window:
+                try:
+                    index, image = next(items)
+                except StopIteration:
+                    exhausted = True
+                    break
+                source = image if isinstance(image, str) else None
+                pending.append((index, source, submit(index, image)))
+                del image
+
+            if not pending:
+                break
+
+            index, source, future = pending.popleft()
+            try:
+                result = future.result()
+            except Exception as e:  # El proceso terminó de forma anómala
+                result = {'index': index, 'result': None, 'error': str(e)}
+            result['source'] = source
+            yield result
+
+    @staticmethod
+    def load_topology(core_budget: int = OCR_CORE_BUDGET,
+                      topology_file: str = OCR_TOPOLOGY_FILE) -> Optional[Dict[str, Any]]:
+        """
+        Carga la topología guardada por autotune si corresponde al presupuesto.
+
+        Args:
+            core_budget (int): Núcleos totales
+            topology_file (str): Archivo de topología
+
+        Returns:
+            Optional[Dict[str, Any]]: Topología guardada o None
+        """
+        try:
+            with open(topology_file, encoding='utf-8') as f:
+                topology = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if topology.get('core_budget') != core_budget:
+            return None
+        return topology
+
+    @staticmethod
+    def save_topology(topology: Dict[str, Any], topology_file: str = OCR_TOPOLOGY_FILE) -> None:
+        """
+        Guarda una topología en formato JSON.
+
+        Args:
+            topology (Dict[str, Any]): Topología con core_budget, workers y threads
+            topology_file (str): Archivo de destino
+        """
+        os.makedirs(os.path.dirname(topology_file) or '.', exist_ok=True)
+        with open(topology_file, 'w', encoding='utf-8') as f:
+            json.dump(topology, f, indent=2, ensure_ascii=False)
+
+    @classmethod
+    def autotune(cls, sample_images: Sequence[Any], core_budget: int = OCR_CORE_BUDGET,
+                 splits: Optional[Sequence[Tuple[int, int]]] = None, rounds: int = 2,
+                 pin_cores: bool = OCR_PIN_CORES,
+                 topology_file: Optional[str] = OCR_TOPOLOGY_FILE) -> Dict[str, Any]:
+        """
+        Mide el rendimiento de varios repartos sobre imágenes de muestra y
+        guarda el de mayor throughput.
+
+        La carga del modelo no cuenta en la medición; la caché de resultados
+        se desactiva para medir el OCR real.
+
+        Args:
+            sample_images (Sequence[Any]): Imágenes de muestra
+            core_budget (int): Núcleos totales
+            splits (Sequence[Tuple[int, int]]): Repartos (workers, threads) a
+                probar (por defecto candidate_splits)
+            rounds (int): Veces que se procesa la muestra por reparto
+            pin_cores (bool): Fijar cada worker a sus propios núcleos
+            topology_file (str): Archivo donde guardar el resultado (None para no guardar)
+
+        Returns:
+            Dict[str, Any]: Mejor topología y mediciones de todos los repartos
+        """
+        if not sample_images:
+            raise ValueError("Se necesita al menos una imagen de muestra")
+
+        measurements = []
+        for workers, threads in (splits or cls.candidate_splits(core_budget)):
+            # Cada worker debe recibir trabajo en cada ronda
+            batch = list(sample_images) * max(1, -(-workers // len(sample_images)))
+            with cls(workers, threads, core_budget, pin_cores, use_cache=False) as pool:
+                list(pool.process_batch(batch[:workers]))  # Calentamiento
+                start = time.perf_counter()
+                for _ in range(rounds):
+                    list(pool.process_batch(batch))
+                elapsed = time.perf_counter() - start
+            throughput = len(batch) * rounds / elapsed
+            measurements.append({'workers': workers, 'threads': threads, 'images_per_second': throughput})
+            logging.info(f"{workers} workers × {threads} hilos: {throughput:.2f} imágenes/s")
+
+        best = max(measurements, key=lambda item: item['images_per_second'])
+        topology = {
+            'core_budget': core_budget,
+            'workers': best['workers'],
+            'threads': best['threads'],
+            'images_per_second': best['images_per_second'],
+            'measurements': measurements,
+        }
+        if topology_file:
+            cls.save_topology(topology, topology_file)
+        return topology
+
+
+# Motor OCR propio de cada worker
+_worker_engine = None
+
+
+def _init_worker(threads: int, assignments, loaded, use_cache: bool) -> None:
+    """Limita los hilos del worker y carga su OCREngine."""
+    global _worker_engine
+    cores = assignments.get()
+    configure_threads(threads, cores)
+
+    from src.ocr.ocr_engine import OCREngine
+    _worker_engine = OCREngine(use_cache=use_cache and CACHE_ENABLED)
+
+    try:
+        loaded.wait(timeout=WORKER_LOAD_TIMEOUT)
+    except threading.BrokenBarrierError:
+        logging.warning("No todos los workers OCR cargaron a tiempo")
+
+
+def _worker_ready() -> int:
+    """Confirma que el worker terminó de inicializarse."""
+    return os.getpid()
+
+
+def _process_in_worker(index: int, image: Any) -> Dict[str, Any]:
+    """Procesa una imagen dentro de un worker y captura sus errores."""
+    try:
+        return {'index': index, 'result': _worker_engine.process_image(image), 'error': None}
+    except Exception as e:
+        return {'index': index, 'result': None, 'error': str(e)}
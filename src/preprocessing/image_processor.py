@@ -1,55 +1,183 @@
 # src/preprocessing/image_processor.py
 import cv2
 import numpy as np
-from typing import Union, Tuple
+from PIL import Image
+from typing import Union, Tuple, Dict, Iterable, Iterator, Any, Optional
 import logging
-from config.settings import IMAGE_MIN_SIZE, IMAGE_MAX_SIZE, IMAGE_QUALITY
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+from config.settings import (
+    PREPROCESSING_WORKERS,
+    IMAGE_MIN_SIZE,
+    IMAGE_MAX_SIZE,
+    IMAGE_QUALITY,
+    DESKEW_ANALYSIS_SIZE,
+    DESKEW_ANGLE_TOLERANCE,
+    DESKEW_MAX_ANGLE,
+    DESKEW_MAX_POINTS
+)
+from .stage_graph import StageGraph
 
 class ImageProcessor:
     """Clase para el procesamiento de imágenes antes del OCR."""
+
+    # Pool de procesos compartido por todas las llamadas a process_batch
+    _pool: Optional[ProcessPoolExecutor] = None
+    _pool_workers: Optional[int] = None
+
+    def __init__(self):
+        """Inicializa el grafo de etapas de preprocesamiento."""
+        self.graph = self._build_graph()
+        self.last_timings: Dict[str, float] = {}
+
+    def _build_graph(self) -> StageGraph:
+        """
+        Declara el grafo resize → deskew → gray → threshold/denoise/CLAHE.
+
+        Returns:
+            StageGraph: Grafo de etapas
+        """
+        graph = StageGraph()
+        graph.add_input('input')
+        graph.add_stage('resized', self.resize_image, ['input'])
+        graph.add_stage('deskewed', self.deskew, ['resized'])
+        graph.add_stage('gray', self.to_grayscale, ['deskewed'])
+        graph.add_stage('binary', self.adaptive_threshold, ['gray'])
+        graph.add_stage('denoised', self.denoise, ['binary'])
+        graph.add_stage('enhanced', self.enhance_contrast, ['gray'])
+        return graph
+
+    def run_stages(self, values: Dict[str, np.ndarray], output: str) -> np.ndarray:
+        """
+        Ejecuta el grafo hasta la etapa solicitada y registra los tiempos.
+
+        Args:
+            values (Dict[str, np.ndarray]): Valores de partida por etapa
+            output (str): Etapa cuya salida se devuelve
+
+        Returns:
+            np.ndarray: Salida de la etapa solicitada
+        """
+        results, self.last_timings = self.graph.run(values, [output])
+        logging.debug(
+            "Tiempos de preprocesamiento: " +
+            ", ".join(f"{name}={seconds * 1000:.1f}ms" for name, seconds in self.last_timings.items())
+        )
+        return results[output]
     
+    # Banderas de decodificación reducida por factor de escala
+    REDUCED_COLOR_FLAGS = {
+        1: cv2.IMREAD_COLOR,
+        2: cv2.IMREAD_REDUCED_COLOR_2,
+        4: cv2.IMREAD_REDUCED_COLOR_4,
+        8: cv2.IMREAD_REDUCED_COLOR_8,
+    }
+    REDUCED_GRAYSCALE_FLAGS = {
+        1: cv2.IMREAD_GRAYSCALE,
+        2: cv2.IMREAD_REDUCED_GRAYSCALE_2,
+        4: cv2.IMREAD_REDUCED_GRAYSCALE_4,
+        8: cv2.IMREAD_REDUCED_GRAYSCALE_8,
+    }
+
+    # Etapas cuya salida conserva el color de la imagen de entrada
+    COLOR_STAGES = ('input', 'resized', 'deskewed')
+
     @staticmethod
-    def load_image(image_path: str) -> np.ndarray:
+    def reduced_decode_factor(width: int, height: int) -> int:
         """
-        Carga una imagen desde una ruta.
-        
+        Calcula el mayor factor de reducción (1, 2, 4 u 8) que deja el lado
+        más corto por encima de IMAGE_MAX_SIZE, de modo que resize_image
+        siga siendo quien fija el tamaño final.
+
+        Args:
+            width (int): Ancho original
+            height (int): Alto original
+
+        Returns:
+            int: Factor de reducción
+        """
+        shortest = min(width, height)
+        for factor in (8, 4, 2):
+            if shortest / factor >= IMAGE_MAX_SIZE:
+                return factor
+        return 1
+
+    @staticmethod
+    def load_image(image_path: str, grayscale: bool = False, reduced: bool = False) -> np.ndarray:
+        """
+        Carga una imagen desde una ruta, a resolución completa salvo que se
+        pida la decodificación reducida.
+
         Args:
             image_path (str): Ruta de la imagen
-            
+            grayscale (bool): Decodificar directamente en escala de grises
+            reduced (bool): Leer primero la cabecera y decodificar directamente a
+                resolución reducida (2, 4 u 8 veces menor) cuando la imagen es
+                mucho mayor que IMAGE_MAX_SIZE; el lado corto nunca queda por
+                debajo de IMAGE_MAX_SIZE
+
         Returns:
             np.ndarray: Imagen cargada
         """
-        image = cv2.imread(image_path)
+        factor = 1
+        if reduced:
+            try:
+                with Image.open(image_path) as header:
+                    factor = ImageProcessor.reduced_decode_factor(*header.size)
+            except Exception:
+                pass
+
+        flags = ImageProcessor.REDUCED_GRAYSCALE_FLAGS if grayscale else ImageProcessor.REDUCED_COLOR_FLAGS
+        image = cv2.imread(image_path, flags[factor])
         if image is None:
             raise ValueError(f"No se pudo cargar la imagen: {image_path}")
         return image
 
-    def preprocess_image(self, image: np.ndarray) -> np.ndarray:
-        """
-        Preprocesa la imagen para mejorar el OCR.
-        """
-        # Verificar si la imagen ya está en escala de grises
+    @staticmethod
+    def to_grayscale(image: np.ndarray) -> np.ndarray:
+        """Convierte la imagen a escala de grises si aún no lo está."""
         if len(image.shape) == 3:
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        else:
-            gray = image
-            
-        # Aplicar umbral adaptativo
-        binary = cv2.adaptiveThreshold(
+            return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        return image
+
+    @staticmethod
+    def adaptive_threshold(gray: np.ndarray) -> np.ndarray:
+        """Binariza la imagen con umbral adaptativo."""
+        return cv2.adaptiveThreshold(
             gray, 255,
             cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
             cv2.THRESH_BINARY,
             11, 2
         )
-        
-        # Reducir ruido
-        denoised = cv2.fastNlMeansDenoising(binary)
-        
-        # Mejorar contraste
+
+    @staticmethod
+    def denoise(image: np.ndarray) -> np.ndarray:
+        """Reduce el ruido con Non-Local Means."""
+        return cv2.fastNlMeansDenoising(image)
+
+    @staticmethod
+    def enhance_contrast(gray: np.ndarray) -> np.ndarray:
+        """Mejora el contraste con CLAHE."""
         clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8,8))
-        enhanced = clahe.apply(gray)
-        
-        return enhanced
+        return clahe.apply(gray)
+
+    def preprocess_image(self, image: np.ndarray, output: str = 'enhanced') -> np.ndarray:
+        """
+        Preprocesa la imagen para mejorar el OCR.
+
+        Solo se ejecutan las etapas que necesita `output`; por defecto el
+        resultado es la imagen con contraste mejorado, de modo que el umbral
+        adaptativo y la reducción de ruido no se calculan.
+
+        Args:
+            image (np.ndarray): Imagen ya redimensionada y enderezada
+            output (str): Etapa a devolver ('gray', 'binary', 'denoised' o 'enhanced')
+
+        Returns:
+            np.ndarray: Imagen preprocesada
+        """
+        return self.run_stages({'deskewed': image}, output)
 
     def resize_image(self, image: np.ndarray) -> np.ndarray:
         """
@@ -85,68 +213,230 @@ class ImageProcessor:
                 
         return cv2.resize(image, (new_width, new_height), interpolation=cv2.INTER_AREA)
 
-    def deskew(self, image: np.ndarray) -> np.ndarray:
+    @staticmethod
+    def _projection_scores(xs: np.ndarray, ys: np.ndarray, angles: np.ndarray) -> np.ndarray:
+        """
+        Calcula la nitidez del perfil de proyección horizontal para cada ángulo.
+
+        Args:
+            xs (np.ndarray): Coordenadas x (centradas) de los píxeles de texto
+            ys (np.ndarray): Coordenadas y de los píxeles de texto
+            angles (np.ndarray): Ángulos candidatos en grados
+
+        Returns:
+            np.ndarray: Suma de cuadrados del histograma de filas por ángulo
+        """
+        radians = np.radians(angles)
+        rows = ys[None, :] * np.cos(radians)[:, None] - xs[None, :] * np.sin(radians)[:, None]
+        rows = np.rint(rows - rows.min(axis=1, keepdims=True)).astype(np.int64)
+
+        scores = np.empty(len(angles))
+        for i, projection in enumerate(rows):
+            counts = np.bincount(projection)
+            scores[i] = np.dot(counts, counts)
+        return scores
+
+    @staticmethod
+    def estimate_skew(image: np.ndarray) -> float:
+        """
+        Estima el ángulo de inclinación sobre una copia reducida de la imagen.
+
+        Busca, por perfiles de proyección, el ángulo que alinea las líneas de
+        texto con las filas: primero en pasos de 1° y luego de 0.1°.
+
+        Args:
+            image (np.ndarray): Imagen original
+
+        Returns:
+            float: Ángulo en grados (0.0 si no hay texto)
+        """
+        height, width = image.shape[:2]
+        scale = DESKEW_ANALYSIS_SIZE / max(height, width)
+        if scale < 1:
+            small = cv2.resize(image, (max(1, int(width * scale)), max(1, int(height * scale))),
+                               interpolation=cv2.INTER_AREA)
+        else:
+            small = image
+        small = ImageProcessor.to_grayscale(small)
+
+        # Píxeles de texto (oscuros) de la copia reducida
+        _, binary = cv2.threshold(small, 0, 255, cv2.THRESH_BINARY_INV | cv2.THRESH_OTSU)
+        ys, xs = np.nonzero(binary)
+        if len(xs) == 0:
+            return 0.0
+        step = len(xs) // DESKEW_MAX_POINTS + 1
+        xs = xs[::step].astype(np.float32) - small.shape[1] / 2
+        ys = ys[::step].astype(np.float32)
+
+        coarse = np.arange(-DESKEW_MAX_ANGLE, DESKEW_MAX_ANGLE + 0.5, 1.0)
+        best = coarse[np.argmax(ImageProcessor._projection_scores(xs, ys, coarse))]
+        fine = np.arange(best - 1.0, best + 1.05, 0.1)
+        return float(fine[np.argmax(ImageProcessor._projection_scores(xs, ys, fine))])
+
+    def deskew(self, image: np.ndarray, angle_tolerance: float = DESKEW_ANGLE_TOLERANCE) -> np.ndarray:
         """
         Corrige la inclinación de la imagen.
+
+        El ángulo se estima a baja resolución y la imagen completa se rota
+        una sola vez, solo si el ángulo supera la tolerancia.
         
         Args:
             image (np.ndarray): Imagen original
+            angle_tolerance (float): Ángulo mínimo en grados para rotar
             
         Returns:
             np.ndarray: Imagen corregida
         """
-        # Detectar bordes
-        edges = cv2.Canny(image, 50, 150, apertureSize=3)
-        
-        # Detectar líneas
-        lines = cv2.HoughLines(edges, 1, np.pi/180, 100)
-        
-        if lines is not None:
-            # Calcular ángulo promedio
-            angles = []
-            for rho, theta in lines[0]:
-                angle = np.degrees(theta)
-                if angle < 45:
-                    angles.append(angle)
-                elif angle > 135:
-                    angles.append(angle - 180)
-                    
-            if angles:
-                median_angle = np.median(angles)
-                
-                # Rotar imagen
-                (h, w) = image.shape[:2]
-                center = (w // 2, h // 2)
-                M = cv2.getRotationMatrix2D(center, median_angle, 1.0)
-                rotated = cv2.warpAffine(
-                    image, M, (w, h),
-                    flags=cv2.INTER_CUBIC,
-                    borderMode=cv2.BORDER_REPLICATE
-                )
-                return rotated
-                
-        return image
+        angle = self.estimate_skew(image)
+        if abs(angle) < angle_tolerance:
+            return image
+
+        # Rotar imagen
+        (h, w) = image.shape[:2]
+        center = (w // 2, h // 2)
+        M = cv2.getRotationMatrix2D(center, angle, 1.0)
+        return cv2.warpAffine(
+            image, M, (w, h),
+            flags=cv2.INTER_CUBIC,
+            borderMode=cv2.BORDER_REPLICATE
+        )
 
-    def process(self, image: np.ndarray) -> np.ndarray:
+    def process(self, image: np.ndarray, output: str = 'enhanced') -> np.ndarray:
         """
         Procesa una imagen completa.
+
+        Args:
+            image (np.ndarray): Imagen o ruta de la imagen
+            output (str): Etapa del grafo cuya salida se devuelve
+
+        Returns:
+            np.ndarray: Imagen procesada
         """
         try:
-            # Si la imagen es una ruta, cargarla
+            # Si la imagen es una ruta, cargarla reducida (resize_image la llevará
+            # a su tamaño final) y en grises si no se necesita color
             if isinstance(image, str):
-                image = self.load_image(image)
-            
-            # Redimensionar si es necesario
-            image = self.resize_image(image)
-            
-            # Corregir inclinación
-            image = self.deskew(image)
-            
-            # Preprocesar
-            processed = self.preprocess_image(image)
-            
-            return processed
+                image = self.load_image(image, grayscale=output not in self.COLOR_STAGES, reduced=True)
+
+            if image is None:
+                raise ValueError("La imagen no puede ser None")
+
+            # Redimensionar, enderezar y preprocesar solo lo necesario
+            return self.run_stages({'input': image}, output)
             
         except Exception as e:
             logging.error(f"Error procesando imagen {image}: {str(e)}")
             raise
+
+    @classmethod
+    def _get_pool(cls, workers: int) -> ProcessPoolExecutor:
+        """
+        Devuelve el pool de procesos compartido, creándolo solo si no existe,
+        si cambia el número de procesos o si está roto (un proceso terminó de
+        forma anómala, p. ej. por falta de memoria).
+
+        Args:
+            workers (int): Número de procesos
+
+        Returns:
+            ProcessPoolExecutor: Pool reutilizable
+        """
+        if cls._pool is None or cls._pool_workers != workers or getattr(cls._pool, '_broken', False):
+            cls.shutdown_pool()
+            cls._pool = ProcessPoolExecutor(max_workers=workers)
+            cls._pool_workers = workers
+        return cls._pool
+
+    @classmethod
+    def shutdown_pool(cls):
+        """Cierra el pool de procesos compartido si está activo."""
+        if cls._pool is not None:
+            cls._pool.shutdown(wait=True)
+            cls._pool = None
+            cls._pool_workers = None
+
+    def process_batch(self, images: Iterable[Union[str, np.ndarray]],
+                      workers: int = PREPROCESSING_WORKERS,
+                      output: str = 'enhanced',
+                      ordered: bool = True) -> Iterator[Dict[str, Any]]:
+        """
+        Procesa un lote de imágenes en paralelo con un pool de procesos.
+
+        Los errores de cada imagen se reportan en su resultado sin detener el
+        lote. Si un proceso muere, las imágenes en vuelo se reportan con error
+        y el resto del lote sigue en un pool nuevo.
+
+        Se mantienen como máximo 2 * workers imágenes en vuelo, por lo que la
+        memoria no crece con el tamaño del lote.
+
+        Args:
+            images (Iterable[Union[str, np.ndarray]]): Rutas o imágenes
+            workers (int): Número de procesos
+            output (str): Etapa del grafo cuya salida se devuelve
+            ordered (bool): True para entregar en el orden de entrada,
+                False para entregar según se completan
+
+        Yields:
+            Dict[str, Any]: {'index', 'source', 'image', 'error'} por imagen
+        """
+        pool = self._get_pool(workers)
+
+        def submit(index, image):
+            nonlocal pool
+            try:
+                return pool.submit(_process_in_worker, index, image, output)
+            except BrokenProcessPool:
+                pool = self._get_pool(workers)
+                return pool.submit(_process_in_worker, index, image, output)
+
+        window = 2 * workers
+        pending = deque()
+        sources = {}
+
+        def collect(index, future) -> Dict[str, Any]:
+            source = sources.pop(index)
+            try:
+                result = future.result()
+            except Exception as e:  # El proceso terminó de forma anómala
+                result = {'index': index, 'image': None, 'error': str(e)}
+            result['source'] = source
+            return result
+
+        items = enumerate(images)
+        exhausted = False
+        while True:
+            while not exhausted and len(pending) < window:
+                try:
+                    index, image = next(items)
+                except StopIteration:
+                    exhausted = True
+                    break
+                sources[index] = image if isinstance(image, str) else None
+                pending.append((index, submit(index, image)))
+
+            if not pending:
+                break
+
+            if ordered:
+                index, future = pending.popleft()
+                yield collect(index, future)
+            else:
+                done, _ = wait([future for _, future in pending], return_when=FIRST_COMPLETED)
+                for item in [item for item in pending if item[1] in done]:
+                    pending.remove(item)
+                    yield collect(*item)
+
+
+# Instancia por proceso usada por los workers de process_batch
+_worker_processor: Optional[ImageProcessor] = None
+
+
+def _process_in_worker(index: int, image: Union[str, np.ndarray], output: str) -> Dict[str, Any]:
+    """Procesa una imagen dentro de un worker y captura sus errores."""
+    global _worker_processor
+    if _worker_processor is None:
+        _worker_processor = ImageProcessor()
+    try:
+        return {'index': index, 'image': _worker_processor.process(image, output), 'error': None}
+    except Exception as e:
+        return {'index': index, 'image': None, 'error': str(e)}
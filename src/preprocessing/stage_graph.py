@@ -0,0 +1,99 @@
+# src/preprocessing/stage_graph.py
+import time
+from typing import Any, Callable, Dict, Iterable, Optional, Sequence, Tuple
+
+
+class Stage:
+    """Etapa individual del grafo de preprocesamiento."""
+
+    def __init__(self, name: str, func: Optional[Callable[..., Any]], inputs: Sequence[str] = ()):
+        """
+        Args:
+            name (str): Nombre de la etapa
+            func (Callable): Función que produce la salida de la etapa (None para entradas)
+            inputs (Sequence[str]): Etapas cuyas salidas recibe la función, en orden
+        """
+        self.name = name
+        self.func = func
+        self.inputs = tuple(inputs)
+
+    @property
+    def is_input(self) -> bool:
+        """Indica si la etapa es una entrada del grafo."""
+        return self.func is None
+
+
+class StageGraph:
+    """
+    Grafo declarativo de etapas evaluado de forma perezosa.
+
+    Una etapa solo se ejecuta si quien llama pide su salida o si la necesita
+    otra etapa que se va a ejecutar. Cada ejecución mide el tiempo por etapa.
+    """
+
+    def __init__(self):
+        """Inicializa un grafo vacío."""
+        self.stages: Dict[str, Stage] = {}
+
+    def add_input(self, name: str) -> None:
+        """
+        Declara una entrada del grafo.
+
+        Args:
+            name (str): Nombre de la entrada
+        """
+        self._register(Stage(name, None))
+
+    def add_stage(self, name: str, func: Callable[..., Any], inputs: Sequence[str]) -> None:
+        """
+        Declara una etapa. Sus dependencias deben estar declaradas previamente,
+        por lo que el grafo nunca contiene ciclos.
+
+        Args:
+            name (str): Nombre de la etapa
+            func (Callable): Función que recibe las salidas de `inputs`
+            inputs (Sequence[str]): Etapas de las que depende
+        """
+        for dependency in inputs:
+            if dependency not in self.stages:
+                raise ValueError(f"Etapa '{name}' depende de una etapa no declarada: {dependency}")
+        self._register(Stage(name, func, inputs))
+
+    def _register(self, stage: Stage) -> None:
+        if stage.name in self.stages:
+            raise ValueError(f"Etapa duplicada: {stage.name}")
+        self.stages[stage.name] = stage
+
+    def run(self, values: Dict[str, Any], outputs: Iterable[str]) -> Tuple[Dict[str, Any], Dict[str, float]]:
+        """
+        Evalúa solo las etapas necesarias para producir `outputs`.
+
+        Args:
+            values (Dict[str, Any]): Valores conocidos; puede incluir salidas de
+                etapas intermedias, en cuyo caso no se recalculan ni sus ancestros
+            outputs (Iterable[str]): Etapas cuyas salidas se solicitan
+
+        Returns:
+            Tuple[Dict[str, Any], Dict[str, float]]: Salidas solicitadas y
+            tiempo en segundos de cada etapa ejecutada
+        """
+        available = dict(values)
+        timings: Dict[str, float] = {}
+
+        def resolve(name: str) -> Any:
+            if name in available:
+                return available[name]
+            stage = self.stages.get(name)
+            if stage is None:
+                raise KeyError(f"Etapa desconocida: {name}")
+            if stage.is_input:
+                raise ValueError(f"Falta la entrada requerida: {name}")
+
+            args = [resolve(dependency) for dependency in stage.inputs]
+            start = time.perf_counter()
+            available[name] = stage.func(*args)
+            timings[name] = time.perf_counter() - start
+            return available[name]
+
+        results = {name: resolve(name) for name in outputs}
+        return results, timings
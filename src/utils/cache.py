@@ -0,0 +1,338 @@
+# src/utils/cache.py
+import os
+import json
+import pickle
+import hashlib
+import logging
+import time
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Union
+
+import numpy as np
+
+from config.settings import (
+    CACHE_DIR,
+    CACHE_MAX_SIZE,
+    CACHE_RESCAN_FRACTION,
+    CACHE_TOUCH_INTERVAL,
+    IMAGE_MIN_SIZE,
+    IMAGE_MAX_SIZE,
+    DESKEW_ANALYSIS_SIZE,
+    DESKEW_ANGLE_TOLERANCE,
+    DESKEW_MAX_ANGLE,
+    DESKEW_MAX_POINTS,
+    OCR_LANGUAGES,
+    OCR_QUANTIZE,
+    OCR_BACKEND,
+    CONFIDENCE_THRESHOLD,
+    PATTERNS,
+    DOCUMENT_TYPES
+)
+
+
+class ResultCache:
+    """
+    Caché persistente y acotada de resultados del pipeline OCR.
+
+    Las entradas se direccionan por el hash del contenido de la imagen y se
+    guardan en tres niveles independientes: imagen preprocesada, bloques
+    crudos de readtext y campos extraídos. La clave de cada nivel incluye
+    solo las configuraciones de las que depende: el OCR se calcula sobre la
+    imagen recibida, así que cambiar el preprocesamiento no lo invalida, y
+    cambiar solo las reglas de extracción invalida solo el nivel de campos.
+
+    Varios procesos pueden compartir el directorio: cada uno vuelve a medir
+    el nivel en disco al superar su tamaño máximo o tras escribir
+    CACHE_RESCAN_FRACTION de él, y desaloja según la fecha de último acceso
+    de los archivos, de modo que el límite se aplica al directorio y no a
+    cada proceso. La fecha de acceso en disco se actualiza como mucho una vez
+    cada CACHE_TOUCH_INTERVAL segundos por entrada.
+    """
+
+    LEVELS = ('preprocessed', 'ocr', 'fields')
+
+    # Configuraciones que afectan a cada nivel
+    LEVEL_SETTINGS = {
+        'preprocessed': {
+            'IMAGE_MIN_SIZE': IMAGE_MIN_SIZE,
+            'IMAGE_MAX_SIZE': IMAGE_MAX_SIZE,
+            'DESKEW_ANALYSIS_SIZE': DESKEW_ANALYSIS_SIZE,
+            'DESKEW_ANGLE_TOLERANCE': DESKEW_ANGLE_TOLERANCE,
+            'DESKEW_MAX_ANGLE': DESKEW_MAX_ANGLE,
+            'DESKEW_MAX_POINTS': DESKEW_MAX_POINTS,
+        },
+        'ocr': {
+            'OCR_LANGUAGES': OCR_LANGUAGES,
+            'OCR_BACKEND': OCR_BACKEND,
+            # El reconocedor cuantizado solo se usa con el backend torch (ver ReaderRegistry)
+            'OCR_QUANTIZE': bool(OCR_QUANTIZE) and OCR_BACKEND == 'torch',
+        },
+        'fields': {
+            'CONFIDENCE_THRESHOLD': CONFIDENCE_THRESHOLD,
+            'PATTERNS': PATTERNS,
+            'DOCUMENT_TYPES': DOCUMENT_TYPES,
+        },
+    }
+
+    # Niveles cuyos resultados se calculan a partir de otro nivel y heredan sus configuraciones
+    LEVEL_INPUTS = {
+        'fields': 'ocr',
+    }
+
+    def __init__(self, cache_dir: str = CACHE_DIR, max_size: Optional[Dict[str, int]] = None):
+        """
+        Inicializa la caché.
+
+        Args:
+            cache_dir (str): Directorio raíz de la caché
+            max_size (Dict[str, int]): Tamaño máximo en bytes por nivel
+        """
+        self.cache_dir = cache_dir
+        self.max_size = dict(CACHE_MAX_SIZE if max_size is None else max_size)
+        self._lock = threading.Lock()
+        self._entries: Dict[str, OrderedDict] = {}
+        self._sizes = {level: 0 for level in self.LEVELS}
+        # Bytes escritos por este proceso desde la última medición del directorio
+        self._written = {level: 0 for level in self.LEVELS}
+        # Último acceso de las entradas leídas por este proceso (aún no reflejado en disco)
+        self._accessed: Dict[str, Dict[str, float]] = {level: {} for level in self.LEVELS}
+        self._stats = {level: {'hits': 0, 'misses': 0, 'evictions': 0} for level in self.LEVELS}
+        self._fingerprints = self._build_fingerprints()
+
+    @staticmethod
+    def fingerprint(value: Any) -> str:
+        """
+        Calcula un hash estable de un valor serializable a JSON.
+
+        Args:
+            value (Any): Valor a resumir
+
+        Returns:
+            str: Hash SHA-256 en hexadecimal
+        """
+        payload = json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def content_hash(data: Union[bytes, str, np.ndarray]) -> str:
+        """
+        Calcula el hash del contenido de una imagen.
+
+        Args:
+            data (Union[bytes, str, np.ndarray]): Bytes, ruta o imagen decodificada
+
+        Returns:
+            str: Hash SHA-256 en hexadecimal
+        """
+        digest = hashlib.sha256()
+        if isinstance(data, np.ndarray):
+            digest.update(f"{data.shape}{data.dtype}".encode('utf-8'))
+            digest.update(np.ascontiguousarray(data).tobytes())
+        elif isinstance(data, str):
+            with open(data, 'rb') as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                    digest.update(chunk)
+        else:
+            digest.update(bytes(data))
+        return digest.hexdigest()
+
+    @classmethod
+    def level_settings(cls, level: str) -> Dict[str, Any]:
+        """
+        Configuraciones de las que depende un nivel, incluidas las de los
+        niveles de los que se calcula.
+
+        Args:
+            level (str): Nivel de caché
+
+        Returns:
+            Dict[str, Any]: Configuraciones por nombre
+        """
+        if level not in cls.LEVELS:
+            raise ValueError(f"Nivel de caché no válido: {level}")
+        settings = {}
+        if level in cls.LEVEL_INPUTS:
+            settings.update(cls.level_settings(cls.LEVEL_INPUTS[level]))
+        settings.update(cls.LEVEL_SETTINGS[level])
+        return settings
+
+    def _build_fingerprints(self) -> Dict[str, str]:
+        """Calcula la huella de configuraciones de cada nivel."""
+        return {level: self.fingerprint(self.level_settings(level)) for level in self.LEVELS}
+
+    def _key(self, level: str, content_hash: str, variant: str) -> str:
+        if level not in self.LEVELS:
+            raise ValueError(f"Nivel de caché no válido: {level}")
+        raw = f"{content_hash}|{level}|{self._fingerprints[level]}|{variant}"
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def _path(self, level: str, key: str) -> str:
+        return os.path.join(self.cache_dir, level, key[:2], f"{key}.pkl")
+
+    def _scan(self, level: str) -> OrderedDict:
+        """
+        Lee del disco el índice LRU de un nivel, incluidas las entradas de otros
+        procesos, ordenado por fecha de último acceso (la del archivo o, si es
+        más reciente, la registrada por este proceso).
+        """
+        accessed = self._accessed[level]
+        found = []
+        level_dir = os.path.join(self.cache_dir, level)
+        if os.path.isdir(level_dir):
+            for shard in os.scandir(level_dir):
+                if not shard.is_dir():
+                    continue
+                for entry in os.scandir(shard.path):
+                    if entry.name.endswith('.pkl'):
+                        try:
+                            stat = entry.stat()
+                        except FileNotFoundError:  # Desalojada por otro proceso
+                            continue
+                        key = entry.name[:-4]
+                        found.append((max(stat.st_mtime, accessed.get(key, 0.0)), key, stat.st_size))
+        entries = OrderedDict((key, size) for _, key, size in sorted(found))
+        self._entries[level] = entries
+        self._sizes[level] = sum(entries.values())
+        self._written[level] = 0
+        self._accessed[level] = {key: when for key, when in accessed.items() if key in entries}
+        return entries
+
+    def _level_entries(self, level: str) -> OrderedDict:
+        """Devuelve el índice LRU de un nivel, cargándolo del disco la primera vez."""
+        entries = self._entries.get(level)
+        if entries is None:
+            entries = self._scan(level)
+        return entries
+
+    def get(self, level: str, content_hash: str, variant: str = '') -> Optional[Any]:
+        """
+        Obtiene un valor de la caché.
+
+        Args:
+            level (str): Nivel ('preprocessed', 'ocr' o 'fields')
+            content_hash (str): Hash del contenido de la imagen
+            variant (str): Identificador del cálculo o reglas propias de quien llama
+
+        Returns:
+            Optional[Any]: Valor guardado o None si no existe
+        """
+        key = self._key(level, content_hash, variant)
+        path = self._path(level, key)
+        with self._lock:
+            entries = self._level_entries(level)
+            try:
+                with open(path, 'rb') as f:
+                    stat = os.fstat(f.fileno())
+                    value = pickle.load(f)
+                now = time.time()
+                if now - stat.st_mtime > CACHE_TOUCH_INTERVAL:
+                    os.utime(path)
+                self._accessed[level][key] = now
+            except FileNotFoundError:
+                self._forget(level, key)
+                self._stats[level]['misses'] += 1
+                return None
+            except Exception as e:
+                logging.warning(f"Entrada de caché corrupta descartada ({level}): {str(e)}")
+                self._remove(level, key)
+                self._stats[level]['misses'] += 1
+                return None
+
+            if key not in entries:
+                entries[key] = stat.st_size
+                self._sizes[level] += entries[key]
+            entries.move_to_end(key)
+            self._stats[level]['hits'] += 1
+            return value
+
+    def put(self, level: str, content_hash: str, value: Any, variant: str = '') -> None:
+        """
+        Guarda un valor en la caché, desalojando las entradas menos usadas
+        si el nivel supera su tamaño máximo.
+
+        Args:
+            level (str): Nivel ('preprocessed', 'ocr' o 'fields')
+            content_hash (str): Hash del contenido de la imagen
+            value (Any): Valor a guardar
+            variant (str): Identificador del cálculo o reglas propias de quien llama
+        """
+        key = self._key(level, content_hash, variant)
+        path = self._path(level, key)
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+        with self._lock:
+            entries = self._level_entries(level)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+            except Exception:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+
+            self._forget(level, key)
+            entries[key] = len(data)
+            self._sizes[level] += len(data)
+            self._written[level] += len(data)
+
+            limit = self.max_size.get(level)
+            if limit is not None and (
+                self._sizes[level] > limit or self._written[level] > limit * CACHE_RESCAN_FRACTION
+            ):
+                self._scan(level)
+                self._evict(level)
+
+    def _forget(self, level: str, key: str) -> None:
+        """Elimina una clave del índice en memoria."""
+        self._accessed[level].pop(key, None)
+        size = self._entries.get(level, {}).pop(key, None)
+        if size is not None:
+            self._sizes[level] -= size
+
+    def _remove(self, level: str, key: str) -> None:
+        """Elimina una entrada del índice y del disco."""
+        self._forget(level, key)
+        try:
+            os.remove(self._path(level, key))
+        except FileNotFoundError:
+            pass
+
+    def _evict(self, level: str) -> None:
+        """Desaloja entradas LRU hasta respetar el tamaño máximo del nivel."""
+        entries = self._entries[level]
+        limit = self.max_size.get(level)
+        while limit is not None and self._sizes[level] > limit and len(entries) > 1:
+            oldest = next(iter(entries))
+            self._remove(level, oldest)
+            self._stats[level]['evictions'] += 1
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        Obtiene las estadísticas de uso de la caché.
+
+        Returns:
+            Dict[str, Dict[str, int]]: Aciertos, fallos, desalojos, entradas y bytes por nivel
+        """
+        with self._lock:
+            result = {}
+            for level in self.LEVELS:
+                entries = self._level_entries(level)
+                result[level] = dict(self._stats[level], entries=len(entries), bytes=self._sizes[level])
+            return result
+
+    def clear(self, level: Optional[str] = None) -> None:
+        """
+        Vacía la caché completa o un nivel.
+
+        Args:
+            level (str): Nivel a vaciar (None para todos)
+        """
+        with self._lock:
+            for current in ([level] if level else self.LEVELS):
+                for key in list(self._level_entries(current)):
+                    self._remove(current, key)
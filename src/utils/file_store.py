@@ -0,0 +1,166 @@
+# src/utils/file_store.py
+import os
+import re
+import json
+import hashlib
+import logging
+import tempfile
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from config.settings import RAW_DATA_DIR, RAW_STORE_INDEX_FILE
+
+# Extensiones que se conservan en el nombre del archivo guardado
+_EXTENSION = re.compile(r'^\.[a-z0-9]{1,10}$')
+
+# Permisos de un archivo creado con open() según la umask del proceso
+# (mkstemp crea los temporales con 0600). La umask solo se puede leer
+# cambiándola, así que se lee una vez al importar y no en cada escritura.
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+_FILE_MODE = 0o666 & ~_UMASK
+
+
+class RawFileStore:
+    """
+    Almacén de archivos originales direccionado por contenido.
+
+    Cada archivo se guarda con el SHA-256 de su contenido como nombre, en
+    subdirectorios por prefijo del hash (ab/cd/abcd....png), de modo que
+    ningún directorio crece sin límite. Un contenido ya guardado no se
+    vuelve a escribir. Las escrituras son atómicas (archivo temporal y
+    renombrado) y un índice JSON Lines, de solo anexado, relaciona cada
+    subida (nombre original y fecha) con su hash.
+    """
+
+    def __init__(self, root: str = RAW_DATA_DIR, index_file: Optional[str] = None):
+        """
+        Args:
+            root (str): Directorio raíz del almacén
+            index_file (str): Índice de subidas (por defecto RAW_STORE_INDEX_FILE
+                si root es RAW_DATA_DIR, o index.jsonl dentro de root)
+        """
+        self.root = root
+        if index_file is None:
+            index_file = RAW_STORE_INDEX_FILE if root == RAW_DATA_DIR else os.path.join(root, 'index.jsonl')
+        self.index_file = index_file
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def content_hash(data: bytes) -> str:
+        """Hash SHA-256 en hexadecimal del contenido."""
+        return hashlib.sha256(data).hexdigest()
+
+    @staticmethod
+    def _extension(filename: str) -> str:
+        extension = os.path.splitext(filename)[1].lower()
+        return extension if _EXTENSION.match(extension) else ''
+
+    def _shard(self, content_hash: str) -> str:
+        return os.path.join(self.root, content_hash[:2], content_hash[2:4])
+
+    def find(self, content_hash: str) -> Optional[str]:
+        """
+        Busca el archivo guardado de un contenido.
+
+        Args:
+            content_hash (str): Hash SHA-256 del contenido
+
+        Returns:
+            Optional[str]: Ruta del archivo o None si no está guardado
+        """
+        shard = self._shard(content_hash)
+        try:
+            entries = os.scandir(shard)
+        except FileNotFoundError:
+            return None
+        with entries:
+            for entry in entries:
+                if entry.name.split('.', 1)[0] == content_hash:
+                    return entry.path
+        return None
+
+    def put(self, data: bytes, filename: str) -> Tuple[str, bool]:
+        """
+        Guarda un archivo, salvo que su contenido ya esté en el almacén, y
+        registra la subida en el índice.
+
+        Args:
+            data (bytes): Contenido del archivo
+            filename (str): Nombre original
+
+        Returns:
+            Tuple[str, bool]: Ruta del archivo guardado y si se escribió ahora
+            (False si el contenido ya existía)
+        """
+        content_hash = self.content_hash(data)
+        path = self.find(content_hash)
+        created = path is None
+        if created:
+            shard = self._shard(content_hash)
+            os.makedirs(shard, exist_ok=True)
+            path = os.path.join(shard, content_hash + self._extension(filename))
+            fd, tmp_path = tempfile.mkstemp(dir=shard, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(data)
+                os.chmod(tmp_path, _FILE_MODE)
+                os.replace(tmp_path, path)
+            except Exception:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+
+        self._append_index({
+            'sha256': content_hash,
+            'filename': os.path.basename(filename),
+            'uploaded_at': datetime.now().isoformat(timespec='microseconds'),
+            'size': len(data),
+            'path': os.path.relpath(path, self.root),
+        })
+        return path, created
+
+    def _append_index(self, entry: Dict[str, Any]) -> None:
+        """Añade una línea al índice (una sola escritura en modo anexado)."""
+        line = json.dumps(entry, ensure_ascii=False) + '\n'
+        with self._lock:
+            os.makedirs(os.path.dirname(self.index_file) or '.', exist_ok=True)
+            with open(self.index_file, 'a', encoding='utf-8') as f:
+                f.write(line)
+
+    def entries(self) -> List[Dict[str, Any]]:
+        """
+        Lee el índice de subidas.
+
+        Returns:
+            List[Dict[str, Any]]: Subidas {'sha256', 'filename', 'uploaded_at',
+            'size', 'path'} en orden de subida
+        """
+        entries = []
+        try:
+            with open(self.index_file, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entries.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        logging.warning(f"Línea del índice de archivos descartada: {line[:80]!r}")
+        except FileNotFoundError:
+            pass
+        return entries
+
+    def lookup(self, filename: str) -> Optional[str]:
+        """
+        Ruta del archivo de la última subida con un nombre original.
+
+        Args:
+            filename (str): Nombre original
+
+        Returns:
+            Optional[str]: Ruta del archivo o None si no se subió con ese nombre
+        """
+        name = os.path.basename(filename)
+        for entry in reversed(self.entries()):
+            if entry['filename'] == name:
+                return os.path.join(self.root, entry['path'])
+        return None
@@ -1,41 +1,86 @@
 # src/utils/helpers.py
 import os
+import io
+import re
 import logging
+from abc import ABC, abstractmethod
 from datetime import datetime
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Iterable, Optional, Sequence
 import json
 import csv
 from pathlib import Path
+import pandas as pd
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from src.validation.data_cleaner import DataCleaner
+from src.validation.date_parser import DateParser
+from .file_store import RawFileStore
 from config.settings import (
     PROCESSED_DATA_DIR,
     RAW_DATA_DIR,
     ALLOWED_EXTENSIONS,
-    ERROR_MESSAGES
+    ERROR_MESSAGES,
+    DOCUMENT_TYPES,
+    EXPORT_ROTATE_BYTES,
+    EXPORT_ROTATE_RECORDS,
+    EXPORT_BUFFER_SIZE,
+    EXPORT_ROW_GROUP_SIZE
 )
 
+# Columnas de un resultado del pipeline, antes de las de sus campos
+RESULT_COLUMNS = ['document_type', 'is_valid', 'confidence']
+
+
+def default_result_schema() -> List[str]:
+    """Columnas estables de los resultados: las generales y todos los campos requeridos."""
+    fields = dict.fromkeys(
+        field for config in DOCUMENT_TYPES.values() for field in config['campos_requeridos']
+    )
+    return RESULT_COLUMNS + [field for field in fields if field not in RESULT_COLUMNS]
+
+
+def _import_pyarrow():
+    """Importa pyarrow solo cuando se usa la exportación en columnas."""
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError(
+            "La exportación a Parquet requiere pyarrow (pip install pyarrow)"
+        ) from e
+    return pyarrow, pyarrow.parquet
+
+
+def flatten_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Sube los campos de result['fields'] al primer nivel del registro."""
+    if not isinstance(result.get('fields'), dict):
+        return result
+    row = {key: value for key, value in result.items() if key != 'fields'}
+    row.update(result['fields'])
+    return row
+
 class FileHandler:
     """Clase para manejar operaciones con archivos."""
 
     @staticmethod
     def save_raw_file(file_data: bytes, filename: str) -> str:
         """
-        Guarda un archivo original en el directorio de datos crudos.
+        Guarda un archivo original en el almacén de datos crudos (RawFileStore).
         
         Args:
             file_data (bytes): Datos del archivo
             filename (str): Nombre del archivo
             
         Returns:
-            str: Ruta donde se guardó el archivo
+            str: Ruta donde se guardó el archivo (la del archivo ya existente
+            si el contenido estaba guardado)
         """
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        safe_filename = f"{timestamp}_{filename}"
-        output_path = os.path.join(RAW_DATA_DIR, safe_filename)
-        
         try:
-            with open(output_path, 'wb') as f:
-                f.write(file_data)
-            logging.info(f"Archivo original guardado en: {output_path}")
+            output_path, created = RawFileStore().put(file_data, filename)
+            if created:
+                logging.info(f"Archivo original guardado en: {output_path}")
+            else:
+                logging.info(f"Archivo original ya guardado en: {output_path}")
             return output_path
         except Exception as e:
             logging.error(f"Error guardando archivo original: {str(e)}")
@@ -47,12 +92,17 @@ class FileHandler:
         Obtiene la ruta completa de un archivo original.
         
         Args:
-            filename (str): Nombre del archivo
+            filename (str): Nombre original del archivo (o de un archivo guardado
+                directamente en el directorio de datos crudos)
             
         Returns:
-            str: Ruta completa del archivo
+            str: Ruta completa del archivo (la de su última subida si está en
+            el índice del almacén)
         """
-        return os.path.join(RAW_DATA_DIR, filename)
+        legacy_path = os.path.join(RAW_DATA_DIR, filename)
+        if os.path.exists(legacy_path):
+            return legacy_path
+        return RawFileStore().lookup(filename) or legacy_path
     
     @staticmethod
     def is_valid_extension(filename: str) -> bool:
@@ -79,11 +129,57 @@ class FileHandler:
             extension (str): Extensión del archivo
             
         Returns:
-            str: Nombre de archivo único
+            str: Nombre de archivo con marca de tiempo en microsegundos
         """
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
         return f"{base_name}_{suffix}_{timestamp}.{extension}"
 
+    @staticmethod
+    def open_output_file(directory: str, base_name: str, suffix: str, extension: str,
+                         mode: str = 'x', **kwargs):
+        """
+        Crea y abre un archivo de salida nuevo sin sobrescribir ninguno existente.
+
+        El archivo se crea en modo exclusivo; si otro proceso ya creó uno con
+        el mismo nombre, se añade un contador al nombre.
+
+        Args:
+            directory (str): Directorio de salida
+            base_name (str): Nombre base del archivo
+            suffix (str): Sufijo a añadir
+            extension (str): Extensión del archivo
+            mode (str): Modo de apertura exclusivo ('x' o 'xb')
+            **kwargs: Argumentos adicionales de open (encoding, newline, buffering)
+
+        Returns:
+            Tuple[str, IO]: Ruta y archivo abierto
+        """
+        filename = FileHandler.create_output_filename(base_name, suffix, extension)
+        return FileHandler.open_exclusive(os.path.join(directory, filename), mode, **kwargs)
+
+    @staticmethod
+    def open_exclusive(path: str, mode: str = 'x', **kwargs):
+        """
+        Abre un archivo nuevo en modo exclusivo, añadiendo un contador al
+        nombre si ya existe.
+
+        Args:
+            path (str): Ruta deseada
+            mode (str): Modo de apertura exclusivo ('x' o 'xb')
+            **kwargs: Argumentos adicionales de open
+
+        Returns:
+            Tuple[str, IO]: Ruta usada y archivo abierto
+        """
+        stem, extension = os.path.splitext(path)
+        for attempt in range(1000):
+            candidate = path if attempt == 0 else f"{stem}_{attempt}{extension}"
+            try:
+                return candidate, open(candidate, mode, **kwargs)
+            except FileExistsError:
+                continue
+        raise FileExistsError(f"No se pudo crear un archivo de salida único: {path}")
+
     @staticmethod
     def ensure_directory_exists(directory: str):
         """
@@ -94,13 +190,514 @@ class FileHandler:
         """
         Path(directory).mkdir(parents=True, exist_ok=True)
 
+class StreamWriter(ABC):
+    """
+    Escritor en streaming de resultados con rotación de archivos.
+
+    Escribe los registros uno a uno con un búfer de escritura, sin
+    acumularlos, de modo que la memoria no depende del tamaño del lote. Abre
+    un archivo nuevo (parte) al llegar al máximo de bytes o de registros;
+    todas las partes de un escritor comparten la marca de tiempo y el
+    esquema. Las subclases definen la extensión y la serialización.
+    """
+
+    extension = ''
+
+    def __init__(self, base_name: str, directory: str = PROCESSED_DATA_DIR,
+                 max_bytes: int = EXPORT_ROTATE_BYTES, max_records: int = EXPORT_ROTATE_RECORDS,
+                 buffer_size: int = EXPORT_BUFFER_SIZE):
+        """
+        Args:
+            base_name (str): Nombre base de los archivos
+            directory (str): Directorio de salida
+            max_bytes (int): Bytes máximos por archivo (0 sin límite)
+            max_records (int): Registros máximos por archivo (0 sin límite)
+            buffer_size (int): Tamaño del búfer de escritura
+        """
+        self.base_name = base_name
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_records = max_records
+        self.buffer_size = buffer_size
+        self.timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        self.paths: List[str] = []
+        self.records = 0
+        self._file = None
+        self._file_bytes = 0
+        self._file_records = 0
+
+    def _open_next(self) -> None:
+        """Cierra la parte actual y abre la siguiente."""
+        self._close_file()
+        FileHandler.ensure_directory_exists(self.directory)
+        filename = f"{self.base_name}_results_{self.timestamp}_part{len(self.paths) + 1:04d}.{self.extension}"
+        path, self._file = FileHandler.open_exclusive(
+            os.path.join(self.directory, filename), 'xb', buffering=self.buffer_size
+        )
+        self.paths.append(path)
+        self._file_bytes = self._file_records = 0
+        header = self._header()
+        if header:
+            self._file.write(header)
+            self._file_bytes += len(header)
+
+    def _header(self) -> bytes:
+        """Cabecera de cada parte (ninguna por defecto)."""
+        return b''
+
+    @abstractmethod
+    def _serialize(self, record: Dict[str, Any]) -> bytes:
+        """Bytes de un registro en el formato del escritor."""
+
+    def write(self, record: Dict[str, Any]) -> None:
+        """
+        Escribe un registro, rotando de archivo si la parte actual está llena.
+
+        Args:
+            record (Dict[str, Any]): Resultado a escribir
+        """
+        data = self._serialize(record)
+        if self._file is None or (
+            self._file_records and (
+                (self.max_records and self._file_records >= self.max_records)
+                or (self.max_bytes and self._file_bytes + len(data) > self.max_bytes)
+            )
+        ):
+            self._open_next()
+        self._file.write(data)
+        self._file_bytes += len(data)
+        self._file_records += 1
+        self.records += 1
+
+    def write_all(self, records: Iterable[Dict[str, Any]]) -> List[str]:
+        """
+        Escribe todos los registros de un iterable y cierra el escritor.
+
+        Args:
+            records (Iterable[Dict[str, Any]]): Resultados (se consumen de uno en uno)
+
+        Returns:
+            List[str]: Rutas de las partes escritas
+        """
+        with self:
+            for record in records:
+                self.write(record)
+        return self.paths
+
+    def _close_file(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def close(self) -> None:
+        """Vacía el búfer y cierra la parte actual."""
+        self._close_file()
+
+    def __enter__(self) -> 'StreamWriter':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class JSONLStreamWriter(StreamWriter):
+    """Escritor en streaming de JSON Lines: un resultado por línea."""
+
+    extension = 'jsonl'
+
+    def _serialize(self, record: Dict[str, Any]) -> bytes:
+        return (json.dumps(record, ensure_ascii=False, default=str) + '\n').encode('utf-8')
+
+
+class CSVStreamWriter(StreamWriter):
+    """
+    Escritor en streaming de CSV con esquema estable.
+
+    Las columnas se fijan al crear el escritor (por defecto las de
+    default_result_schema) y se repiten en la cabecera de cada parte; los
+    campos de result['fields'] se aplanan y las claves fuera del esquema se
+    descartan.
+    """
+
+    extension = 'csv'
+
+    def __init__(self, base_name: str, schema: Optional[Sequence[str]] = None, **kwargs):
+        """
+        Args:
+            base_name (str): Nombre base de los archivos
+            schema (Sequence[str]): Columnas del CSV
+            **kwargs: Argumentos de StreamWriter
+        """
+        super().__init__(base_name, **kwargs)
+        self.schema = list(schema) if schema is not None else default_result_schema()
+        self._buffer = io.StringIO()
+        self._writer = csv.DictWriter(self._buffer, fieldnames=self.schema, extrasaction='ignore')
+        self._dropped = set()
+
+    def _render(self, write) -> bytes:
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        write()
+        return self._buffer.getvalue().encode('utf-8')
+
+    def _header(self) -> bytes:
+        return self._render(self._writer.writeheader)
+
+    def _serialize(self, record: Dict[str, Any]) -> bytes:
+        row = flatten_result(record)
+        extra = row.keys() - self._dropped - set(self.schema)
+        if extra:
+            logging.warning(f"Columnas fuera del esquema CSV descartadas: {sorted(extra)}")
+            self._dropped.update(extra)
+        return self._render(lambda: self._writer.writerow(row))
+
+
+class ParquetStreamWriter:
+    """
+    Escritor en streaming de resultados a Parquet con columnas tipadas.
+
+    Acumula los resultados hasta completar un grupo de filas y lo escribe
+    entero, así que la memoria está acotada por el tamaño del grupo y no por
+    el del lote. Los tipos se fijan al crear el escritor: montos (columnas
+    con 'total') como float64, fechas (con 'fecha' o 'date') como date32,
+    el tipo de documento como diccionario, is_valid como booleano,
+    confidence como float64 y el resto como texto. Los valores se limpian
+    con DataCleaner.clean_frame; los que no se pueden convertir quedan nulos.
+    """
+
+    extension = 'parquet'
+
+    def __init__(self, base_name: str, schema: Optional[Sequence[str]] = None,
+                 directory: str = PROCESSED_DATA_DIR, row_group_size: int = EXPORT_ROW_GROUP_SIZE):
+        """
+        Args:
+            base_name (str): Nombre base del archivo
+            schema (Sequence[str]): Columnas (por defecto default_result_schema)
+            directory (str): Directorio de salida
+            row_group_size (int): Filas por grupo
+        """
+        self.pa, self.pq = _import_pyarrow()
+        self.columns = list(schema) if schema is not None else default_result_schema()
+        self.schema = self.pa.schema([(column, self.column_type(column)) for column in self.columns])
+        self.base_name = base_name
+        self.directory = directory
+        self.row_group_size = row_group_size
+        self.path: Optional[str] = None
+        self.records = 0
+        self._writer = None
+        self._sink = None
+        self._pending: List[Dict[str, Any]] = []
+
+    def column_type(self, column: str):
+        """Tipo de Arrow de una columna según su nombre."""
+        pa = self.pa
+        key = column.lower()
+        if key == 'document_type':
+            return pa.dictionary(pa.int32(), pa.string())
+        if key == 'is_valid':
+            return pa.bool_()
+        if key == 'confidence' or 'total' in key:
+            return pa.float64()
+        if 'fecha' in key or 'date' in key:
+            return pa.date32()
+        return pa.string()
+
+    def write(self, record: Dict[str, Any]) -> None:
+        """
+        Añade un resultado; escribe un grupo de filas al completarlo.
+
+        Args:
+            record (Dict[str, Any]): Resultado a escribir
+        """
+        self._pending.append(flatten_result(record))
+        self.records += 1
+        if len(self._pending) >= self.row_group_size:
+            self._flush()
+
+    def _open(self) -> None:
+        """Crea el archivo de salida y el escritor de Parquet."""
+        FileHandler.ensure_directory_exists(self.directory)
+        filename = FileHandler.create_output_filename(self.base_name, "results", self.extension)
+        self.path, self._sink = FileHandler.open_exclusive(os.path.join(self.directory, filename), 'xb')
+        self._writer = self.pq.ParquetWriter(self._sink, self.schema)
+
+    def _flush(self) -> None:
+        """Escribe los resultados pendientes como un grupo de filas."""
+        if not self._pending:
+            return
+        if self._writer is None:
+            self._open()
+        self._writer.write_table(self._to_table(self._pending), row_group_size=self.row_group_size)
+        self._pending = []
+
+    def _to_table(self, rows: List[Dict[str, Any]]):
+        """Convierte un grupo de resultados en una tabla tipada."""
+        pa = self.pa
+        frame = DataCleaner().clean_frame(pd.DataFrame.from_records(rows, columns=self.columns))
+        arrays = []
+        for field in self.schema:
+            values = frame[field.name].astype('object').where(frame[field.name].notna(), None)
+            if pa.types.is_dictionary(field.type):
+                arrays.append(pa.array(values, pa.string()).dictionary_encode())
+            elif pa.types.is_date32(field.type):
+                # clean_frame deja las fechas en YYYY-MM-DD
+                arrays.append(pa.array(values, pa.string()).cast(pa.date32()))
+            elif pa.types.is_string(field.type):
+                arrays.append(pa.array([None if v is None else str(v) for v in values], pa.string()))
+            else:
+                arrays.append(pa.array(values, field.type))
+        return pa.Table.from_arrays(arrays, schema=self.schema)
+
+    def write_all(self, records: Iterable[Dict[str, Any]]) -> str:
+        """
+        Escribe todos los resultados de un iterable y cierra el escritor.
+
+        Args:
+            records (Iterable[Dict[str, Any]]): Resultados (se consumen de uno en uno)
+
+        Returns:
+            str: Ruta del archivo escrito
+        """
+        with self:
+            for record in records:
+                self.write(record)
+        return self.path
+
+    def close(self) -> None:
+        """Escribe el último grupo y cierra el archivo (sin filas si no hubo resultados)."""
+        self._flush()
+        if self._writer is None and self.path is None:
+            self._open()
+        if self._writer is not None:
+            self._writer.close()
+            self._sink.close()
+            self._writer = self._sink = None
+
+    def __enter__(self) -> 'ParquetStreamWriter':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class ExcelStreamWriter:
+    """
+    Escritor en streaming de resultados a Excel (.xlsx), una hoja por tipo de documento.
+
+    Usa el libro de solo escritura de openpyxl, que vuelca cada fila a disco
+    al añadirla en lugar de mantener el libro en memoria. Los montos
+    (columnas con 'total') se escriben como números y las fechas (con
+    'fecha' o 'date') como fechas de Excel; los valores que no se pueden
+    convertir se conservan como texto. Si una hoja llega al límite de filas
+    de Excel, el tipo continúa en una hoja nueva.
+    """
+
+    extension = 'xlsx'
+    MAX_ROWS = 1048576  # Límite de filas por hoja de Excel
+    AMOUNT_FORMAT = '#,##0.00'
+    DATE_FORMAT = 'yyyy-mm-dd'
+
+    def __init__(self, base_name: str, schema: Optional[Sequence[str]] = None,
+                 directory: str = PROCESSED_DATA_DIR):
+        """
+        Args:
+            base_name (str): Nombre base del archivo
+            schema (Sequence[str]): Columnas de cada hoja (por defecto las de
+                default_result_schema, sin document_type, que da nombre a la hoja)
+            directory (str): Directorio de salida
+        """
+        columns = list(schema) if schema is not None else default_result_schema()
+        self.columns = [column for column in columns if column != 'document_type']
+        self.base_name = base_name
+        self.directory = directory
+        self.path: Optional[str] = None
+        self.records = 0
+        self.workbook = Workbook(write_only=True)
+        self._sheets: Dict[str, Any] = {}
+        self._rows: Dict[str, int] = {}
+        self._parts: Dict[str, int] = {}
+        self._date_parser = DateParser.for_formats()
+
+    def _sheet(self, document_type: str):
+        """Hoja activa de un tipo de documento, creándola con su cabecera si hace falta."""
+        sheet = self._sheets.get(document_type)
+        if sheet is None or self._rows[document_type] >= self.MAX_ROWS:
+            part = self._parts.get(document_type, 0) + 1
+            title = document_type if part == 1 else f"{document_type} ({part})"
+            # Los títulos de hoja admiten 31 caracteres y no admiten []:*?/\
+            title = re.sub(r'[\[\]:*?/\\]', '_', title)[:31]
+            sheet = self.workbook.create_sheet(title)
+            sheet.append(self.columns)
+            self._sheets[document_type] = sheet
+            self._rows[document_type] = 1
+            self._parts[document_type] = part
+        return sheet
+
+    def _cell(self, sheet, column: str, value: Any):
+        """Celda con el tipo y formato de la columna."""
+        if value is None or not isinstance(value, str):
+            return value
+        key = column.lower()
+        if 'total' in key:
+            try:
+                cell = WriteOnlyCell(sheet, DataCleaner.clean_amount(value))
+            except ValueError:
+                # Monto ilegible: se conserva el texto original
+                return value
+            cell.number_format = self.AMOUNT_FORMAT
+            return cell
+        if 'fecha' in key or 'date' in key:
+            parsed = self._date_parser.parse(value)
+            if parsed is None:
+                return value
+            cell = WriteOnlyCell(sheet, parsed)
+            cell.number_format = self.DATE_FORMAT
+            return cell
+        return value
+
+    def write(self, record: Dict[str, Any]) -> None:
+        """
+        Añade un resultado a la hoja de su tipo de documento.
+
+        Args:
+            record (Dict[str, Any]): Resultado a escribir
+        """
+        row = flatten_result(record)
+        document_type = str(row.get('document_type') or 'DESCONOCIDO')
+        sheet = self._sheet(document_type)
+        sheet.append([self._cell(sheet, column, row.get(column)) for column in self.columns])
+        self._rows[document_type] += 1
+        self.records += 1
+
+    def write_all(self, records: Iterable[Dict[str, Any]]) -> str:
+        """
+        Escribe todos los resultados de un iterable y guarda el libro.
+
+        Args:
+            records (Iterable[Dict[str, Any]]): Resultados (se consumen de uno en uno)
+
+        Returns:
+            str: Ruta del archivo escrito
+        """
+        with self:
+            for record in records:
+                self.write(record)
+        return self.path
+
+    def close(self) -> None:
+        """Guarda el libro (con una hoja vacía si no hubo resultados)."""
+        if self.path is not None:
+            return
+        if not self._sheets:
+            self.workbook.create_sheet('Resultados').append(self.columns)
+        FileHandler.ensure_directory_exists(self.directory)
+        filename = FileHandler.create_output_filename(self.base_name, "results", self.extension)
+        self.path, f = FileHandler.open_exclusive(os.path.join(self.directory, filename), 'xb')
+        with f:
+            self.workbook.save(f)
+
+    def __enter__(self) -> 'ExcelStreamWriter':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
 class ResultsExporter:
     """Clase para exportar resultados en diferentes formatos."""
+
+    # Escritores en streaming por formato
+    STREAM_WRITERS = {'jsonl': JSONLStreamWriter, 'csv': CSVStreamWriter}
     
     def __init__(self):
         """Inicializa el exportador de resultados."""
         self.file_handler = FileHandler()
 
+    def export_stream(self, results: Iterable[Dict[str, Any]], filename: str,
+                      export_format: str = 'jsonl', **kwargs) -> List[str]:
+        """
+        Exporta un iterador de resultados escribiéndolos de uno en uno.
+
+        La memoria usada es constante sea cual sea el número de resultados;
+        los archivos rotan por tamaño o número de registros.
+
+        Args:
+            results (Iterable[Dict[str, Any]]): Resultados (por ejemplo, un generador)
+            filename (str): Nombre base de los archivos
+            export_format (str): 'jsonl' o 'csv'
+            **kwargs: Argumentos del escritor (directory, max_bytes,
+                max_records, buffer_size; schema en CSV)
+
+        Returns:
+            List[str]: Rutas de los archivos generados
+        """
+        if export_format not in self.STREAM_WRITERS:
+            raise ValueError(f"Formato de exportación en streaming no soportado: {export_format}")
+        try:
+            return self.STREAM_WRITERS[export_format](filename, **kwargs).write_all(results)
+        except Exception as e:
+            logging.error(f"Error exportando a {export_format.upper()}: {str(e)}")
+            raise
+
+    def export_to_parquet(self, results: Iterable[Dict[str, Any]], filename: str, **kwargs) -> str:
+        """
+        Exporta un iterador de resultados a Parquet con columnas tipadas,
+        escribiéndolos por grupos de filas.
+
+        Args:
+            results (Iterable[Dict[str, Any]]): Resultados (por ejemplo, un generador)
+            filename (str): Nombre base del archivo
+            **kwargs: Argumentos de ParquetStreamWriter (schema, directory, row_group_size)
+
+        Returns:
+            str: Ruta del archivo generado
+        """
+        try:
+            return ParquetStreamWriter(filename, **kwargs).write_all(results)
+        except Exception as e:
+            logging.error(f"Error exportando a Parquet: {str(e)}")
+            raise
+
+    def export_to_excel(self, results: Iterable[Dict[str, Any]], filename: str, **kwargs) -> str:
+        """
+        Exporta un iterador de resultados a Excel, una hoja por tipo de documento.
+
+        Args:
+            results (Iterable[Dict[str, Any]]): Resultados (por ejemplo, un generador)
+            filename (str): Nombre base del archivo
+            **kwargs: Argumentos de ExcelStreamWriter (schema, directory)
+
+        Returns:
+            str: Ruta del archivo generado
+        """
+        try:
+            return ExcelStreamWriter(filename, **kwargs).write_all(results)
+        except Exception as e:
+            logging.error(f"Error exportando a Excel: {str(e)}")
+            raise
+
+    @staticmethod
+    def read_columnar(paths, columns: Optional[Sequence[str]] = None, filters=None):
+        """
+        Lee resultados exportados a Parquet leyendo solo lo necesario.
+
+        Las columnas no pedidas no se leen y los filtros se aplican con las
+        estadísticas de cada grupo de filas, saltando los grupos que no pueden
+        cumplirlos.
+
+        Args:
+            paths (str | List[str]): Archivo o archivos Parquet
+            columns (Sequence[str]): Columnas a leer (None para todas)
+            filters: Filtros de pyarrow, p. ej. [('document_type', '=', 'LUZ'),
+                ('total', '>', 10000)]
+
+        Returns:
+            pd.DataFrame: Resultados (document_type como categoría, fechas como date)
+        """
+        _, pq = _import_pyarrow()
+        table = pq.read_table(paths, columns=list(columns) if columns is not None else None, filters=filters)
+        return table.to_pandas()
+
     def export_to_json(self, data: Dict[str, Any], filename: str) -> str:
         """
         Exporta los resultados a un archivo JSON.
@@ -112,13 +709,11 @@ class ResultsExporter:
         Returns:
             str: Ruta del archivo generado
         """
-        output_path = os.path.join(
-            PROCESSED_DATA_DIR,
-            self.file_handler.create_output_filename(filename, "results", "json")
-        )
-        
         try:
-            with open(output_path, 'w', encoding='utf-8') as f:
+            output_path, f = self.file_handler.open_output_file(
+                PROCESSED_DATA_DIR, filename, "results", "json", encoding='utf-8'
+            )
+            with f:
                 json.dump(data, f, indent=4, ensure_ascii=False)
             return output_path
         except Exception as e:
@@ -136,18 +731,17 @@ class ResultsExporter:
         Returns:
             str: Ruta del archivo generado
         """
-        output_path = os.path.join(
-            PROCESSED_DATA_DIR,
-            self.file_handler.create_output_filename(filename, "results", "csv")
-        )
-        
         try:
             if not data:
                 raise ValueError("No hay datos para exportar")
                 
-            fieldnames = data[0].keys()
+            # Columnas de todas las filas, en orden de aparición
+            fieldnames = list(dict.fromkeys(key for row in data for key in row))
             
-            with open(output_path, 'w', newline='', encoding='utf-8') as f:
+            output_path, f = self.file_handler.open_output_file(
+                PROCESSED_DATA_DIR, filename, "results", "csv", newline='', encoding='utf-8'
+            )
+            with f:
                 writer = csv.DictWriter(f, fieldnames=fieldnames)
                 writer.writeheader()
                 writer.writerows(data)
@@ -2,8 +2,9 @@
 import re
 from typing import Dict, Any
 import logging
-from datetime import datetime
+import pandas as pd
 from config.settings import DATE_FORMATS
+from .date_parser import DateParser
 
 class DataCleaner:
     """Clase para limpiar y estandarizar los datos extraídos."""
@@ -41,13 +42,10 @@ class DataCleaner:
         Returns:
             str: Fecha en formato YYYY-MM-DD
         """
-        for date_format in DATE_FORMATS:
-            try:
-                date_obj = datetime.strptime(date_str, date_format)
-                return date_obj.strftime('%Y-%m-%d')
-            except ValueError:
-                continue
-        raise ValueError(f"Formato de fecha no reconocido: {date_str}")
+        iso_date = DateParser.for_formats(DATE_FORMATS).to_iso(date_str)
+        if iso_date is None:
+            raise ValueError(f"Formato de fecha no reconocido: {date_str}")
+        return iso_date
 
     @staticmethod
     def clean_matricula(matricula: str) -> str:
@@ -95,6 +93,48 @@ class DataCleaner:
             logging.error(f"Error al limpiar datos: {str(e)}")
             raise
 
+    def clean_frame(self, frame: pd.DataFrame) -> pd.DataFrame:
+        """
+        Limpia por columnas una tabla de registros extraídos.
+
+        Aplica las mismas reglas que clean_document_data, según el nombre de
+        cada columna, con operaciones vectorizadas de pandas. Los montos y
+        fechas que no se pueden convertir quedan como NaN/None en lugar de
+        lanzar una excepción (FieldValidator.validate_frame indica qué filas
+        son inválidas).
+
+        Args:
+            frame (pd.DataFrame): Una fila por documento, una columna por campo
+
+        Returns:
+            pd.DataFrame: Nueva tabla con montos float, fechas YYYY-MM-DD y
+            matrículas solo con dígitos
+        """
+        cleaned = frame.copy()
+        for column in frame.columns:
+            key = str(column).lower()
+            values = frame[column]
+
+            if 'total' in key:
+                if not pd.api.types.is_numeric_dtype(values):
+                    values = values.astype('string').str.replace(r'[$ ,]', '', regex=True)
+                cleaned[column] = pd.to_numeric(values, errors='coerce').astype('float64')
+            elif any(date_word in key for date_word in ['fecha', 'date']):
+                parser = DateParser.for_formats(DATE_FORMATS)
+                cleaned[column] = pd.Series(parser.parse_many(values), index=frame.index, dtype='object')
+            elif 'matricula' in key:
+                digits = values.astype('string').str.replace(r'[^0-9]', '', regex=True)
+                cleaned[column] = digits.astype('object').where(values.notna(), None)
+            elif values.dtype == object:
+                try:
+                    stripped = values.str.strip()
+                except AttributeError:  # Columna sin ningún texto
+                    continue
+                # Los valores que no son texto dan NaN y se conservan
+                cleaned[column] = values.where(stripped.isna(), stripped)
+
+        return cleaned
+
     def standardize_keys(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Estandariza las claves del diccionario.
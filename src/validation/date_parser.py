@@ -0,0 +1,209 @@
+# src/validation/date_parser.py
+import re
+from calendar import monthrange
+from datetime import date
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from config.settings import DATE_FORMATS
+
+# Nombres de meses en español e inglés (completos y abreviados) -> número
+MONTHS: Dict[str, int] = {}
+for _number, _names in enumerate([
+    ('ene', 'enero', 'jan', 'january'),
+    ('feb', 'febrero', 'february'),
+    ('mar', 'marzo', 'march'),
+    ('abr', 'abril', 'apr', 'april'),
+    ('may', 'mayo'),
+    ('jun', 'junio', 'june'),
+    ('jul', 'julio', 'july'),
+    ('ago', 'agosto', 'aug', 'august'),
+    ('sep', 'sept', 'septiembre', 'setiembre', 'september'),
+    ('oct', 'octubre', 'october'),
+    ('nov', 'noviembre', 'november'),
+    ('dic', 'diciembre', 'dec', 'december'),
+], start=1):
+    for _name in _names:
+        MONTHS[_name] = _number
+
+# Nombres completos de los meses en español -> abreviatura de las facturas
+MONTH_ABBREVIATIONS = {
+    'Enero': 'ENE', 'Febrero': 'FEB', 'Marzo': 'MAR', 'Abril': 'ABR',
+    'Mayo': 'MAY', 'Junio': 'JUN', 'Julio': 'JUL', 'Agosto': 'AGO',
+    'Septiembre': 'SEP', 'Octubre': 'OCT', 'Noviembre': 'NOV', 'Diciembre': 'DIC'
+}
+_FULL_MONTH_PATTERN = re.compile('|'.join(MONTH_ABBREVIATIONS))
+
+# Traducción de las directivas de strptime admitidas a grupos de la expresión
+_DIRECTIVES = {
+    'd': r'\d{1,2}',
+    'm': r'\d{1,2}',
+    'b': r'[^\W\d_]+',
+    'B': r'[^\W\d_]+',
+    'Y': r'\d{4}',
+    'y': r'\d{2}',
+}
+
+# Fechas distintas recordadas por cada DateParser
+MEMO_SIZE = 4096
+
+
+def _format_to_regex(date_format: str, index: int) -> str:
+    """Convierte un formato de strptime en una rama con grupos d{index}, b{index}, Y{index}..."""
+    parts = []
+    tokens = iter(date_format)
+    for char in tokens:
+        if char == '%':
+            directive = next(tokens, '')
+            if directive == '%':
+                parts.append('%')
+            elif directive in _DIRECTIVES:
+                parts.append(f'(?P<{directive}{index}>{_DIRECTIVES[directive]})')
+            else:
+                raise ValueError(f"Directiva de fecha no soportada: %{directive}")
+        elif char.isspace():
+            parts.append(r'\s+')
+        else:
+            parts.append(re.escape(char))
+    return ''.join(parts)
+
+
+class DateParser:
+    """
+    Analizador de fechas con todos los formatos en una sola expresión compilada.
+
+    Sustituye el bucle de datetime.strptime con try/except por formato: cada
+    formato de DATE_FORMATS se traduce una vez a una rama de una única
+    expresión regular, los meses se buscan en una tabla español/inglés (así
+    "Abr" o "Ene" no dependen del locale) y los resultados de cada cadena se
+    recuerdan con un LRU, ya que las mismas fechas se repiten en muchas
+    facturas. Las fechas imposibles (31 de abril) se rechazan sin excepciones.
+    """
+
+    def __init__(self, formats: Sequence[str] = DATE_FORMATS):
+        """
+        Compila los formatos.
+
+        Args:
+            formats (Sequence[str]): Formatos de strptime; se admiten %d, %m,
+                %b, %B, %Y, %y y %%. En %b y %B vale cualquier nombre o
+                abreviatura de mes en español o inglés
+        """
+        self.formats = tuple(formats)
+        self.pattern = re.compile(
+            '|'.join(f'(?:{_format_to_regex(fmt, i)})' for i, fmt in enumerate(self.formats)),
+            re.IGNORECASE
+        )
+        self.parse = lru_cache(maxsize=MEMO_SIZE)(self._parse)
+
+    @classmethod
+    def for_formats(cls, formats: Sequence[str] = DATE_FORMATS) -> 'DateParser':
+        """
+        Obtiene el analizador de unos formatos, compilándolo una sola vez por proceso.
+
+        Args:
+            formats (Sequence[str]): Formatos de strptime
+
+        Returns:
+            DateParser: Analizador compartido
+        """
+        return _built_parser(tuple(formats))
+
+    def _parse(self, date_str: str) -> Optional[date]:
+        """
+        Analiza una fecha (memorizado en parse).
+
+        Args:
+            date_str (str): Texto de la fecha (sin texto adicional)
+
+        Returns:
+            Optional[date]: Fecha o None si no encaja con ningún formato o no existe
+        """
+        if not isinstance(date_str, str):
+            return None
+        match = self.pattern.fullmatch(date_str.strip())
+        if match is None:
+            return None
+        # Solo tienen valor los grupos de la rama que coincidió: {'d': '18', 'b': 'Abr', ...}
+        parts = {name[0]: value for name, value in match.groupdict().items() if value is not None}
+
+        if 'Y' in parts:
+            year = int(parts['Y'])
+        elif 'y' in parts:
+            # Misma regla que strptime: 00-68 -> 2000-2068, 69-99 -> 1969-1999
+            year = int(parts['y'])
+            year += 2000 if year < 69 else 1900
+        else:
+            return None
+
+        if 'm' in parts:
+            month = int(parts['m'])
+        else:
+            name = parts.get('b') or parts.get('B')
+            month = MONTHS.get(name.lower()) if name else None
+        day = int(parts.get('d', 1))
+
+        if month is None or not 1 <= month <= 12 or not 1 <= year:
+            return None
+        if not 1 <= day <= monthrange(year, month)[1]:
+            return None
+        return date(year, month, day)
+
+    def is_valid(self, date_str: str) -> bool:
+        """
+        Indica si una fecha encaja con algún formato.
+
+        Args:
+            date_str (str): Texto de la fecha
+
+        Returns:
+            bool: True si la fecha es válida
+        """
+        return self.parse(date_str) is not None
+
+    def to_iso(self, date_str: str) -> Optional[str]:
+        """
+        Convierte una fecha a YYYY-MM-DD.
+
+        Args:
+            date_str (str): Texto de la fecha
+
+        Returns:
+            Optional[str]: Fecha en formato YYYY-MM-DD o None si no es válida
+        """
+        parsed = self.parse(date_str)
+        return parsed.isoformat() if parsed is not None else None
+
+    def parse_many(self, values: Iterable[str]) -> List[Optional[str]]:
+        """
+        Convierte una columna de fechas a YYYY-MM-DD, analizando cada valor distinto una vez.
+
+        Args:
+            values (Iterable[str]): Textos de las fechas
+
+        Returns:
+            List[Optional[str]]: Fechas en formato YYYY-MM-DD (None las no válidas),
+            en el mismo orden
+        """
+        values = list(values)
+        converted = {value: self.to_iso(value) for value in set(values) if isinstance(value, str)}
+        return [converted.get(value) if isinstance(value, str) else None for value in values]
+
+    @staticmethod
+    def abbreviate_months(text: str) -> str:
+        """
+        Abrevia en una sola pasada los nombres completos de meses en español
+        ("Mayo" -> "MAY"), como aparecen en las fechas de las facturas.
+
+        Args:
+            text (str): Texto de la fecha
+
+        Returns:
+            str: Texto con los meses abreviados
+        """
+        return _FULL_MONTH_PATTERN.sub(lambda match: MONTH_ABBREVIATIONS[match.group(0)], text)
+
+
+@lru_cache(maxsize=8)
+def _built_parser(formats: Tuple[str, ...]) -> DateParser:
+    return DateParser(formats)
@@ -1,9 +1,26 @@
 # src/validation/field_validator.py
 import re
-from datetime import datetime
 import logging
+from enum import IntFlag
 from typing import Dict, Union, List
+import numpy as np
+import pandas as pd
 from config.settings import DATE_FORMATS, PATTERNS, DOCUMENT_TYPES
+from .date_parser import DateParser
+
+# Formato de montos con separador de miles y decimales opcionales
+AMOUNT_PATTERN = r'^\d{1,3}(,\d{3})*(\.\d{1,2})?$'
+
+
+class FieldError(IntFlag):
+    """Errores de validación de una fila, combinables como máscara de bits."""
+    NONE = 0
+    INVALID_TYPE = 1  # Tipo de documento no válido
+    MISSING_FIELD = 2  # Falta algún campo requerido
+    INVALID_DATE = 4  # Formato de fecha inválido
+    INVALID_AMOUNT = 8  # Formato de monto inválido
+    INVALID_MATRICULA = 16  # Formato de matrícula inválido
+
 
 class FieldValidator:
     """Clase para validar los campos extraídos del OCR."""
@@ -19,13 +36,7 @@ class FieldValidator:
         Returns:
             bool: True si la fecha es válida
         """
-        for date_format in DATE_FORMATS:
-            try:
-                datetime.strptime(date_str, date_format)
-                return True
-            except ValueError:
-                continue
-        return False
+        return DateParser.for_formats(DATE_FORMATS).is_valid(date_str)
 
     @staticmethod
     def validate_amount(amount_str: str) -> bool:
@@ -42,8 +53,7 @@ class FieldValidator:
         amount_str = amount_str.replace('$', '').replace(' ', '')
         
         # Verificar formato con comas y decimales opcionales
-        pattern = r'^\d{1,3}(,\d{3})*(\.\d{1,2})?$'
-        return bool(re.match(pattern, amount_str))
+        return bool(re.match(AMOUNT_PATTERN, amount_str))
 
     @staticmethod
     def validate_matricula(matricula: str) -> bool:
@@ -106,6 +116,90 @@ class FieldValidator:
 
         return validation_result
 
+    def validate_frame(self, frame: pd.DataFrame, type_column: str = 'document_type') -> pd.Series:
+        """
+        Valida por columnas una tabla de registros extraídos.
+
+        Aplica las mismas reglas que validate_fields a todas las filas a la
+        vez, con operaciones vectorizadas de pandas sobre cada columna (las
+        fechas se analizan una vez por valor distinto).
+
+        Args:
+            frame (pd.DataFrame): Una fila por documento, una columna por campo
+                y la columna con el tipo de documento
+            type_column (str): Columna con el tipo de documento
+
+        Returns:
+            pd.Series: Máscara FieldError (entero) por fila, con el índice de
+            frame; 0 si la fila es válida
+        """
+        errors = pd.Series(0, index=frame.index, dtype='int64')
+        if type_column in frame:
+            document_types = frame[type_column]
+        else:
+            document_types = pd.Series(None, index=frame.index, dtype='object')
+        errors[~document_types.isin(list(DOCUMENT_TYPES))] |= FieldError.INVALID_TYPE
+
+        checked = {}
+        for document_type, config in DOCUMENT_TYPES.items():
+            rows = document_types == document_type
+            if not rows.any():
+                continue
+            for field in config['campos_requeridos']:
+                if field not in frame:
+                    errors[rows] |= FieldError.MISSING_FIELD
+                    continue
+                values = frame[field]
+                errors[rows & values.isna()] |= FieldError.MISSING_FIELD
+
+                if field not in checked:
+                    checked[field] = self._invalid_values(field, values)
+                invalid, flag = checked[field]
+                if flag:
+                    errors[rows & values.notna() & invalid] |= flag
+
+        return errors
+
+    @staticmethod
+    def _invalid_values(field: str, values: pd.Series):
+        """
+        Filas con formato inválido de una columna y el error que les corresponde.
+
+        Cada valor distinto se comprueba una sola vez (pd.factorize) y el
+        resultado se reparte a las filas por su código.
+        """
+        if 'fecha' in field:
+            flag = FieldError.INVALID_DATE
+        elif field == 'total':
+            flag = FieldError.INVALID_AMOUNT
+        elif field == 'matricula':
+            flag = FieldError.INVALID_MATRICULA
+        else:
+            return None, FieldError.NONE
+
+        codes, uniques = pd.factorize(values)
+        uniques = pd.Series(uniques, dtype='object')
+        if flag == FieldError.INVALID_DATE:
+            invalid = pd.Series(DateParser.for_formats(DATE_FORMATS).parse_many(uniques)).isna()
+        else:
+            try:
+                text = uniques.str
+            except AttributeError:
+                # Columna sin ningún texto: ningún valor tiene formato válido
+                text = None
+            if text is None:
+                invalid = pd.Series(True, index=uniques.index)
+            elif flag == FieldError.INVALID_AMOUNT:
+                amounts = text.replace('$', '', regex=False).str.replace(' ', '', regex=False)
+                invalid = ~amounts.str.match(AMOUNT_PATTERN, na=False).astype(bool)
+            else:
+                # Los valores que no son texto dan NaN y cuentan como inválidos
+                invalid = ~text.match(PATTERNS['matricula'], na=False).astype(bool)
+
+        # Las filas vacías (código -1) no se marcan aquí: cuentan como campo faltante
+        invalid = np.append(invalid.to_numpy(dtype=bool), False)
+        return pd.Series(invalid[codes], index=values.index), flag
+
     def clean_amount(self, amount_str: str) -> float:
         """
         Limpia y convierte un monto a formato numérico.
@@ -136,10 +230,7 @@ class FieldValidator:
         Returns:
             str: Fecha en formato estándar YYYY-MM-DD
         """
-        for date_format in DATE_FORMATS:
-            try:
-                date_obj = datetime.strptime(date_str, date_format)
-                return date_obj.strftime('%Y-%m-%d')
-            except ValueError:
-                continue
-        raise ValueError(f"Formato de fecha no reconocido: {date_str}")
\ No newline at end of file
+        iso_date = DateParser.for_formats(DATE_FORMATS).to_iso(date_str)
+        if iso_date is None:
+            raise ValueError(f"Formato de fecha no reconocido: {date_str}")
+        return iso_date
\ No newline at end of file
@@ -1,6 +1,15 @@
 # tests/test_features_extractor_generic.py
+import re
 import pytest
+import Levenshtein
+import numpy as np
 from src.features.feature_extractor import FeatureExtractor
+from src.features.extraction_engine import ExtractionEngine
+from src.features.spatial_index import SpatialIndex
+from src.features.keyword_automaton import KeywordAutomaton
+from src.features.label_matcher import BKTree, FuzzyLabelMatcher
+from src.features.document import Document
+from src.ocr.layout_templates import LayoutTemplates
 
 class TestFeatureExtractorGeneric:
     """Pruebas genéricas para el extractor de características."""
@@ -144,4 +153,190 @@ class TestFeatureExtractorGeneric:
         assert len(fields) == 0
         
         fields = extractor.extract_fields([{'text': '', 'confidence': 0.95}])
-        assert len(fields) == 0
\ No newline at end of file
+        assert len(fields) == 0
+
+    def test_plantilla_restringe_region(self, extractor):
+        """Prueba que con una plantilla alineada cada campo se busca en su región."""
+        text_blocks = [
+            {'text': 'Subtotal: $ 12.000', 'confidence': 0.97, 'bbox': [10, 100, 300, 120]},
+            {'text': 'TOTAL A PAGAR: $ 23.286', 'confidence': 0.99, 'bbox': [10, 700, 300, 720]},
+        ]
+        page = np.full((1000, 800), 255, dtype=np.uint8)
+        page[100:120, 10:300] = 0
+        page[700:720, 10:300] = 0
+        templates = LayoutTemplates(None)
+        templates.add('gas', page, {'total': (0.0, 0.68, 0.4, 0.74)}, save=False)
+        layout = templates.align(page)
+
+        assert extractor.extract_fields(text_blocks)['total'] == '12000'
+        assert extractor.extract_fields(text_blocks, layout=layout)['total'] == '23286'
+
+    def test_estrategia_espacial_varias_columnas(self, extractor):
+        """Prueba que la estrategia espacial empareja cada etiqueta con el valor de su línea."""
+        # Etiquetas en la primera columna, valores en la segunda y otra tabla a la derecha
+        text_blocks = [
+            {'text': 'TOTAL A PAGAR:', 'confidence': 0.99, 'bbox': [10, 100, 200, 120]},
+            {'text': 'Fecha límite:', 'confidence': 0.99, 'bbox': [10, 130, 200, 150]},
+            {'text': 'Consumo anterior 1.234', 'confidence': 0.99, 'bbox': [420, 100, 700, 120]},
+            {'text': '$ 23.286', 'confidence': 0.99, 'bbox': [220, 100, 300, 120]},
+            {'text': '17/02/2025', 'confidence': 0.99, 'bbox': [220, 130, 300, 150]},
+            {'text': 'NIT', 'confidence': 0.99, 'bbox': [10, 160, 60, 180]},
+            {'text': '900123-4', 'confidence': 0.99, 'bbox': [10, 185, 120, 205]},
+        ]
+        assert 'total' not in extractor.extract_fields(text_blocks)
+
+        fields = extractor.extract_fields(text_blocks, strategy='spatial')
+        assert fields['total'] == '23286'
+        assert fields['fecha_vencimiento'] == '17-02-2025'
+        assert fields['identificacion'] == '900123-4'
+        assert 'fecha_expedicion' not in fields
+
+    def test_indice_espacial(self):
+        """Prueba las consultas del índice con cajas de cuatro puntos y planas."""
+        text_blocks = [
+            {'text': 'TOTAL', 'bbox': [[10, 10], [100, 10], [100, 30], [10, 30]]},
+            {'text': 'lejos', 'bbox': [500, 12, 600, 28]},
+            {'text': 'cerca', 'bbox': [120, 14, 200, 26]},
+            {'text': 'debajo', 'bbox': [[40, 40], [90, 40], [90, 60], [40, 60]]},
+            {'text': 'otra columna', 'bbox': [300, 40, 400, 60]},
+            {'text': 'sin caja', 'bbox': None},
+        ]
+        index = SpatialIndex(text_blocks)
+        assert len(index) == 5
+        assert index.right_of(0) == 2
+        assert index.below(0) == 3
+        assert index.right_of(2) == 1
+        assert index.below(1) is None
+        assert index.right_of(5) is None
+
+class TestExtractionEngine:
+    """Pruebas para el motor de extracción compilado."""
+
+    def test_equivale_a_busquedas_separadas(self):
+        """Prueba que scan devuelve la primera coincidencia de cada patrón, con sus posiciones."""
+        patrones = FeatureExtractor().patrones_base
+        engine = ExtractionEngine.for_patterns(patrones, re.IGNORECASE)
+        texto = 'EMISIÓN: 18-Abr-2024 Subtotal: 12.000 NIT: ab-12 Fecha LÍMITE: 17/MAY/2024 TOTAL A PAGAR: $ 8.640'
+
+        matches = engine.scan(texto)
+        for campo, patron in patrones.items():
+            esperado = re.search(patron, texto, re.IGNORECASE)
+            match = matches[campo]
+            assert (match.start, match.end) == esperado.span()
+            assert match.value == esperado.group(1)
+            assert texto[match.value_start:match.value_end] == match.value
+        assert matches['identificacion'].value == 'ab-12'
+        assert engine is ExtractionEngine.for_patterns(patrones, re.IGNORECASE)
+
+    def test_fecha_expedicion_no_cruza_bloques(self):
+        """Prueba que la fecha de expedición solo se toma de un bloque que la anuncia."""
+        extractor = FeatureExtractor()
+        bloques = [
+            {'text': 'Fecha', 'confidence': 0.95},
+            {'text': '01/01/2024 generada', 'confidence': 0.95},
+            {'text': 'Factura expedida el 04/02/2025', 'confidence': 0.95},
+        ]
+        assert extractor.extract_fields(bloques)['fecha_expedicion'] == '04-02-2025'
+
+class TestKeywordAutomaton:
+    """Pruebas para el autómata de palabras clave."""
+
+    def test_cuenta_y_ordena_tipos(self):
+        """Prueba el conteo solapado, sin mayúsculas, y el orden por apariciones."""
+        automaton = KeywordAutomaton({
+            'LUZ': ['energia', 'alumbrado'],
+            'AGUA': ['agua', 'servicio de agua'],
+            'GAS': ['gas'],
+        })
+        texto = 'SERVICIO DE AGUA potable - Alumbrado público - agua residual'
+
+        assert automaton.count(texto) == {'LUZ': 1, 'AGUA': 3}
+        assert automaton.rank(texto) == [('AGUA', 3), ('LUZ', 1)]
+        assert automaton.rank('gas y energia') == [('LUZ', 1), ('GAS', 1)]
+        assert automaton.best('sin palabras clave') is None
+        assert automaton is not KeywordAutomaton.for_table({'GAS': ['gas']})
+        assert KeywordAutomaton.for_table({'GAS': ['gas']}) is KeywordAutomaton.for_table({'GAS': ['gas']})
+
+    def test_gana_el_tipo_con_mas_apariciones(self):
+        """Prueba que se elige el mejor tipo y no el primero que aparece en la tabla."""
+        extractor = FeatureExtractor()
+        texto = 'Consumo de gas del mes. Acueducto y alcantarillado: consumo de agua 12 m3'
+        assert extractor._detect_document_type(texto) == 'agua'
+
+class TestFuzzyLabels:
+    """Pruebas para la corrección aproximada de etiquetas."""
+
+    def test_bktree_equivale_a_comparar_todo(self):
+        """Prueba que el árbol devuelve lo mismo que comparar con todo el vocabulario."""
+        vocabulario = ['total', 'fecha', 'factura', 'matrícula', 'plazo', 'pagar', 'pagas', 'valor']
+        tree = BKTree(vocabulario)
+        for palabra in ['t0tal', 'fecho', 'pagos', 'matrlcula', 'zzzzz']:
+            esperado = sorted(
+                (Levenshtein.distance(palabra, v), v) for v in vocabulario
+                if Levenshtein.distance(palabra, v) <= 2
+            )
+            assert tree.search(palabra, 2) == esperado
+
+    def test_corrige_etiquetas_sin_tocar_valores(self):
+        """Prueba que las etiquetas con errores vuelven a coincidir con los patrones."""
+        matcher = FuzzyLabelMatcher(['matrícula', 'total', 'pagar', 'pagas'])
+        assert matcher.normalize('MATRlCULA >> 2121717') == 'MATRÍCULA >> 2121717'
+        assert matcher.normalize('T0TAL A PAGAR: $8,640') == 'TOTAL A PAGAR: $8,640'
+        assert matcher.normalize('Si no pagas antes') == 'Si no pagas antes'
+        assert matcher.normalize('Totales ID 1234') == 'Totales ID 1234'
+
+        bloques = [
+            {'text': 'MATRICULA 2121717', 'confidence': 0.95},
+            {'text': 'T0TAL A PAGAR: $ 8.640', 'confidence': 0.95},
+        ]
+        assert FeatureExtractor(fuzzy_labels=False).extract_fields(bloques) == {}
+        fields = FeatureExtractor(fuzzy_labels=True).extract_fields(bloques)
+        assert fields['identificacion'] == '2121717'
+        assert fields['total'] == '8640'
+
+    def test_no_corrige_palabras_corrientes(self):
+        """Prueba que las palabras corrientes y las que no preceden un valor no cambian."""
+        matcher = FuzzyLabelMatcher()
+        for texto in ['Plaza Mayor', 'Vende: Empresa', 'Total pagos del mes', 'Fechas de lectura',
+                      'Valer', 'Plaza 12', 'Fechas: 18-Abr-2024', 'T0TAL de la empresa']:
+            assert matcher.normalize(texto) == texto
+        assert matcher.normalize('Fecho: 18-Abr-2024') == 'Fecha: 18-Abr-2024'
+        assert matcher.normalize('T0TAL:') == 'TOTAL:'
+        assert not FeatureExtractor().label_matcher
+
+class TestDocument:
+    """Pruebas para el documento compartido entre etapas."""
+
+    @pytest.fixture
+    def documento(self):
+        """Documento con un bloque de baja confianza entre dos válidos."""
+        return Document([
+            {'text': 'Total a pagar:', 'confidence': 0.95, 'bbox': [0, 0, 100, 20]},
+            {'text': 'ruido', 'confidence': 0.30, 'bbox': [0, 30, 50, 50]},
+            {'text': '$ 23.286', 'confidence': 0.92, 'bbox': [110, 0, 180, 20]},
+        ])
+
+    def test_vistas_y_posiciones(self, documento):
+        """Prueba que las vistas se calculan una vez y llevan de la posición al bloque."""
+        assert documento.text == 'Total a pagar: ruido $ 23.286'
+        assert documento.confident_text == 'Total a pagar: $ 23.286'
+        assert documento.confident_text is documento.confident_text
+        assert documento.lower_text == documento.text.lower()
+
+        match = ExtractionEngine({'total': r'total a pagar:\s*\$\s*([\d.,]+)'}, re.IGNORECASE).search(
+            'total', documento.confident_text
+        )
+        span = documento.blocks_in_span(match.start, match.value_end)
+        assert [block['bbox'] for block in span] == [[0, 0, 100, 20], [110, 0, 180, 20]]
+        assert documento.block_at(match.value_start) == 1
+        assert documento.block_at(documento.text.index('ruido'), 'text') == 1
+        assert documento.block_at(len(documento.text)) is None
+        with pytest.raises(ValueError):
+            documento.block_at(0, 'otra')
+
+    def test_extractor_acepta_documento(self, documento):
+        """Prueba que el extractor da lo mismo con el documento que con la lista."""
+        extractor = FeatureExtractor(fuzzy_labels=True)
+        assert extractor.extract_fields(documento) == extractor.extract_fields(documento.blocks)
+        assert extractor.extract_fields(documento)['total'] == '23286'
+        assert documento.normalized(extractor.label_matcher) is documento
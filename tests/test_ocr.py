@@ -1,9 +1,47 @@
 # tests/test_ocr.py
 # tests/test_ocr.py
+import gc
+import os
+import sys
+import weakref
+import time
+import pickle
+import subprocess
 import pytest
 import numpy as np
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from src.ocr import reader_registry, worker_pool
 from src.ocr.ocr_engine import OCREngine
 from src.ocr.model_setup import ModelSetup
+from src.ocr.reader_registry import ReaderRegistry
+from src.ocr.onnx_backend import OnnxBackend, OnnxModule
+from src.ocr.worker_pool import OCRWorkerPool
+from src.ocr.region_priors import RegionPriors
+from src.ocr.layout_templates import LayoutTemplates
+from src.ocr.text_blocks import TextBlock, TextBlockArray
+from src.utils.cache import ResultCache
+
+def _crash_worker(index, image):
+    """Worker OCR simulado que termina el proceso de forma anómala con la imagen 'crash'."""
+    if image == 'crash':
+        os._exit(1)
+    return {'index': index, 'result': image, 'error': None}
+
+@pytest.fixture
+def fake_engine(monkeypatch):
+    """
+    Fixture que crea OCREngine con un lector simulado, sin caché y con
+    posiciones y plantillas en memoria (nunca toca los directorios de datos).
+    """
+    def make(reader, cache=None):
+        monkeypatch.setattr(ModelSetup, 'initialize_model', lambda self, *args: reader)
+        monkeypatch.setattr(ModelSetup, 'verify_model_files', staticmethod(lambda: True))
+        return OCREngine(
+            cache=cache, use_cache=cache is not None,
+            region_priors=RegionPriors(path=None), layout_templates=LayoutTemplates(None)
+        )
+    return make
 
 class TestOCREngine:
     """Pruebas para el motor OCR."""
@@ -45,7 +83,511 @@ class TestOCREngine:
         fields = ocr_engine.extract_fields(low_confidence_results, 'AGUA')
         assert len(fields) == 0
 
+    def test_process_batch_preserves_order(self, ocr_engine):
+        """Prueba que el procesamiento por lotes devuelve un resultado por imagen."""
+        images = [
+            np.full((400, 300, 3), 255, dtype=np.uint8),
+            np.full((410, 290, 3), 255, dtype=np.uint8),
+            np.full((200, 600, 3), 255, dtype=np.uint8)
+        ]
+        results = ocr_engine.process_batch(images, batch_size=2)
+        assert len(results) == 3
+        assert all('document_type' in result for result in results)
+
     def test_error_handling(self, ocr_engine):
         """Prueba el manejo de errores."""
         with pytest.raises(Exception):
-            ocr_engine.process_image(None)
\ No newline at end of file
+            ocr_engine.process_image(None)
+
+class TestReaderRegistry:
+    """Pruebas para el registro de lectores compartidos."""
+
+    @pytest.fixture
+    def fake_reader(self, monkeypatch):
+        """Fixture que sustituye easyocr.Reader por una clase ligera que cuenta construcciones."""
+        class FakeReader:
+            built = 0
+
+            def __init__(self, lang_list, gpu, model_storage_directory, **kwargs):
+                FakeReader.built += 1
+                time.sleep(0.05)
+
+            def readtext(self, image):
+                return []
+
+        monkeypatch.setattr(reader_registry.easyocr, 'Reader', FakeReader)
+        ReaderRegistry.clear()
+        yield FakeReader
+        ReaderRegistry.clear()
+
+    def test_reader_is_shared(self, fake_reader):
+        """Prueba que se construye un solo lector por clave, incluso con hilos concurrentes."""
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            readers = list(pool.map(lambda _: ReaderRegistry.get_reader(['es'], False, '/tmp/modelos'), range(8)))
+        assert fake_reader.built == 1
+        assert all(reader is readers[0] for reader in readers)
+
+        ReaderRegistry.get_reader(['en'], False, '/tmp/modelos')
+        assert fake_reader.built == 2
+
+        ReaderRegistry.get_reader(['es'], False, '/tmp/modelos', quantize=False)
+        assert fake_reader.built == 3
+
+    def test_warm_up_reports_info(self, fake_reader):
+        """Prueba que el precalentamiento reporta tiempos de carga."""
+        info = ReaderRegistry.warm_up(['es'], False, '/tmp/modelos')
+        assert info['load_seconds'] > 0
+        assert info['warmup_seconds'] is not None
+        assert len(ReaderRegistry.info()) == 1
+
+    def test_onnx_backend_disables_quantization(self):
+        """Prueba que el backend ONNX usa siempre los pesos sin cuantizar."""
+        assert ReaderRegistry.make_key(['es'], False, '/tmp/modelos', True, 'onnx') == \
+            ReaderRegistry.make_key(['es'], False, '/tmp/modelos', False, 'onnx')
+        with pytest.raises(ValueError):
+            ReaderRegistry.make_key(['es'], False, '/tmp/modelos', True, 'tensorrt')
+
+class TestOnnxBackend:
+    """Pruebas para el backend ONNX Runtime."""
+
+    @pytest.fixture
+    def torch_reader(self):
+        """Fixture con un lector mínimo que tiene los modelos de EasyOCR con pesos aleatorios."""
+        torch = pytest.importorskip('torch')
+        pytest.importorskip('onnxruntime')
+        from easyocr.craft import CRAFT
+        from easyocr.model.vgg_model import Model
+
+        class TorchReader:
+            detect_network = 'craft'
+            model_lang = 'latin'
+
+        torch.manual_seed(0)
+        reader = TorchReader()
+        reader.detector = CRAFT().eval()
+        reader.recognizer = Model(1, 256, 256, 97).eval()
+        return reader
+
+    def test_attach_matches_torch(self, torch_reader, tmp_path):
+        """Prueba que las sesiones ONNX reproducen las salidas de PyTorch."""
+        import torch
+        image = torch.rand(1, 3, 160, 224)
+        line = torch.rand(2, 1, 64, 180)
+        with torch.no_grad():
+            score, _ = torch_reader.detector(image)
+            preds = torch_reader.recognizer(line, None)
+
+        OnnxBackend.attach(torch_reader, str(tmp_path))
+
+        assert all(path.endswith('.onnx') for path in OnnxBackend.model_paths(torch_reader, str(tmp_path)))
+        assert isinstance(torch_reader.detector, OnnxModule)
+        onnx_score, _ = torch_reader.detector(image)
+        onnx_preds = torch_reader.recognizer(line, torch.zeros(2, 26, dtype=torch.long))
+        assert torch.allclose(score, onnx_score, atol=1e-4)
+        assert torch.allclose(preds, onnx_preds, atol=1e-4)
+
+class TestOCRWorkerPool:
+    """Pruebas para el reparto de núcleos entre workers OCR."""
+
+    def test_split_respects_budget(self):
+        """Prueba que el reparto nunca supera el presupuesto de núcleos."""
+        assert OCRWorkerPool.split(8, threads=2) == (4, 2)
+        assert OCRWorkerPool.split(8, workers=3) == (3, 2)
+        assert OCRWorkerPool.split(8, threads=3) == (2, 3)
+        assert OCRWorkerPool.split(1, threads=4) == (1, 1)
+        with pytest.raises(ValueError):
+            OCRWorkerPool.split(8, workers=5, threads=2)
+
+    def test_candidate_splits(self):
+        """Prueba que los repartos candidatos usan todo el presupuesto."""
+        assert OCRWorkerPool.candidate_splits(6) == [(6, 1), (3, 2), (2, 3), (1, 6)]
+
+    def test_saved_topology_is_used(self, tmp_path):
+        """Prueba que el pool usa la topología guardada solo para su presupuesto."""
+        topology_file = str(tmp_path / 'topology.json')
+        OCRWorkerPool.save_topology({'core_budget': 8, 'workers': 2, 'threads': 4}, topology_file)
+
+        pool = OCRWorkerPool(core_budget=8, topology_file=topology_file)
+        assert (pool.workers, pool.threads) == (2, 4)
+        assert OCRWorkerPool.load_topology(4, topology_file) is None
+
+    def test_process_batch_recovers_dead_worker(self, monkeypatch):
+        """Prueba que un worker muerto se reporta como error y el lote sigue en un pool nuevo."""
+        monkeypatch.setattr(worker_pool, '_process_in_worker', _crash_worker)
+        monkeypatch.setattr(
+            OCRWorkerPool, '_create_executor',
+            lambda self: ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('fork'))
+        )
+        pool = OCRWorkerPool(workers=2, threads=1, core_budget=2)
+        try:
+            images = ['a', 'crash'] + [f'img{i}' for i in range(8)]
+            results = list(pool.process_batch(images))
+            assert [r['index'] for r in results] == list(range(10))
+            assert results[1]['result'] is None and results[1]['error']
+            assert [r['result'] for r in results[-3:]] == ['img5', 'img6', 'img7']
+
+            results = list(pool.process_batch(['x', 'y']))
+            assert [r['result'] for r in results] == ['x', 'y']
+        finally:
+            pool.close()
+
+    def test_process_batch_bounds_in_flight_images(self, monkeypatch):
+        """Prueba que el lote se consume por ventanas y se entrega en orden."""
+        monkeypatch.setattr(worker_pool, '_process_in_worker',
+                            lambda index, image: {'index': index, 'result': image * 2, 'error': None})
+        pool = OCRWorkerPool(workers=2, threads=1, core_budget=2)
+        pool._pool = ThreadPoolExecutor(2)
+        consumed = []
+
+        def images():
+            for value in range(20):
+                consumed.append(value)
+                yield value
+
+        try:
+            results = pool.process_batch(images())
+            first = next(results)
+            assert first == {'index': 0, 'result': 0, 'error': None, 'source': None}
+            assert len(consumed) == 4
+            assert [r['result'] for r in results] == [2 * value for value in range(1, 20)]
+        finally:
+            pool.close()
+
+    def test_configure_threads_in_fresh_process(self):
+        """Prueba que un proceso nuevo queda limitado al número de hilos indicado."""
+        code = (
+            "from src.ocr.worker_pool import configure_threads\n"
+            "configure_threads(2)\n"
+            "import os, torch, cv2\n"
+            "print(torch.get_num_threads(), cv2.getNumThreads(), os.environ['OMP_NUM_THREADS'])\n"
+        )
+        output = subprocess.run(
+            [sys.executable, '-c', code], capture_output=True, text=True, check=True
+        ).stdout.split()
+        assert output == ['2', '2', '2']
+
+class TestProgressiveOCR:
+    """Pruebas para el OCR progresivo con salida temprana."""
+
+    # (texto, caja [x_min, x_max, y_min, y_max]) en orden de lectura
+    REGIONS = [
+        ('EMPRESA DE ENERGIA', [10, 300, 0, 30]),
+        ('MATRÍCULA 2121717', [10, 300, 40, 70]),
+        ('Fecha de Emisión: 18-Abr-2024', [10, 300, 80, 110]),
+        ('TOTAL A PAGAR:', [10, 300, 120, 150]),
+        ('$8,640', [320, 400, 120, 150]),
+        ('Consumo del periodo', [10, 300, 160, 190]),
+        ('Fecha limite sin recargo: 17/MAY/2024', [10, 300, 200, 230]),
+        ('Historico de consumo', [10, 300, 240, 270]),
+        ('Puntos de pago', [10, 300, 280, 310]),
+    ]
+
+    @pytest.fixture
+    def engine(self, fake_engine):
+        """Fixture con un OCREngine cuyo lector devuelve una línea de texto por región."""
+        regions = self.REGIONS
+
+        class ScriptedReader:
+            def __init__(self):
+                self.recognized = []
+                self.low_confidence = set()
+
+            def detect(self, img, **kwargs):
+                return [[box for _, box in regions]], [[]]
+
+            def recognize(self, img_cv_grey, horizontal_list, free_list, **kwargs):
+                index = [box for _, box in regions].index(horizontal_list[0])
+                self.recognized.append(index)
+                x_min, x_max, y_min, y_max = horizontal_list[0]
+                bbox = [[x_min, y_min], [x_max, y_min], [x_max, y_max], [x_min, y_max]]
+                return [(bbox, regions[index][0], 0.3 if index in self.low_confidence else 0.99)]
+
+        return fake_engine(ScriptedReader())
+
+    @pytest.fixture
+    def page(self):
+        """Fixture con una página en blanco del tamaño de las regiones."""
+        return np.full((400, 500, 3), 255, dtype=np.uint8)
+
+    def test_stops_when_required_fields_found(self, engine, page):
+        """Prueba que se deja de reconocer al completar los campos requeridos."""
+        result = engine.process_image(page, progressive=True)
+
+        assert result['document_type'] == 'LUZ'
+        assert result['is_valid']
+        assert result['fields']['total'] == '8,640'
+        assert engine.last_progressive_stats['early_exit']
+        assert sorted(engine.reader.recognized) == list(range(7))
+
+    def test_keyword_boosts_value_region(self, engine, page):
+        """Prueba que la región junto a una etiqueta pasa delante de regiones más probables."""
+        # Posiciones aprendidas que favorecen todas las regiones menos la del valor
+        centers = [((x0 + x1) / 2 / 500, (y0 + y1) / 2 / 400) for _, (x0, x1, y0, y1) in self.REGIONS]
+        engine.region_priors.update('LUZ', centers[:4] + centers[5:])
+
+        engine.process_image(page, progressive=True)
+        order = engine.reader.recognized
+        assert order.index(4) == order.index(3) + 1
+
+    def test_priors_learn_field_positions(self, engine, page):
+        """Prueba que las posiciones de los campos se aprenden por tipo."""
+        engine.process_image(page, progressive=True)
+        priors = engine.region_priors
+        assert priors.score(0.3, 0.1, 'LUZ') > priors.score(0.9, 0.95, 'LUZ')
+
+    def test_reextracts_only_on_new_confident_text(self, engine, page, monkeypatch):
+        """Prueba que los campos se vuelven a extraer solo cuando una región aporta texto confiable."""
+        calls = []
+        build_result = engine._build_result
+        monkeypatch.setattr(engine, '_build_result', lambda blocks: calls.append(len(blocks)) or build_result(blocks))
+
+        engine.reader.low_confidence = {0, 5, 7, 8}
+        engine.read_blocks_progressive(page)
+        assert calls == list(range(1, len(calls) + 1))
+        assert len(calls) == len(set(engine.reader.recognized) - engine.reader.low_confidence)
+
+        calls.clear()
+        engine.reader.low_confidence = set(range(len(self.REGIONS)))
+        blocks, complete = engine.read_blocks_progressive(page)
+        assert calls == [] and complete and len(blocks) == len(self.REGIONS)
+
+    def test_priors_merge_counts_saved_by_other_processes(self, tmp_path):
+        """Prueba que guardar suma las cuentas nuevas a las del disco en lugar de sobrescribirlas."""
+        path = str(tmp_path / 'priors.json')
+        first, second = RegionPriors(path, save_every=2), RegionPriors(path, save_every=2)
+        first.update('LUZ', [(0.1, 0.1)])
+        second.update('LUZ', [(0.1, 0.1), (0.9, 0.9)])
+        first.save_if_due()
+        assert not os.path.exists(path)
+
+        first.update('LUZ', [(0.1, 0.1)])
+        first.save_if_due()
+        second.save()
+        counts = RegionPriors(path)._counts['LUZ']
+        assert counts[0] == 3 and counts[-1] == 1
+        assert second._counts == {'LUZ': counts}
+
+    def test_priors_saved_at_exit_without_being_kept_alive(self, tmp_path):
+        """Prueba que las prioridades no quedan retenidas y que las vivas se guardan al salir."""
+        priors = RegionPriors(str(tmp_path / 'descartadas.json'))
+        reference = weakref.ref(priors)
+        del priors
+        gc.collect()
+        assert reference() is None
+
+        path = str(tmp_path / 'priors.json')
+        code = (
+            "from src.ocr.region_priors import RegionPriors\n"
+            f"priors = RegionPriors({path!r})\n"
+            "priors.update('LUZ', [(0.1, 0.1)])\n"
+        )
+        subprocess.run([sys.executable, '-c', code], check=True)
+        assert RegionPriors(path)._counts['LUZ'][0] == 1
+
+class TestLayoutTemplates:
+    """Pruebas para las plantillas de diseño por tipo de documento."""
+
+    # Texto y caja (x0, y0, x1, y1) de cada región; cada región se pinta con
+    # un nivel de gris propio para que el lector simulado la reconozca
+    REGIONS = [
+        ('EMPRESA DE ENERGIA', (40, 40, 500, 90)),
+        ('MATRÍCULA 2121717', (40, 160, 360, 200)),
+        ('Fecha de Emisión: 18-Abr-2024', (420, 160, 760, 200)),
+        ('Consumo del periodo 245 kWh', (40, 400, 700, 560)),
+        ('TOTAL A PAGAR: $8,640', (40, 700, 500, 740)),
+        ('Fecha limite sin recargo: 17/MAY/2024', (40, 820, 600, 860)),
+    ]
+
+    @classmethod
+    def page(cls, shift=(0, 0), regions=None):
+        """Genera una página de 1000x800 con las regiones desplazadas."""
+        image = np.full((1000, 800, 3), 255, dtype=np.uint8)
+        for index, (_, (x0, y0, x1, y1)) in enumerate(regions or cls.REGIONS):
+            dx, dy = shift
+            image[y0 + dy:y1 + dy, x0 + dx:x1 + dx] = (10 + 20 * index) % 240
+        return image
+
+    @pytest.fixture
+    def engine(self, fake_engine):
+        """Fixture con un OCREngine cuyo lector reconoce las regiones por su nivel de gris."""
+        regions = self.REGIONS
+
+        class GreyLevelReader:
+            def __init__(self):
+                self.shapes = []
+
+            def readtext(self, image, detail=1):
+                self.shapes.append(image.shape[:2])
+                channel = image[..., 0] if image.ndim == 3 else image
+                results = []
+                for index, (text, _) in enumerate(regions):
+                    ys, xs = np.where(channel == 10 + 20 * index)
+                    if len(xs):
+                        x0, y0, x1, y1 = int(xs.min()), int(ys.min()), int(xs.max()), int(ys.max())
+                        results.append(([[x0, y0], [x1, y0], [x1, y1], [x0, y1]], text, 0.99))
+                return results
+
+        return fake_engine(GreyLevelReader())
+
+    def test_alignment_recovers_shift(self):
+        """Prueba que la alineación encuentra el desplazamiento y rechaza otros diseños."""
+        templates = LayoutTemplates(None)
+        templates.add('LUZ', self.page(), {'total': (0.05, 0.7, 0.625, 0.74)}, save=False)
+
+        layout = templates.align(self.page(shift=(16, 10)))
+        assert layout is not None and layout.document_type == 'LUZ'
+        assert layout.confidence > 0.3
+        x0, y0, _, _ = layout.region_box('total', margin=0)
+        assert abs(x0 - 56) <= 4 and abs(y0 - 710) <= 4
+
+        # Otro diseño: columnas de bloques pequeños, o el mismo encabezado muy desplazado
+        columns = [('', (60 + 380 * (i % 2), 60 + 90 * (i // 2), 340 + 380 * (i % 2), 100 + 90 * (i // 2))) for i in range(18)]
+        assert templates.align(self.page(regions=columns)) is None
+        moved = [(text, (x0, y0 + 300, x1, y1 + 300)) for text, (x0, y0, x1, y1) in self.REGIONS[:3]]
+        assert templates.align(self.page(regions=moved)) is None
+
+    def test_template_learned_then_used(self, engine):
+        """Prueba que la primera página crea la plantilla y las siguientes solo reconocen regiones."""
+        first = engine.process_image(self.page(), use_templates=True)
+        assert first['is_valid'] and 'LUZ' in engine.layout_templates
+
+        engine.reader.shapes.clear()
+        second = engine.process_image(self.page(shift=(12, 8)), use_templates=True)
+        assert second['is_valid']
+        assert second['fields'] == first['fields']
+        assert all(shape != (1000, 800) for shape in engine.reader.shapes)
+
+        stats = engine.get_template_stats()
+        assert stats['template_hits'] == 1
+        assert stats['full_page_runs'] == 1
+        assert stats['estimated_seconds_saved'] is not None
+
+    def test_low_confidence_falls_back_to_full_page(self, engine):
+        """Prueba que una página que no se alinea usa el OCR completo."""
+        engine.process_image(self.page(), use_templates=True)
+        blank = np.full((1000, 800, 3), 255, dtype=np.uint8)
+        result = engine.process_image(blank, use_templates=True)
+
+        assert result['document_type'] == 'DESCONOCIDO'
+        assert engine.get_template_stats()['template_fallbacks'] == 1
+
+class TestSelectiveRefinement:
+    """Pruebas para el refinamiento de bloques de baja confianza."""
+
+    # (texto, confianza, caja (x0, y0, x1, y1)) devueltos por el OCR de página completa
+    BLOCKS = [
+        ('EMPRESA DE ENERGIA', 0.99, (10, 0, 300, 30)),
+        ('MATRÍCULA 2121717', 0.99, (10, 40, 300, 70)),
+        ('Fecha de Emisión: 18-Abr-2024', 0.99, (10, 80, 300, 110)),
+        ('TOTAL A PAGAR:', 0.99, (10, 120, 300, 150)),
+        ('$8,64O', 0.41, (320, 120, 400, 150)),
+        ('Fecha limite sin recargo: 17/MAY/2024', 0.99, (10, 200, 300, 230)),
+        ('Consumo del periodo', 0.52, (10, 300, 300, 330)),
+    ]
+
+    @pytest.fixture
+    def engine(self, fake_engine):
+        """Fixture con un OCREngine cuyo lector lee mejor los recortes ampliados."""
+        blocks = self.BLOCKS
+
+        class RefiningReader:
+            def __init__(self, confidence):
+                self.confidence = confidence
+                self.crops = []
+
+            def readtext(self, image, detail=1):
+                return [
+                    ([[x0, y0], [x1, y0], [x1, y1], [x0, y1]], text, confidence)
+                    for text, confidence, (x0, y0, x1, y1) in blocks
+                ]
+
+            def recognize(self, img_cv_grey, horizontal_list, free_list, **kwargs):
+                self.crops.append(img_cv_grey.shape[:2])
+                return [(None, '$8,640', self.confidence)]
+
+        return lambda confidence=0.97: fake_engine(RefiningReader(confidence))
+
+    @pytest.fixture
+    def page(self):
+        """Fixture con una página en blanco del tamaño de los bloques."""
+        return np.full((400, 500, 3), 255, dtype=np.uint8)
+
+    def test_recovers_value_next_to_label(self, engine, page):
+        """Prueba que solo se vuelve a reconocer, ampliado, el valor junto a la etiqueta."""
+        engine = engine()
+        assert 'total' not in engine.process_image(page)['fields']
+
+        result = engine.process_image(page, refine=True)
+        assert result['is_valid']
+        assert result['fields']['total'] == '8,640'
+        assert engine.last_refine_stats == {'candidates': 1, 'improved': 1}
+        (height, width), = engine.reader.crops
+        assert height >= 2 * 30 and width >= 2 * 80
+
+    def test_keeps_original_when_not_better(self, engine, page):
+        """Prueba que una lectura con menos confianza no sustituye a la original."""
+        engine = engine(confidence=0.3)
+        blocks = engine.read_blocks(page)
+        refined = engine.refine_blocks(page, blocks)
+
+        assert refined == blocks
+        assert engine.last_refine_stats == {'candidates': 1, 'improved': 0}
+
+class TestTextBlockArray:
+    """Pruebas para el almacenamiento de bloques por columnas."""
+
+    BLOCKS = [
+        {'text': 'MATRÍCULA 2121717', 'confidence': 0.5, 'bbox': [[10, 20], [200, 20], [200, 40], [10, 40]]},
+        {'text': 'Total a pagar', 'confidence': 0.75},
+        {'text': '$ 8.640', 'confidence': 0.25, 'bbox': [210, 20, 300, 40]},
+    ]
+
+    def test_roundtrip_to_dicts(self):
+        """Prueba que la conversión conserva textos, confianzas y cajas."""
+        array = TextBlockArray.from_dicts(self.BLOCKS)
+        assert array.bboxes.shape == (3, 4, 2) and array.bboxes.dtype == np.float64
+        assert array.confidences.dtype == np.float64
+        blocks = array.to_dicts()
+        assert [block['text'] for block in blocks] == [block['text'] for block in self.BLOCKS]
+        assert [block['confidence'] for block in blocks] == [0.5, 0.75, 0.25]
+        assert blocks[0]['bbox'] == self.BLOCKS[0]['bbox']
+        assert 'bbox' not in blocks[1]
+        assert blocks[2]['bbox'] == [[210, 20], [300, 20], [300, 40], [210, 40]]
+        assert array[1] == TextBlock('Total a pagar', 0.75)
+        assert TextBlock.from_dict(self.BLOCKS[1]).to_dict() == self.BLOCKS[1]
+
+    def test_subsets_and_serialization(self):
+        """Prueba el filtrado por confianza y que se serializa más compacto que los dicts."""
+        array = TextBlockArray.from_dicts(self.BLOCKS)
+        confident = array.confident(0.5)
+        assert confident.texts == ['MATRÍCULA 2121717', 'Total a pagar']
+        assert array[1:].to_dicts() == array.to_dicts()[1:]
+        assert pickle.loads(pickle.dumps(array)).to_dicts() == array.to_dicts()
+
+        page = [
+            {'text': f'Bloque {i}', 'confidence': 0.9, 'bbox': [[i, i], [i + 40, i], [i + 40, i + 12], [i, i + 12]]}
+            for i in range(300)
+        ]
+        assert len(pickle.dumps(TextBlockArray.from_dicts(page))) < len(pickle.dumps(page))
+        assert TextBlockArray.from_dicts(page).bboxes.dtype == np.int32
+        assert TextBlockArray.from_dicts(page).to_dicts() == page
+
+    def test_cache_hit_matches_ocr(self, tmp_path, fake_engine):
+        """Prueba que los bloques de la caché dan el mismo resultado que el OCR."""
+        class Reader:
+            def readtext(self, image, detail=1):
+                return [
+                    ([[10, 10], [300, 10], [300, 40], [10, 40]], 'MATRÍCULA 2121717', 0.84999999),
+                    ([[10.5, 50], [300, 50], [300, 80], [10.5, 80]], 'TOTAL A PAGAR: $8,640', 0.123456789),
+                    ([[10, 90], [300, 90], [300, 120], [10, 120]], 'ENERGIA', 0.97),
+                ]
+
+        engine = fake_engine(Reader(), cache=ResultCache(cache_dir=str(tmp_path)))
+        page = np.full((200, 400, 3), 255, dtype=np.uint8)
+
+        miss = engine.process_image(page, progressive=False, use_templates=False, refine=False)
+        engine.cache.clear('fields')
+        hit = engine.process_image(page, progressive=False, use_templates=False, refine=False)
+        assert engine.cache.stats()['ocr']['hits'] == 1
+        assert hit == miss
+        assert engine._get_cached_blocks(ResultCache.content_hash(page)) == engine.read_blocks(page)
@@ -1,9 +1,20 @@
 # tests/test_preprocessing.py
+import os
 import pytest
+import cv2
 import numpy as np
+from src.preprocessing import image_processor
 from src.preprocessing.image_processor import ImageProcessor
 from config.settings import IMAGE_MIN_SIZE, IMAGE_MAX_SIZE
 
+_process_in_worker = image_processor._process_in_worker
+
+def _crash_worker(index, image, output):
+    """Worker que termina el proceso de forma anómala con la ruta 'crash'."""
+    if isinstance(image, str) and image == 'crash':
+        os._exit(1)
+    return _process_in_worker(index, image, output)
+
 class TestImageProcessor:
     """Pruebas para el procesador de imágenes."""
 
@@ -57,6 +68,38 @@ class TestImageProcessor:
         deskewed = processor.deskew(sample_image)
         assert deskewed.shape == sample_image.shape
 
+    @pytest.fixture
+    def text_image(self):
+        """Fixture que proporciona una imagen con líneas de texto horizontales."""
+        image = np.full((1200, 900), 255, dtype=np.uint8)
+        for y in range(80, 1150, 60):
+            cv2.putText(image, "TOTAL A PAGAR $8,640", (40, y), cv2.FONT_HERSHEY_SIMPLEX, 1.2, 0, 3)
+        return image
+
+    def test_estimate_skew_rotated_image(self, processor, text_image):
+        """Prueba la estimación del ángulo en una imagen inclinada."""
+        M = cv2.getRotationMatrix2D((450, 600), 4, 1.0)
+        rotated = cv2.warpAffine(text_image, M, (900, 1200), borderValue=255)
+        assert abs(processor.estimate_skew(rotated) + 4) < 0.5
+
+    def test_deskew_skips_upright_image(self, processor, text_image):
+        """Prueba que una imagen recta no se rota."""
+        assert processor.deskew(text_image) is text_image
+
+    def test_reduced_decode_factor(self, processor):
+        """Prueba que el factor deja el lado corto por encima de IMAGE_MAX_SIZE."""
+        assert processor.reduced_decode_factor(IMAGE_MAX_SIZE - 1, 5000) == 1
+        assert processor.reduced_decode_factor(IMAGE_MAX_SIZE * 4, IMAGE_MAX_SIZE * 5) == 4
+
+    def test_load_image_reduced_grayscale(self, processor, tmp_path):
+        """Prueba la decodificación reducida directa a escala de grises."""
+        path = str(tmp_path / 'grande.jpg')
+        cv2.imwrite(path, np.full((IMAGE_MAX_SIZE * 2, IMAGE_MAX_SIZE * 2, 3), 128, dtype=np.uint8))
+        image = processor.load_image(path, grayscale=True, reduced=True)
+        assert image.shape == (IMAGE_MAX_SIZE, IMAGE_MAX_SIZE)
+        assert processor.load_image(path).shape == (IMAGE_MAX_SIZE * 2, IMAGE_MAX_SIZE * 2, 3)
+        assert processor.process(path, output='resized').shape[:2] == (IMAGE_MAX_SIZE, IMAGE_MAX_SIZE)
+
     # En el método test_process_complete_pipeline
     def test_process_complete_pipeline(self, processor, noisy_image):
         """Prueba el pipeline completo de procesamiento."""
@@ -76,4 +119,58 @@ class TestImageProcessor:
         # Verificar que el ruido se ha reducido
         original_std = np.std(noisy_image)
         processed_std = np.std(processed)
-        assert processed_std < original_std
\ No newline at end of file
+        assert processed_std < original_std
+
+    def test_preprocess_skips_unused_stages(self, processor, noisy_image):
+        """Prueba que el umbral y la reducción de ruido no se ejecutan si no se usan."""
+        processor.preprocess_image(noisy_image)
+        assert 'enhanced' in processor.last_timings
+        assert 'binary' not in processor.last_timings
+        assert 'denoised' not in processor.last_timings
+
+    def test_process_requested_stage(self, processor, noisy_image):
+        """Prueba que solicitar una etapa ejecuta solo sus dependencias."""
+        denoised = processor.process(noisy_image, output='denoised')
+        assert denoised.dtype == np.uint8
+        assert set(processor.last_timings) == {'resized', 'deskewed', 'gray', 'binary', 'denoised'}
+
+    def test_process_batch_reports_errors_per_item(self, processor, noisy_image):
+        """Prueba que un error en una imagen no detiene el lote."""
+        try:
+            results = list(processor.process_batch(
+                [noisy_image, 'no_existe.jpg', noisy_image], workers=2
+            ))
+            pool = ImageProcessor._pool
+            list(processor.process_batch([noisy_image], workers=2))
+
+            assert [r['index'] for r in results] == [0, 1, 2]
+            assert results[0]['error'] is None and results[0]['image'].dtype == np.uint8
+            assert results[1]['image'] is None and 'no_existe.jpg' in results[1]['error']
+            assert results[1]['source'] == 'no_existe.jpg'
+            assert ImageProcessor._pool is pool
+        finally:
+            ImageProcessor.shutdown_pool()
+
+    def test_process_batch_unordered(self, processor, noisy_image):
+        """Prueba la entrega de resultados según se completan."""
+        try:
+            results = list(processor.process_batch([noisy_image] * 4, workers=2, ordered=False))
+            assert sorted(r['index'] for r in results) == [0, 1, 2, 3]
+        finally:
+            ImageProcessor.shutdown_pool()
+
+    def test_process_batch_recupera_pool_roto(self, processor, noisy_image, monkeypatch):
+        """Prueba que un proceso muerto se reporta como error y el pool se recrea."""
+        ImageProcessor.shutdown_pool()
+        monkeypatch.setattr(image_processor, '_process_in_worker', _crash_worker)
+        try:
+            images = [noisy_image, 'crash'] + [noisy_image] * 6
+            results = list(processor.process_batch(images, workers=2))
+            assert [r['index'] for r in results] == list(range(8))
+            assert results[1]['image'] is None and results[1]['error']
+            assert all(r['error'] is None for r in results[-2:])
+
+            results = list(processor.process_batch([noisy_image] * 3, workers=2))
+            assert all(r['error'] is None for r in results)
+        finally:
+            ImageProcessor.shutdown_pool()
@@ -0,0 +1,255 @@
+# tests/test_utils.py
+import os
+import csv
+import json
+import pytest
+import numpy as np
+from datetime import date
+from src.utils.cache import ResultCache
+from openpyxl import load_workbook
+from src.utils.helpers import FileHandler, ResultsExporter, ExcelStreamWriter, StreamWriter
+from src.utils.file_store import RawFileStore
+
+class TestResultCache:
+    """Pruebas para la caché de resultados."""
+
+    @pytest.fixture
+    def cache(self, tmp_path):
+        """Fixture que proporciona una caché en un directorio temporal."""
+        return ResultCache(cache_dir=str(tmp_path))
+
+    @pytest.fixture
+    def content_hash(self):
+        """Fixture con el hash de una imagen de prueba."""
+        return ResultCache.content_hash(np.ones((10, 10), dtype=np.uint8))
+
+    def test_get_put_roundtrip(self, cache, content_hash):
+        """Prueba que un valor guardado se recupera y cuenta como acierto."""
+        assert cache.get('ocr', content_hash) is None
+        blocks = [{'text': 'TOTAL $8,640', 'confidence': 0.9, 'bbox': [[0, 0], [1, 0], [1, 1], [0, 1]]}]
+        cache.put('ocr', content_hash, blocks)
+        assert cache.get('ocr', content_hash) == blocks
+
+        stats = cache.stats()['ocr']
+        assert stats['hits'] == 1
+        assert stats['misses'] == 1
+        assert stats['entries'] == 1
+
+    def test_variant_only_invalidates_its_level(self, cache, content_hash):
+        """Prueba que cambiar las reglas de extracción no invalida el nivel OCR."""
+        cache.put('ocr', content_hash, ['bloques'])
+        cache.put('fields', content_hash, {'total': '8640'}, variant='reglas-v1')
+        assert cache.get('fields', content_hash, variant='reglas-v2') is None
+        assert cache.get('ocr', content_hash) == ['bloques']
+
+    def test_ocr_no_depende_del_preprocesamiento(self, tmp_path, content_hash, monkeypatch):
+        """Prueba que el preprocesamiento solo invalida su nivel y el OCR también los campos."""
+        cache = ResultCache(cache_dir=str(tmp_path))
+        settings = {level: dict(values) for level, values in ResultCache.LEVEL_SETTINGS.items()}
+        settings['preprocessed']['DESKEW_MAX_ANGLE'] = -1
+        monkeypatch.setattr(ResultCache, 'LEVEL_SETTINGS', settings)
+        deskew = ResultCache(cache_dir=str(tmp_path))
+        assert deskew._key('preprocessed', content_hash, '') != cache._key('preprocessed', content_hash, '')
+        assert deskew._key('ocr', content_hash, '') == cache._key('ocr', content_hash, '')
+        assert deskew._key('fields', content_hash, '') == cache._key('fields', content_hash, '')
+
+        settings['ocr']['OCR_BACKEND'] = 'otro'
+        backend = ResultCache(cache_dir=str(tmp_path))
+        assert backend._key('ocr', content_hash, '') != cache._key('ocr', content_hash, '')
+        assert backend._key('fields', content_hash, '') != cache._key('fields', content_hash, '')
+        assert 'DESKEW_MAX_ANGLE' not in ResultCache.level_settings('fields')
+
+    def test_persistence(self, tmp_path, content_hash):
+        """Prueba que las entradas sobreviven a una nueva instancia."""
+        ResultCache(cache_dir=str(tmp_path)).put('fields', content_hash, {'total': '8640'})
+        assert ResultCache(cache_dir=str(tmp_path)).get('fields', content_hash) == {'total': '8640'}
+
+    def test_lru_eviction(self, tmp_path):
+        """Prueba que se desaloja la entrada usada hace más tiempo."""
+        cache = ResultCache(cache_dir=str(tmp_path), max_size={'preprocessed': 2500})
+        hashes = [ResultCache.content_hash(bytes([i])) for i in range(3)]
+        cache.put('preprocessed', hashes[0], np.zeros(1000, dtype=np.uint8))
+        cache.put('preprocessed', hashes[1], np.zeros(1000, dtype=np.uint8))
+        cache.get('preprocessed', hashes[0])
+        cache.put('preprocessed', hashes[2], np.zeros(1000, dtype=np.uint8))
+
+        assert cache.get('preprocessed', hashes[1]) is None
+        assert cache.get('preprocessed', hashes[0]) is not None
+        assert cache.stats()['preprocessed']['evictions'] == 1
+
+    def test_limite_compartido_entre_procesos(self, tmp_path):
+        """Prueba que el límite se aplica al directorio aunque lo llenen varias instancias."""
+        caches = [ResultCache(cache_dir=str(tmp_path), max_size={'preprocessed': 5000}) for _ in range(3)]
+        for cache in caches:
+            cache.stats()
+        for i in range(12):
+            caches[i % 3].put('preprocessed', ResultCache.content_hash(bytes([i])), np.zeros(1000, dtype=np.uint8))
+
+        level_dir = tmp_path / 'preprocessed'
+        on_disk = sum(path.stat().st_size for path in level_dir.rglob('*.pkl'))
+        assert on_disk <= 5000
+        assert caches[2].get('preprocessed', ResultCache.content_hash(bytes([11]))) is not None
+
+    def test_acierto_no_reescribe_fecha_reciente(self, cache, content_hash):
+        """Prueba que un acierto sobre una entrada recién escrita no toca el disco."""
+        cache.put('fields', content_hash, {'total': '8640'})
+        path = cache._path('fields', cache._key('fields', content_hash, ''))
+        os.utime(path, (1000, 1000))
+        cache.get('fields', content_hash)
+        assert os.stat(path).st_mtime > 1000
+
+        mtime = os.stat(path).st_mtime
+        cache.get('fields', content_hash)
+        assert os.stat(path).st_mtime == mtime
+
+    def test_invalid_level(self, cache, content_hash):
+        """Prueba el manejo de un nivel inexistente."""
+        with pytest.raises(ValueError):
+            cache.get('otro', content_hash)
+
+class TestStreamingExport:
+    """Pruebas para la exportación en streaming."""
+
+    @staticmethod
+    def resultados(n):
+        """Generador de resultados del pipeline."""
+        for i in range(n):
+            yield {'document_type': 'LUZ', 'is_valid': True, 'confidence': 0.9,
+                   'fields': {'matricula': '2121717', 'total': str(i), 'otro': 'x'}}
+
+    def test_jsonl_rota_por_registros(self, tmp_path):
+        """Prueba que los registros se reparten en partes sin perder ninguno."""
+        paths = ResultsExporter().export_stream(
+            self.resultados(25), 'lote', 'jsonl', directory=str(tmp_path), max_records=10
+        )
+        assert len(paths) == 3
+        records = [json.loads(line) for path in paths for line in open(path, encoding='utf-8')]
+        assert [r['fields']['total'] for r in records] == [str(i) for i in range(25)]
+
+    def test_csv_esquema_estable_y_nombres_unicos(self, tmp_path):
+        """Prueba que cada parte CSV repite la misma cabecera y que no se sobrescriben archivos."""
+        paths = ResultsExporter().export_stream(
+            self.resultados(6), 'lote', 'csv', directory=str(tmp_path),
+            schema=['document_type', 'matricula', 'total'], max_bytes=80
+        )
+        assert len(paths) > 1
+        rows = []
+        for path in paths:
+            with open(path, newline='', encoding='utf-8') as f:
+                reader = csv.DictReader(f)
+                assert reader.fieldnames == ['document_type', 'matricula', 'total']
+                rows.extend(reader)
+        assert [row['total'] for row in rows] == [str(i) for i in range(6)]
+
+        names = set()
+        for _ in range(5):
+            path, f = FileHandler.open_output_file(str(tmp_path), 'a', 'results', 'json')
+            f.close()
+            names.add(path)
+        assert len(names) == 5
+
+    def test_escritor_sin_serializacion_no_se_instancia(self, tmp_path):
+        """Prueba que un escritor debe definir su serialización para poder crearse."""
+        with pytest.raises(TypeError):
+            StreamWriter('lote', directory=str(tmp_path))
+
+class TestColumnarExport:
+    """Pruebas para la exportación a Parquet."""
+
+    def test_tipos_y_grupos_de_filas(self, tmp_path):
+        """Prueba los tipos de las columnas y que se escribe por grupos."""
+        pa = pytest.importorskip('pyarrow')
+        pq = pytest.importorskip('pyarrow.parquet')
+        resultados = (
+            {'document_type': 'LUZ' if i % 2 else 'AGUA', 'is_valid': True, 'confidence': 0.9,
+             'fields': {'total': f'${i},000', 'fecha_vencimiento': '17/MAY/2024', 'matricula': '2121717'}}
+            for i in range(1, 26)
+        )
+        path = ResultsExporter().export_to_parquet(resultados, 'lote', directory=str(tmp_path), row_group_size=10)
+        parquet = pq.ParquetFile(path)
+        assert parquet.metadata.num_row_groups == 3
+        assert parquet.metadata.num_rows == 25
+        schema = parquet.schema_arrow
+        assert pa.types.is_dictionary(schema.field('document_type').type)
+        assert schema.field('total').type == pa.float64()
+        assert schema.field('fecha_vencimiento').type == pa.date32()
+
+    def test_lectura_con_filtros_y_columnas(self, tmp_path):
+        """Prueba la lectura de solo algunas columnas y filas."""
+        pytest.importorskip('pyarrow')
+        exporter = ResultsExporter()
+        resultados = [
+            {'document_type': 'LUZ', 'fields': {'total': '8,640', 'fecha_emision': '2024-04-01'}},
+            {'document_type': 'AGUA', 'fields': {'total': '35,643', 'fecha_factura': '18-Abr-2024'}},
+            {'document_type': 'LUZ', 'fields': {'total': 'ilegible'}},
+        ]
+        path = exporter.export_to_parquet(resultados, 'lote', directory=str(tmp_path))
+        frame = exporter.read_columnar(path, columns=['document_type', 'total'],
+                                       filters=[('total', '>', 10000)])
+        assert list(frame.columns) == ['document_type', 'total']
+        assert frame['document_type'].tolist() == ['AGUA']
+        assert frame['total'].tolist() == [35643.0]
+        todo = exporter.read_columnar(path)
+        assert todo['fecha_factura'][1] == date(2024, 4, 18)
+        assert todo['total'].isna().tolist() == [False, False, True]
+
+class TestExcelExport:
+    """Pruebas para la exportación a Excel."""
+
+    def test_hoja_por_tipo_y_celdas_tipadas(self, tmp_path):
+        """Prueba que cada tipo va a su hoja con montos y fechas tipados."""
+        resultados = [
+            {'document_type': 'LUZ', 'is_valid': True, 'fields': {'total': '$8,640', 'fecha_vencimiento': '17/MAY/2024'}},
+            {'document_type': 'AGUA', 'is_valid': False, 'fields': {'total': 'ilegible', 'fecha_factura': '18-Abr-2024'}},
+            {'document_type': 'LUZ', 'is_valid': True, 'fields': {'total': '35,643'}},
+        ]
+        path = ResultsExporter().export_to_excel(
+            iter(resultados), 'lote', directory=str(tmp_path),
+            schema=['document_type', 'is_valid', 'total', 'fecha_factura', 'fecha_vencimiento']
+        )
+        workbook = load_workbook(path)
+        assert workbook.sheetnames == ['LUZ', 'AGUA']
+        luz = list(workbook['LUZ'].values)
+        assert luz[0] == ('is_valid', 'total', 'fecha_factura', 'fecha_vencimiento')
+        assert luz[1][1] == 8640.0 and luz[2][1] == 35643.0
+        assert luz[1][3].date() == date(2024, 5, 17)
+        assert workbook['LUZ']['B2'].number_format == ExcelStreamWriter.AMOUNT_FORMAT
+        agua = list(workbook['AGUA'].values)
+        assert agua[1][1] == 'ilegible'
+        assert agua[1][2].date() == date(2024, 4, 18)
+
+class TestRawFileStore:
+    """Pruebas para el almacén de archivos originales."""
+
+    def test_contenido_repetido_no_se_reescribe(self, tmp_path):
+        """Prueba que los duplicados se detectan y que cada subida queda en el índice."""
+        store = RawFileStore(root=str(tmp_path))
+        path, created = store.put(b'factura', 'Factura.PNG')
+        content_hash = RawFileStore.content_hash(b'factura')
+        assert created
+        assert path == str(tmp_path / content_hash[:2] / content_hash[2:4] / f'{content_hash}.png')
+        mtime = os.path.getmtime(path)
+
+        same_path, created = store.put(b'factura', 'otra.jpg')
+        assert not created and same_path == path
+        assert os.path.getmtime(path) == mtime
+        assert [e['filename'] for e in store.entries()] == ['Factura.PNG', 'otra.jpg']
+        assert {e['sha256'] for e in store.entries()} == {content_hash}
+
+    def test_permisos_segun_umask(self, tmp_path):
+        """Prueba que el archivo guardado tiene los permisos de la umask y no los del temporal."""
+        path, _ = RawFileStore(root=str(tmp_path)).put(b'factura', 'factura.png')
+        umask = os.umask(0)
+        os.umask(umask)
+        assert os.stat(path).st_mode & 0o777 == 0o666 & ~umask
+
+    def test_busqueda_por_nombre_y_sin_temporales(self, tmp_path):
+        """Prueba que el nombre original lleva a su última subida y que no quedan temporales."""
+        store = RawFileStore(root=str(tmp_path))
+        first, _ = store.put(b'enero', 'factura.png')
+        second, _ = store.put(b'febrero', 'factura.png')
+        assert first != second
+        assert store.lookup('factura.png') == second
+        assert store.lookup('nunca.png') is None
+        assert store.find(RawFileStore.content_hash(b'enero')) == first
+        assert not [p for p in tmp_path.rglob('*.tmp')]
@@ -0,0 +1,80 @@
+# tests/test_validation.py
+import pytest
+import numpy as np
+import pandas as pd
+from datetime import date
+from src.validation.date_parser import DateParser
+from src.validation.data_cleaner import DataCleaner
+from src.validation.field_validator import FieldValidator, FieldError
+
+class TestDateParser:
+    """Pruebas para el analizador de fechas."""
+
+    @pytest.fixture
+    def parser(self):
+        """Fixture con el analizador de los formatos de configuración."""
+        return DateParser.for_formats()
+
+    def test_formatos_y_meses_en_espanol(self, parser):
+        """Prueba los formatos de las facturas con meses en español e inglés."""
+        assert parser.parse('18-Abr-2024') == date(2024, 4, 18)
+        assert parser.to_iso('17/MAY/2024') == '2024-05-17'
+        assert parser.to_iso('1-ene-2025') == '2025-01-01'
+        assert parser.to_iso('18-Apr-2024') == '2024-04-18'
+        assert parser.to_iso('2024-04-01') == '2024-04-01'
+        assert parser.to_iso('31-Abr-2024') is None
+        assert parser.to_iso('29/FEB/2023') is None
+        assert parser.to_iso('18-Xyz-2024') is None
+        assert not parser.is_valid('2024/04/01')
+        assert DateParser(['%d.%m.%y']).to_iso('05.06.24') == '2024-06-05'
+
+    def test_columnas_y_limpieza(self, parser):
+        """Prueba la API por lotes y que DataCleaner y FieldValidator la usan."""
+        assert parser.parse_many(['18-Abr-2024', None, 'x', '18-Abr-2024']) == [
+            '2024-04-18', None, None, '2024-04-18'
+        ]
+        assert DataCleaner.clean_date('17/MAY/2024') == '2024-05-17'
+        assert FieldValidator.validate_date('18-Abr-2024')
+        assert FieldValidator().clean_date('18-Abr-2024') == '2024-04-18'
+        with pytest.raises(ValueError):
+            DataCleaner.clean_date('mañana')
+        assert DateParser.abbreviate_months('18-Abril-2024') == '18-ABR-2024'
+
+class TestFrames:
+    """Pruebas para la validación y limpieza por columnas."""
+
+    @pytest.fixture
+    def registros(self):
+        """Registros extraídos de varias facturas."""
+        return [
+            {'document_type': 'AGUA', 'fecha_factura': '18-Abr-2024', 'total': '$8,640',
+             'fecha_vencimiento': '17/MAY/2024'},
+            {'document_type': 'LUZ', 'matricula': '2121717', 'fecha_emision': '2024-04-01',
+             'total': '35,643', 'fecha_vencimiento': '31-Abr-2024'},
+            {'document_type': 'LUZ', 'matricula': '12', 'fecha_emision': '2024-04-01', 'total': '8640'},
+            {'document_type': 'GAS'},
+        ]
+
+    def test_mascara_igual_que_validate_fields(self, registros):
+        """Prueba que la máscara por fila da los mismos errores que la validación por dict."""
+        validator = FieldValidator()
+        errors = validator.validate_frame(pd.DataFrame(registros))
+        assert list(errors.index) == [0, 1, 2, 3]
+        assert errors[0] == FieldError.NONE
+        assert errors[1] == FieldError.INVALID_DATE
+        assert errors[2] == FieldError.MISSING_FIELD | FieldError.INVALID_AMOUNT | FieldError.INVALID_MATRICULA
+        assert errors[3] == FieldError.INVALID_TYPE
+        for registro, mask in zip(registros, errors):
+            fields = {k: v for k, v in registro.items() if k != 'document_type'}
+            assert validator.validate_fields(fields, registro['document_type'])['is_valid'] == (mask == 0)
+
+    def test_limpieza_por_columnas(self, registros):
+        """Prueba que clean_frame normaliza montos, fechas y matrículas."""
+        frame = pd.DataFrame(registros)
+        cleaned = DataCleaner().clean_frame(frame)
+        assert cleaned['total'].tolist()[:3] == [8640.0, 35643.0, 8640.0]
+        assert np.isnan(cleaned['total'][3])
+        assert cleaned['fecha_factura'].tolist() == ['2024-04-18', None, None, None]
+        assert cleaned['fecha_vencimiento'][1] is None
+        assert cleaned['matricula'].tolist()[:3] == [None, '2121717', '12']
+        assert frame['total'][0] == '$8,640'
@@ -6,19 +6,36 @@ from PIL import Image
 import os
 import time
 from typing import Dict, Any
-import easyocr
 
+from src.ocr.reader_registry import ReaderRegistry
 from src.preprocessing.image_processor import ImageProcessor
 from src.features.feature_extractor import FeatureExtractor
+from src.utils.cache import ResultCache
 from config.settings import (
     OCR_LANGUAGES, 
     OCR_GPU, 
     OCR_MODEL_STORAGE,
+    OCR_BACKEND,
+    OCR_QUANTIZE,
+    LABEL_VOCABULARY,
+    LABEL_COMMON_WORDS,
     STREAMLIT_TITLE, 
-    STREAMLIT_DESCRIPTION
+    STREAMLIT_DESCRIPTION,
+    CACHE_ENABLED
 )
 
 class OCRApp:
+    # Identificador del cálculo OCR de la aplicación guardado en la caché
+    # (el reconocedor cuantizado solo se usa con el backend torch, como en ReaderRegistry).
+    # La aplicación guarda el OCR y los campos con el hash del archivo subido,
+    # no de la imagen preprocesada, así que incluye las configuraciones del
+    # preprocesamiento
+    OCR_CACHE_VARIANT = (
+        f"app:readtext:contrast=1.5:backend={OCR_BACKEND}"
+        f":quantize={bool(OCR_QUANTIZE) and OCR_BACKEND == 'torch'}"
+        f":preprocessed={ResultCache.fingerprint(ResultCache.level_settings('preprocessed'))}"
+    )
+
     def __init__(self):
         """Inicializa la aplicación web."""
         # Configurar página
@@ -31,6 +48,15 @@ class OCRApp:
         # Inicializar procesadores
         self.image_processor = ImageProcessor()
         self.feature_extractor = FeatureExtractor()
+        self.cache = ResultCache() if CACHE_ENABLED else None
+        # Los campos dependen del OCR, de los patrones, de la estrategia de
+        # extracción y de la corrección de etiquetas
+        self.fields_cache_variant = ResultCache.fingerprint([
+            self.OCR_CACHE_VARIANT,
+            self.feature_extractor.patrones_base,
+            self.feature_extractor.strategy,
+            (LABEL_VOCABULARY, LABEL_COMMON_WORDS) if self.feature_extractor.label_matcher is not None else None,
+        ])
         
         # Inicializar EasyOCR con manejo de errores
         self._initialize_ocr()
@@ -43,10 +69,10 @@ class OCRApp:
                 os.makedirs(OCR_MODEL_STORAGE, exist_ok=True)
                 
                 # Primer intento de inicialización
-                self.reader = easyocr.Reader(
+                self.reader = ReaderRegistry.get_reader(
                     OCR_LANGUAGES,
-                    gpu=OCR_GPU,
-                    model_storage_directory=OCR_MODEL_STORAGE,
+                    OCR_GPU,
+                    OCR_MODEL_STORAGE,
                     download_enabled=True,
                     verbose=False
                 )
@@ -56,10 +82,10 @@ class OCRApp:
             st.warning('⚠️ Error de permisos. Reiniciando la carga del modelo...')
             time.sleep(2)  # Esperar a que el sistema libere recursos
             try:
-                self.reader = easyocr.Reader(
+                self.reader = ReaderRegistry.get_reader(
                     OCR_LANGUAGES,
-                    gpu=OCR_GPU,
-                    model_storage_directory=OCR_MODEL_STORAGE,
+                    OCR_GPU,
+                    OCR_MODEL_STORAGE,
                     download_enabled=True,
                     verbose=False
                 )
@@ -103,14 +129,21 @@ class OCRApp:
         if st.button("🔍 Procesar Factura"):
             with st.spinner('⏳ Procesando imagen...'):
                 try:
-                    # Convertir imagen
-                    cv_image = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
-                    
-                    # Procesar imagen
-                    processed_image = self.image_processor.process(cv_image)
-                    
-                    # Extraer información
-                    fields = self.extract_text(processed_image)
+                    content_hash = ResultCache.content_hash(uploaded_file.getvalue())
+                    fields = self._cache_get('fields', content_hash, self.fields_cache_variant)
+
+                    if fields is None:
+                        # Procesar imagen
+                        processed_image = self._cache_get('preprocessed', content_hash)
+                        if processed_image is None:
+                            cv_image = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
+                            processed_image = self.image_processor.process(cv_image)
+                            self._cache_put('preprocessed', content_hash, processed_image)
+
+                        # Extraer información
+                        fields = self.extract_text(processed_image, content_hash)
+                        if fields:
+                            self._cache_put('fields', content_hash, fields, self.fields_cache_variant)
                     
                     if fields:
                         st.success("✅ Extracción completada")
@@ -121,14 +154,29 @@ class OCRApp:
                 except Exception as e:
                     st.error(f"❌ Error procesando la imagen: {str(e)}")
 
-    def extract_text(self, image) -> Dict[str, Any]:
+    def _cache_get(self, level: str, content_hash: str, variant: str = ''):
+        """Consulta la caché si está activa."""
+        if self.cache is None:
+            return None
+        return self.cache.get(level, content_hash, variant)
+
+    def _cache_put(self, level: str, content_hash: str, value, variant: str = ''):
+        """Guarda en la caché si está activa."""
+        if self.cache is not None:
+            self.cache.put(level, content_hash, value, variant)
+
+    def extract_text(self, image, content_hash: str = None) -> Dict[str, Any]:
         """Extrae texto de la imagen procesada."""
         try:
-            # Mejorar contraste
-            enhanced = cv2.convertScaleAbs(image, alpha=1.5, beta=0)
-            
-            # Extraer texto
-            results = self.reader.readtext(enhanced)
+            results = self._cache_get('ocr', content_hash, self.OCR_CACHE_VARIANT) if content_hash else None
+            if results is None:
+                # Mejorar contraste
+                enhanced = cv2.convertScaleAbs(image, alpha=1.5, beta=0)
+                
+                # Extraer texto
+                results = self.reader.readtext(enhanced)
+                if content_hash:
+                    self._cache_put('ocr', content_hash, results, self.OCR_CACHE_VARIANT)
             
             # Convertir resultados
             text_blocks = [